@@ -0,0 +1,233 @@
+import argparse
+import io
+import json
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import islice
+from pathlib import Path
+
+from analysis import plots
+from utils.analytics import Rollups, metric_label
+from utils.columnar import ColumnarExport
+from utils.history_stream import iter_journal, iter_json_array
+from utils.storage import BACKENDS, JournalStorage
+
+# Storage backend implied by the history file's extension
+SUFFIXES = {".json": "json", ".jsonl": "journal", ".db": "sqlite", ".sqlite": "sqlite"}
+# Entries parsed together by the vectorized nutrition and timestamp helpers
+BATCH_SIZE = 5000
+
+
+class HistoryFile:
+    """
+    Read-only view of a history file in any storage format.
+
+    Unlike the storage backends, it never writes to the file or next to
+    it: a JSON array passed as a journal is not migrated, no rollups
+    sidecar is created and SQLite databases are opened read-only (SQLite
+    may still create the ``-wal`` and ``-shm`` files it reads WAL
+    databases through).
+    """
+
+    def __init__(self, path, backend: str):
+        """
+        Initialize the view.
+
+        :param path: The history file.
+        :param backend: One of ``BACKENDS``.
+        """
+        self.path = Path(path)
+        self.backend = backend
+
+    def iter_history(self):
+        """
+        Stream the entries of the history.
+
+        :return: An iterator over the recipe entries, oldest first.
+        """
+        if self.backend == "sqlite":
+            uri = f"{self.path.resolve().as_uri()}?mode=ro"
+            with closing(sqlite3.connect(uri, uri=True)) as conn:
+                for (entry,) in conn.execute("SELECT entry FROM history ORDER BY seq"):
+                    yield json.loads(entry)
+            return
+        with self.path.open("rb") as f:
+            if _starts_with_array(f):
+                yield from iter_json_array(io.TextIOWrapper(f, encoding="utf-8"))
+            else:
+                yield from iter_journal(f, JournalStorage.TOMBSTONE)
+
+
+def _starts_with_array(f) -> bool:
+    """
+    Check whether a file holds a JSON array rather than a journal, and
+    rewind it.
+
+    :param f: The file opened in binary mode.
+    :return: True if the first non-whitespace character is ``[``.
+    """
+    try:
+        for chunk in iter(lambda: f.read(64), b""):
+            stripped = chunk.lstrip()
+            if stripped:
+                return stripped[:1] == b"["
+        return False
+    finally:
+        f.seek(0)
+
+
+def open_history(path, backend: str = None) -> HistoryFile:
+    """
+    Open an existing history file for reading.
+
+    :param path: The history file.
+    :param backend: One of ``BACKENDS``; inferred from the extension if omitted.
+    :return: A read-only view exposing ``iter_history``.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found")
+    return HistoryFile(path, backend or SUFFIXES.get(path.suffix, "json"))
+
+
+def build_report(history, batch_size: int = BATCH_SIZE) -> Rollups:
+    """
+    Compute every report in a single pass over the history. Entries are
+    consumed in batches whose nutrition values and timestamps are parsed
+    with the vectorized helpers, so a streamed history is never held in
+    memory.
+
+    :param history: An iterable of history entries.
+    :param batch_size: The number of entries parsed together.
+    :return: The rollups holding the nutrition, daily and ingredient counts.
+    """
+    rollups = Rollups()
+    entries = iter(history)
+    for batch in iter(lambda: list(islice(entries, batch_size)), []):
+        rollups.add_many(batch)
+    return rollups
+
+
+def format_report(rollups: Rollups, top: int = 10) -> str:
+    """
+    Describe the reports as plain text.
+
+    :param rollups: The rollups of the history.
+    :param top: The number of ingredients to list.
+    :return: The text report.
+    """
+    lines = [f"Recipes analyzed: {rollups.recipes}", "", "Nutrition summary:"]
+    columns = ("count", "mean", "min", "q1", "median", "q3", "max")
+    lines.append(f"{'':<24}" + "".join(f"{c:>10}" for c in columns))
+    for row in rollups.nutrition_summary():
+        lines.append(
+            f"{metric_label(row)[:23]:<24}"
+            + f"{row['count']:>10}"
+            + "".join(f"{row[c]:>10.1f}" for c in columns[1:])
+        )
+    lines += ["", "Recipes generated per day:"]
+    lines += [f"  {day}  {count}" for day, count in rollups.daily_counts()]
+    lines += ["", f"Top {top} ingredients:"]
+    lines += [f"  {count:>5}  {name}" for name, count in rollups.top_ingredients(top)]
+    return "\n".join(lines)
+
+
+def render_plots(rollups: Rollups, out_dir, workers: int = None) -> list:
+    """
+    Render every plot that has data, each in its own worker process.
+
+    :param rollups: The rollups of the history.
+    :param out_dir: The directory to write the PNG files to.
+    :param workers: The maximum number of worker processes; defaults to one
+        per plot.
+    :return: The paths of the written files.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    summary = rollups.nutrition_summary()
+    jobs = []
+    if any(row["metric"].lower() in plots.NUTRIENTS for row in summary):
+        jobs.append((plots.nutrition_boxplot, summary, "nutrition_summary.png"))
+    if rollups.daily:
+        jobs.append((plots.trends_plot, rollups.daily_counts(), "trends_over_time.png"))
+    if rollups.ingredients:
+        top = rollups.top_ingredients(10)
+        jobs.append((plots.ingredient_bars, top, "ingredient_frequency.png"))
+    if not jobs:
+        return []
+    with ProcessPoolExecutor(max_workers=workers or len(jobs)) as pool:
+        futures = [pool.submit(plot, data, out_dir / name) for plot, data, name in jobs]
+        return [f.result() for f in futures]
+
+
+def main(argv=None) -> int:
+    """
+    Run the analysis from the command line.
+
+    :param argv: The arguments; defaults to ``sys.argv[1:]``.
+    :return: The exit status.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m analysis",
+        description="Summarize the recipe history and plot the results.",
+    )
+    parser.add_argument(
+        "history",
+        nargs="?",
+        default="recipe_history.json",
+        help="history file, or a columnar export directory (default: %(default)s)",
+    )
+    parser.add_argument(
+        "output_dir",
+        nargs="?",
+        default="analysis",
+        help="directory for the plots (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        help="storage format of the history (default: inferred from the extension)",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="DIR",
+        help="append new entries to the columnar export in DIR and report from it",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="plotting processes (default: one per plot)"
+    )
+    args = parser.parse_args(argv)
+
+    if Path(args.history).is_dir():
+        # The export's cached rollups replace parsing the JSON history
+        try:
+            rollups = ColumnarExport(args.history).rollups()
+        except FileNotFoundError as e:
+            print(f"Error: {e}.", file=sys.stderr)
+            return 1
+    else:
+        try:
+            history = open_history(args.history, args.backend)
+        except FileNotFoundError as e:
+            print(f"Error: {e}.", file=sys.stderr)
+            return 1
+        if args.export:
+            export = ColumnarExport(args.export)
+            added, rewritten = export.update(history)
+            print(f"Exported {added} new entries to {args.export}")
+            if rewritten:
+                print(f"Rewrote {rewritten} entries to drop deleted ones")
+            rollups = export.rollups()
+        else:
+            rollups = build_report(history.iter_history())
+    if not rollups.recipes:
+        print(f"No recipes found in {args.history}.", file=sys.stderr)
+        return 1
+
+    print(format_report(rollups))
+    print()
+    for path in render_plots(rollups, args.output_dir, args.workers):
+        print(f"▶️ Plot saved to {path}")
+    return 0
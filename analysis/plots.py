@@ -0,0 +1,91 @@
+from datetime import date
+
+from matplotlib.figure import Figure
+
+from utils.analytics import metric_label
+
+# Nutrients shown in the distribution plot
+NUTRIENTS = ("calories", "protein", "fat", "carbs", "fiber")
+
+
+def _save(fig: Figure, path) -> str:
+    """
+    Write a figure to disk.
+
+    :param fig: The figure to save.
+    :param path: The output file.
+    :return: The output file as a string.
+    """
+    fig.tight_layout()
+    fig.savefig(path)
+    return str(path)
+
+
+def nutrition_boxplot(summary: list, path) -> str:
+    """
+    Plot the distribution of the main nutrients across recipes.
+    Whiskers span the full range, as the summary holds no outliers.
+
+    :param summary: The rows of ``Rollups.nutrition_summary``.
+    :param path: The output file.
+    :return: The output file.
+    """
+    stats = [
+        {
+            "label": metric_label(row),
+            "whislo": row["min"],
+            "q1": row["q1"],
+            "med": row["median"],
+            "q3": row["q3"],
+            "whishi": row["max"],
+            "fliers": [],
+        }
+        for row in summary
+        if row["metric"].lower() in NUTRIENTS
+    ]
+    fig = Figure(figsize=(8, 5))
+    ax = fig.add_subplot()
+    ax.bxp(stats)
+    ax.set_title("Nutrition Distribution Across Recipes")
+    ax.set_ylabel("Amount per serving")
+    ax.tick_params(axis="x", labelrotation=45)
+    return _save(fig, path)
+
+
+def trends_plot(daily: list, path) -> str:
+    """
+    Plot the number of recipes generated per day.
+
+    :param daily: ``(iso_date, count)`` pairs in date order.
+    :param path: The output file.
+    :return: The output file.
+    """
+    fig = Figure(figsize=(10, 4))
+    ax = fig.add_subplot()
+    ax.plot(
+        [date.fromisoformat(day) for day, _ in daily],
+        [count for _, count in daily],
+        marker="o",
+    )
+    ax.set_title("Recipes Generated Over Time")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Count")
+    fig.autofmt_xdate()
+    return _save(fig, path)
+
+
+def ingredient_bars(top: list, path) -> str:
+    """
+    Plot the most frequently used ingredients.
+
+    :param top: ``(ingredient, count)`` pairs, most frequent first.
+    :param path: The output file.
+    :return: The output file.
+    """
+    fig = Figure(figsize=(8, 5))
+    ax = fig.add_subplot()
+    # Most frequent at the top
+    ax.barh([name for name, _ in reversed(top)], [count for _, count in reversed(top)])
+    ax.set_title("Top Ingredients Used")
+    ax.set_xlabel("Usage Count")
+    return _save(fig, path)
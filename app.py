@@ -1,191 +1,83 @@
-import json
+import time
+
+# Taken before the other imports so the timing report includes them
+RUN_START = time.perf_counter()
+
 import os
 import random
-import re
 import traceback
-import uuid
-from datetime import datetime
 from pathlib import Path
 
-import altair as alt
-import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
-from streamlit_local_storage import LocalStorage
 
 from components.display import display_recipe
 from components.inputs import get_user_input
-from utils.genai_client import GenAIRecipeGenerator
-from utils.image_fetcher import UnsplashImageFetcher
-
-# ─── Storage class using browser localStorage ───────────────────
-_local = LocalStorage()
-if getattr(_local, "storedItems", None) is None:
-    _local.storedItems = {}
-
-
-class Storage:
-    """
-    Class to manage the local storage of recipe history.
-    """
-
-    def __init__(self):
-        """
-        Initialize the storage manager using browser localStorage.
-        """
-        # Nothing to initialize beyond the LocalStorage instance
-        pass
-
-    def load_history(self) -> list:
-        """
-        Load the recipe history from localStorage.
-
-        :return: A list of recipe entries.
-        """
-        try:
-            raw = _local.getItem("pantrypal_history") or "[]"
-        except Exception:
-            # If localStorage isn't ready or storedItems is invalid,
-            # just return an empty history.
-            return []
-
-        try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            return []
-
-    def save_recipe(self, recipe, image_url, user_ings, substitutions):
-        """
-        Save a recipe entry to the history.
-        This includes the recipe details, image URL, user ingredients, and substitutions.
-        The entry is appended to the existing history.
-        Each entry is assigned a unique ID and timestamp.
-        The history is saved back to localStorage.
-
-        :param recipe: The recipe dictionary containing details like name, ingredients, instructions, and nutrition.
-        :param image_url: The URL of the hero image for the recipe.
-        :param user_ings: The list of ingredients provided by the user.
-        :param substitutions: The substitutions for ingredients, either as a list of dicts or a dict mapping.
-        """
-        history = self.load_history()
-        entry = {
-            "id": uuid.uuid4().hex,
-            # Local time instead of UTC
-            "timestamp": datetime.now().isoformat(),
-            "recipe": recipe,
-            "recipe_ings": recipe.get("ingredients", []),
-            "image_url": image_url,
-            "user_ings": user_ings,
-            "substitutions": substitutions,
-        }
-        history.append(entry)
-        _local.setItem("pantrypal_history", json.dumps(history, indent=2))
-
-    def delete_recipe(self, entry_id: str):
-        """
-        Delete a recipe entry from the history.
-        This method removes the entry with the specified ID from the history.
-        The updated history is saved back to localStorage.
-        If the entry ID is not found, no action is taken.
-        """
-        history = self.load_history()
-        history = [e for e in history if e["id"] != entry_id]
-        _local.setItem("pantrypal_history", json.dumps(history, indent=2))
-
-    def clear_history(self):
-        """
-        Clear the entire recipe history.
-        This method removes all entries from the history.
-        The history is saved back to localStorage as an empty list.
-        """
-        _local.deleteAll()
-
-
-def normalize_ingredients(raw_ings):
-    """
-    Normalize the ingredients list to a consistent format.
-
-    :param raw_ings: The raw ingredients list, which can contain strings or dictionaries.
-    :return: A list of normalized ingredient strings.
-    """
-    out = []
-    for i in raw_ings:
-        if isinstance(i, str):
-            out.append(i)
-        elif isinstance(i, dict):
-            txt = i.get("item") or i.get("name") or i.get("text")
-            out.append(txt if isinstance(txt, str) else json.dumps(i))
-        else:
-            out.append(str(i))
-    return out
+from utils import clients, pipeline, timing
+from utils.analytics import chart_frames
+from utils.ingredients import IngredientIndex, normalize_ingredients
+from utils.storage import open_storage
 
 
 def render_analysis():
     """
-    Load the recipe history and render three interactive Altair charts:
+    Render three interactive Altair charts from the history's rollups:
       1) Nutrition boxplots
       2) Recipes generated over time (line)
       3) Top ingredients by frequency (bar)
 
+    The rollups are maintained as recipes are saved and deleted, so this
+    does not depend on the size of the history.
     This function is called when the user clicks the "View Analytics" button in the sidebar.
 
     :return: None
     """
-    history = storage.load_history()
-    if not history:
+    rollups = storage.rollups()
+    if not rollups.recipes:
         st.error("📈 No recipe history found to analyze.")
         return
 
-    # ─── Nutrition DataFrame ───────────────────────────────────
-    nutri_rows = []
-    for entry in history:
-        nutri = entry.get("recipe", {}).get("nutrition", {}) or {}
-        for key, val in nutri.items():
-            m = re.match(r"^\s*([\d\.]+)", val or "")
-            if m:
-                nutri_rows.append(
-                    {
-                        "name": entry["recipe"].get("name", "Unknown"),
-                        "metric": key,
-                        "value": float(m.group(1)),
-                    }
-                )
-
-    if nutri_rows:
-        df_nutri = pd.DataFrame(nutri_rows)
+    import altair as alt
+
+    frames = chart_frames(rollups)
+
+    # ─── Nutrition Distribution ────────────────────────────────
+    df_nutri = frames["nutrition"]
+    if df_nutri is not None:
         st.subheader("🍽️ Nutrition Distribution")
-        box = (
-            alt.Chart(df_nutri)
-            .mark_boxplot(extent="min-max")
-            .encode(
-                x=alt.X("metric:N", title="Nutrient"),
-                y=alt.Y("value:Q", title="Amount per serving"),
-                color=alt.Color("metric:N", legend=None),
-            )
-            .interactive()
+        # Amounts are in each nutrient's canonical unit, named in its label
+        base = alt.Chart(df_nutri).encode(
+            x=alt.X("label:N", title="Nutrient (unit)"),
+            color=alt.Color("metric:N", legend=None),
+        )
+        # Box plot drawn from precomputed quartiles (min-max whiskers)
+        whiskers = base.mark_rule().encode(
+            y=alt.Y("min:Q", title="Amount per serving"), y2="max:Q"
+        )
+        boxes = base.mark_bar(size=28).encode(
+            y="q1:Q",
+            y2="q3:Q",
+            tooltip=[
+                "metric:N",
+                "unit:N",
+                "count:Q",
+                "min:Q",
+                "q1:Q",
+                "median:Q",
+                "q3:Q",
+                "max:Q",
+            ],
+        )
+        medians = base.mark_tick(color="white", size=28).encode(y="median:Q")
+        st.altair_chart(
+            (whiskers + boxes + medians).interactive(), use_container_width=True
         )
-        st.altair_chart(box, use_container_width=True)
     else:
         st.info("No numeric nutrition data available.")
 
     # ─── Recipes Over Time ─────────────────────────────────────
-    dates = []
-    for entry in history:
-        ts = entry.get("timestamp", "")
-        try:
-            dt = datetime.fromisoformat(ts.replace("Z", ""))
-            dates.append(dt.date())
-        except Exception:
-            pass
-
-    if dates:
-        df_time = (
-            pd.Series(dates)
-            .value_counts()
-            .rename_axis("date")
-            .reset_index(name="count")
-        )
-        df_time["date"] = pd.to_datetime(df_time["date"])
+    df_time = frames["daily"]
+    if df_time is not None:
         st.subheader("🕒 Recipes Generated Over Time")
         line = (
             alt.Chart(df_time)
@@ -202,21 +94,8 @@ def render_analysis():
         st.info("No timestamp data available for trends.")
 
     # ─── Top Ingredients ───────────────────────────────────────
-    all_ings = []
-    for entry in history:
-        for ing in entry.get("recipe", {}).get("ingredients", []):
-            if isinstance(ing, dict):
-                all_ings.append(ing.get("item", ing.get("name", str(ing))))
-            else:
-                all_ings.append(str(ing))
-    if all_ings:
-        freq = (
-            pd.Series([i.strip().lower() for i in all_ings])
-            .value_counts()
-            .reset_index(name="frequency")
-            .rename(columns={"index": "ingredient"})
-            .head(10)
-        )
+    freq = frames["ingredients"]
+    if freq is not None:
         st.subheader("🌶️ Top 10 Ingredients Used")
         bar = (
             alt.Chart(freq)
@@ -233,6 +112,216 @@ def render_analysis():
         st.info("No ingredients data available.")
 
 
+def stream_recipe(ings, restrs, serves, on_name=None, on_ingredients=None) -> dict:
+    """
+    Generate a recipe and render a live preview as it streams in:
+    the name, each ingredient and each instruction appear as soon as the
+    model has produced them. The preview is cleared once the recipe is done.
+
+    :param ings: The list of ingredients.
+    :param restrs: The list of dietary restrictions.
+    :param serves: The number of servings.
+    :param on_name: Optional callback invoked with the name as soon as it is known.
+    :param on_ingredients: Optional callback invoked with the ingredient list
+        as soon as it is complete.
+    :return: The full recipe dictionary.
+    """
+    preview = st.empty()
+    recipe = {}
+    with preview.container():
+        title = st.empty()
+        st.subheader("📝 Ingredients")
+        ing_area = st.container()
+        st.subheader("👩‍🍳 Instructions")
+        step_area = st.container()
+        step_no = 0
+        for event, value in ai_gen.generate_stream(ings, restrs, serves):
+            if event == "name":
+                title.title(f"🍲 {value}")
+                if on_name:
+                    on_name(value)
+            elif event == "ingredient":
+                ing_area.write(f"• {normalize_ingredients([value])[0]}")
+            elif event == "ingredients":
+                if on_ingredients:
+                    on_ingredients(value)
+            elif event == "instruction":
+                step_no += 1
+                step_area.write(f"**{step_no}.** {value}")
+            elif event == "recipe":
+                recipe = value
+    preview.empty()
+    return recipe
+
+
+def stage_recipe(ings, restrs, serves):
+    """
+    Generate a recipe and stage it for the image picker.
+    Image search starts in the background as soon as the recipe name has
+    streamed in, and the substitution lookup starts as soon as the
+    ingredients are known, so both overlap with generation and with the
+    user picking an image.
+
+    :param ings: The list of ingredients provided by the user.
+    :param restrs: The list of dietary restrictions.
+    :param serves: The number of servings.
+    """
+    started = {}
+
+    def _find_images(name):
+        urls = img_fetch.fetch_images(name, n=5)
+        image_cache.prefetch(urls, "thumb")  # warm the picker thumbnails
+        return urls
+
+    def _search_images(name):
+        if img_fetch and "images" not in started:
+            started["images"] = pipeline.submit(_find_images, name)
+
+    def _lookup_substitutions(recipe_ings):
+        if "substitutions" in started:
+            return
+        # Substitutes are only looked up for what the user does not have
+        missing = IngredientIndex(ings).missing(normalize_ingredients(recipe_ings))
+        started["substitutions"] = (
+            pipeline.submit(ai_gen.get_substitutions, missing)
+            if missing
+            else pipeline.resolved({})
+        )
+
+    recipe = stream_recipe(
+        ings,
+        restrs,
+        serves,
+        on_name=_search_images,
+        on_ingredients=_lookup_substitutions,
+    )
+    recipe_ings = normalize_ingredients(recipe["ingredients"])
+    recipe["ingredients"] = recipe_ings
+    # Only needed if the ingredient list never streamed as a complete value
+    _lookup_substitutions(recipe_ings)
+    st.session_state.temp = {
+        "recipe": recipe,
+        "recipe_ings": recipe_ings,
+        "images": started.get("images") or pipeline.resolved([]),
+        "substitutions": started["substitutions"],
+        "user_ings": ings,
+    }
+    st.session_state.pop("current", None)
+
+
+@st.fragment
+def pick_image(temp: dict, opts: list):
+    """
+    Render the image options for a staged recipe and save the recipe once
+    one is confirmed. This is a fragment, so changing the selection reruns
+    only the picker; confirming reruns the whole app to show the recipe.
+
+    :param temp: The staged recipe from ``stage_recipe``.
+    :param opts: The candidate image URLs.
+    :return: None
+    """
+    cols = st.columns(min(len(opts), 3))
+    for idx, thumb in enumerate(image_cache.prefetch(opts, "thumb")):
+        with cols[idx % len(cols)]:
+            st.image(thumb, use_container_width=True)
+            st.caption(f"Option {idx + 1}")
+
+    choice = st.radio(
+        "Select an image:",
+        options=list(range(len(opts))),
+        format_func=lambda i: f"Option {i + 1}",
+    )
+
+    if st.button("Confirm Image ✅"):
+        # Only waits if the lookup started at generation is still running
+        subs = pipeline.result_or(temp["substitutions"], {})
+        entry = storage.save_recipe(
+            temp["recipe"], opts[choice], temp["user_ings"], subs
+        )
+        st.session_state.current = entry
+        st.session_state.pop("temp")
+        # Pending browser writes are flushed at the end of the full rerun
+        st.rerun()
+
+
+def render_history(total: int):
+    """
+    Render one page of the recipe history, newest first.
+    Every entry on the page gets a compact summary row with a thumbnail;
+    only the entry the user opened is rendered in full, so rendering a
+    rerun depends on the page size. Reading the page grows with the page
+    number on the journal, SQLite and browser backends, but with the size
+    of the history on the JSON backend, which has to stream the whole file.
+    Images missing from the local cache are shown from their remote URL
+    while they are downloaded in the background.
+
+    :param total: The number of saved recipes.
+    :return: None
+    """
+    st.header("🗂️ Recipe History")
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+    page = min(st.session_state.get("history_page", 0), pages - 1)
+    entries = storage.page(page, HISTORY_PAGE_SIZE)
+    thumbs = image_cache.resolve([e["image_url"] for e in entries], "thumb")
+    open_id = st.session_state.get("open_entry")
+
+    def _toggle(rid):
+        st.session_state.open_entry = None if open_id == rid else rid
+
+    for entry, thumb in zip(entries, thumbs):
+        rid = entry["id"]
+        recipe = entry["recipe"]
+        ts = entry["timestamp"][:19].replace("T", " ")
+        with st.container(border=True):
+            c_img, c_text, c_btn = st.columns([1, 5, 1], vertical_alignment="center")
+            if thumb:
+                c_img.image(thumb, use_container_width=True)
+            c_text.markdown(f"**{recipe['name']}**")
+            c_text.caption(
+                f"{ts} · {len(recipe.get('ingredients', []))} ingredients · "
+                f"{len(recipe.get('instructions', []))} steps"
+            )
+            c_btn.button(
+                "Close" if rid == open_id else "Open",
+                key=f"open_{rid}",
+                on_click=_toggle,
+                args=(rid,),
+            )
+            if rid != open_id:
+                continue
+            display_recipe(
+                recipe,
+                entry.get("recipe_ings", recipe["ingredients"]),
+                image_cache.resolve([entry["image_url"]], "hero")[0],
+                entry["user_ings"],
+                entry["substitutions"],
+                key_prefix=f"hist_{rid}",
+                entry_id=rid,
+            )
+            if st.button("🗑️ Delete Recipe", key=f"del_{rid}"):
+                storage.delete_recipe(rid, entry)
+                st.session_state.pop("open_entry", None)
+                storage.flush()
+                st.stop()
+
+    if pages > 1:
+        c_prev, c_info, c_next = st.columns([1, 5, 1], vertical_alignment="center")
+        c_prev.button(
+            "◀ Newer",
+            disabled=page == 0,
+            on_click=lambda: st.session_state.update(history_page=page - 1),
+        )
+        c_info.caption(f"Page {page + 1} of {pages} · {total} recipes")
+        c_next.button(
+            "Older ▶",
+            disabled=page >= pages - 1,
+            on_click=lambda: st.session_state.update(history_page=page + 1),
+        )
+
+
+run_timer = timing.RunTimer(RUN_START)
+run_timer.mark("imports")
+
 # ─── Page config ────────────────────────────────
 st.set_page_config(
     page_title="PantryPal – AI Recipe Generator",
@@ -268,11 +357,62 @@ if not GOOGLE_KEY:
 if not UNSPLASH_KEY:
     st.sidebar.error("🖼️ Missing UNSPLASH_ACCESS_KEY — Images disabled.")
 
-ai_gen = GenAIRecipeGenerator(GOOGLE_KEY) if GOOGLE_KEY else None
-img_fetch = UnsplashImageFetcher(UNSPLASH_KEY) if UNSPLASH_KEY else None
+# Clients and caches are built once per server process and shared by all
+# sessions, so reruns reuse pooled connections instead of reconnecting.
+# Generated recipes are cached on disk and shared by every server process.
+CACHE_PATH = os.getenv("PANTRYPAL_CACHE_PATH", "pantrypal_cache.db")
+recipe_cache = clients.get_cache(
+    CACHE_PATH,
+    "recipes",
+    ttl=int(os.getenv("PANTRYPAL_RECIPE_CACHE_TTL", 7 * 24 * 3600)),
+    max_entries=int(os.getenv("PANTRYPAL_RECIPE_CACHE_SIZE", 5000)),
+)
+# Substitutes rarely change, so the per-ingredient table never expires
+substitution_table = clients.get_cache(
+    CACHE_PATH,
+    "substitutions",
+    max_entries=int(os.getenv("PANTRYPAL_SUBSTITUTION_CACHE_SIZE", 50000)),
+)
+ai_gen = (
+    clients.get_recipe_generator(
+        GOOGLE_KEY, cache=recipe_cache, substitutions=substitution_table
+    )
+    if GOOGLE_KEY
+    else None
+)
+# Image searches are cached on disk too, so replicas and restarts reuse
+# results instead of spending the Unsplash rate limit again
+search_cache = clients.get_cache(
+    CACHE_PATH,
+    "image_search",
+    ttl=int(os.getenv("PANTRYPAL_IMAGE_SEARCH_TTL", 24 * 3600)),
+    max_entries=int(os.getenv("PANTRYPAL_IMAGE_SEARCH_CACHE_SIZE", 10000)),
+)
+img_fetch = (
+    clients.get_image_fetcher(UNSPLASH_KEY, cache=search_cache)
+    if UNSPLASH_KEY
+    else None
+)
+# Chosen images are downloaded once and served as resized local variants
+image_cache = clients.get_image_cache(
+    os.getenv("PANTRYPAL_IMAGE_CACHE_DIR", ".pantrypal_images")
+)
+
+run_timer.mark("clients")
 
 # ─── Instantiate Storage ─────────────────────────
-storage = Storage()
+# "browser" keeps history in localStorage; "json", "journal" and "sqlite"
+# keep it in a server-side file shared by all sessions.
+STORAGE_BACKEND = os.getenv("PANTRYPAL_STORAGE", "browser")
+if STORAGE_BACKEND == "browser":
+    # Imported here so the server-side backends never load the component
+    from utils.localstorage import Storage
+
+    storage = Storage()
+else:
+    storage = open_storage(STORAGE_BACKEND, os.getenv("PANTRYPAL_HISTORY_PATH"))
+HISTORY_PAGE_SIZE = int(os.getenv("PANTRYPAL_HISTORY_PAGE_SIZE", 10))
+run_timer.mark("storage")
 
 # ─── Sidebar inputs ──────────────────────────────
 ingredients, restrictions, servings, do_generate, do_clear, do_random = get_user_input()
@@ -280,10 +420,6 @@ st.sidebar.markdown("### Analytics")
 st.sidebar.markdown("Track your recipe generation history and view trends over time.")
 view_stats = st.sidebar.button("📊 View Analytics")
 
-# ─── Load history once ────────────────────────────
-if "history" not in st.session_state:
-    st.session_state.history = storage.load_history()
-
 try:
     # If analytics requested, render and halt
     if view_stats:
@@ -293,9 +429,10 @@ try:
     # ── Clear history ──────────────────────────────
     if do_clear:
         storage.clear_history()
-        st.session_state.history = []
         st.session_state.pop("current", None)
         st.session_state.pop("temp", None)
+        st.session_state.pop("open_entry", None)
+        st.session_state.pop("history_page", None)
 
     # ── Surprise Me! feature ───────────────────────────────
     if do_random:
@@ -303,19 +440,7 @@ try:
             st.error("⚠️ Cannot surprise — AI key missing.")
         else:
             with st.spinner("🔀 Generating a surprise recipe…"):
-                recipe = ai_gen.generate([], restrictions, servings)
-                recipe_ings = normalize_ingredients(recipe["ingredients"])
-                recipe["ingredients"] = recipe_ings
-                images = (
-                    img_fetch.fetch_images(recipe["name"], n=5) if img_fetch else []
-                )
-                st.session_state.temp = {
-                    "recipe": recipe,
-                    "recipe_ings": recipe_ings,
-                    "image_options": images,
-                    "user_ings": [],
-                }
-                st.session_state.pop("current", None)
+                stage_recipe([], restrictions, servings)
 
     # ── Generate + stage images ────────────────────
     if do_generate:
@@ -325,19 +450,7 @@ try:
             st.error("⚠️ Cannot generate: missing AI key.")
         else:
             with st.spinner("👩‍🍳 Generating your recipe…"):
-                recipe = ai_gen.generate(ingredients, restrictions, servings)
-                recipe_ings = normalize_ingredients(recipe["ingredients"])
-                recipe["ingredients"] = recipe_ings
-                images = (
-                    img_fetch.fetch_images(recipe["name"], n=5) if img_fetch else []
-                )
-                st.session_state.temp = {
-                    "recipe": recipe,
-                    "recipe_ings": recipe_ings,
-                    "image_options": images,
-                    "user_ings": ingredients,
-                }
-                st.session_state.pop("current", None)
+                stage_recipe(ingredients, restrictions, servings)
 
     # ── Display current recipe ──────────────────────
     if "current" in st.session_state:
@@ -346,68 +459,37 @@ try:
         display_recipe(
             cur["recipe"],
             cur["recipe"]["ingredients"],
-            cur["image_url"],
+            image_cache.resolve([cur["image_url"]], "hero")[0],
             cur["user_ings"],
             cur["substitutions"],
             key_prefix="current",
+            entry_id=cur["id"],
         )
 
     # ── Image picker for new recipes ───────────────
     elif "temp" in st.session_state:
         temp = st.session_state.temp
         st.header("🖼️ Pick a Hero Image")
-        opts = temp["image_options"]
+        opts = pipeline.result_or(temp["images"], [])
 
         if not opts:
             # finalize immediately if no images
             image_url = ""
             recipe = temp["recipe"]
-            recipe_ings = temp["recipe_ings"]
             user_ings = temp["user_ings"]
-            missing = [
-                ing
-                for ing in recipe_ings
-                if ing.lower() not in {u.lower() for u in user_ings}
-            ]
-            subs = ai_gen.get_substitutions(missing) if (ai_gen and missing) else {}
-            storage.save_recipe(recipe, image_url, user_ings, subs)
-            st.session_state.history = storage.load_history()
-            st.session_state.current = st.session_state.history[-1]
+            subs = pipeline.result_or(temp["substitutions"], {})
+            entry = storage.save_recipe(recipe, image_url, user_ings, subs)
+            st.session_state.current = entry
             st.session_state.pop("temp")
+            storage.flush()
             st.stop()
         else:
-            cols = st.columns(min(len(opts), 3))
-            for idx, url in enumerate(opts):
-                with cols[idx % len(cols)]:
-                    st.image(url, use_container_width=True)
-                    st.caption(f"Option {idx + 1}")
-
-            choice = st.radio(
-                "Select an image (and click Confirm Image twice to confirm):",
-                options=list(range(len(opts))),
-                format_func=lambda i: f"Option {i + 1}",
-            )
-
-            if st.button("Confirm Image (click twice)  ✅"):
-                image_url = opts[choice]
-                recipe = temp["recipe"]
-                recipe_ings = temp["recipe_ings"]
-                user_ings = temp["user_ings"]
-                missing = [
-                    ing
-                    for ing in recipe_ings
-                    if ing.lower() not in {u.lower() for u in user_ings}
-                ]
-                subs = ai_gen.get_substitutions(missing) if (ai_gen and missing) else {}
-                storage.save_recipe(recipe, image_url, user_ings, subs)
-                st.session_state.history = storage.load_history()
-                st.session_state.current = st.session_state.history[-1]
-                st.session_state.pop("temp")
-                st.stop()
+            pick_image(temp, opts)
 
     # ── History or welcome ──────────────────────────
     else:
-        if not st.session_state.history:
+        total = storage.count()
+        if not total:
             st.markdown(
                 """
                 <div style="text-align:center; margin-top:4rem; color:#2c3e50;">
@@ -424,26 +506,20 @@ try:
                 unsafe_allow_html=True,
             )
         else:
-            st.header("🗂️ Recipe History")
-            for entry in reversed(st.session_state.history):
-                rid = entry["id"]
-                name = entry["recipe"]["name"]
-                ts = entry["timestamp"][:19].replace("T", " ")
-                with st.expander(f"{name} — {ts}", expanded=False):
-                    display_recipe(
-                        entry["recipe"],
-                        entry.get("recipe_ings", entry["recipe"]["ingredients"]),
-                        entry["image_url"],
-                        entry["user_ings"],
-                        entry["substitutions"],
-                        key_prefix=f"hist_{rid}",
-                    )
-                    if st.button("🗑️ Delete Recipe", key=f"del_{rid}"):
-                        storage.delete_recipe(rid)
-                        st.session_state.history = storage.load_history()
-                        st.stop()
+            render_history(total)
 
 except Exception as e:
     st.error("🚨 Unexpected error:")
     st.text(str(e))
     st.text(traceback.format_exc())
+
+# ─── Write pending history changes once per rerun ──
+storage.flush()
+run_timer.mark("render")
+
+# ─── Startup timing ──────────────────────────────
+cold_start = run_timer.finish()
+if timing.ENABLED:
+    with st.sidebar.expander("⏱️ Timing"):
+        st.caption(f"Cold start: {timing.format_report(cold_start)}")
+        st.caption(f"This run: {timing.format_report(run_timer)}")
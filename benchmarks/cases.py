@@ -0,0 +1,195 @@
+import random
+import shutil
+from collections import deque
+from functools import partial
+from pathlib import Path
+
+from benchmarks.synthetic import make_entry, write_history
+from components.display import _parse_numeric, export_markdown, export_text
+from utils.analytics import Rollups, chart_frames
+from utils.ingredients import IngredientIndex, normalize_ingredients
+from utils.storage import BACKENDS, open_storage
+
+# Benchmark name -> setup(ctx) returning the callable to time
+CASES = {}
+
+
+class Context:
+    """
+    The synthetic history of one size, plus on-disk copies of it in every
+    storage format. Each format is written once and copied for every case,
+    so cases that write never affect each other.
+    """
+
+    def __init__(self, history: list, workdir: Path):
+        """
+        Initialize the context.
+
+        :param history: The synthetic entries, oldest first.
+        :param workdir: A scratch directory for history files.
+        """
+        self.history = history
+        self.workdir = Path(workdir)
+        self._templates = {}
+        self._copies = 0
+
+    def storage(self, backend: str):
+        """
+        Open a fresh copy of the history with one storage backend.
+
+        :param backend: One of ``BACKENDS``.
+        :return: The storage object.
+        """
+        if backend not in self._templates:
+            template = self.workdir / f"template.{backend}"
+            write_history(self.history, template, backend)
+            self._templates[backend] = template
+        self._copies += 1
+        path = self.workdir / f"history-{self._copies}.{backend}"
+        shutil.copyfile(self._templates[backend], path)
+        return open_storage(backend, path)
+
+
+def case(name: str):
+    """
+    Register a benchmark.
+
+    :param name: The benchmark name.
+    :return: A decorator registering the setup function.
+    """
+
+    def register(setup):
+        CASES[name] = setup
+        return setup
+
+    return register
+
+
+# ─── Storage ───────────────────────────────────────────────
+def _load_history(backend, ctx):
+    """
+    Time loading the full history.
+    """
+    return ctx.storage(backend).load_history
+
+
+def _iter_history(backend, ctx):
+    """
+    Time streaming the full history.
+    """
+    storage = ctx.storage(backend)
+    return lambda: deque(storage.iter_history(), maxlen=0)
+
+
+def _save_recipe(backend, ctx):
+    """
+    Time saving one more recipe.
+    """
+    storage = ctx.storage(backend)
+    # Time steady-state saves, not the one-off rollups rebuild
+    storage.rollups()
+    entry = make_entry(random.Random(1), len(ctx.history))
+    return lambda: storage.save_recipe(
+        entry["recipe"], entry["image_url"], entry["user_ings"], entry["substitutions"]
+    )
+
+
+def _delete_recipe(backend, ctx):
+    """
+    Time deleting one recipe.
+    """
+    storage = ctx.storage(backend)
+    storage.rollups()
+    # Delete from the middle, a different entry on every call
+    middle = len(ctx.history) // 2
+    entries = iter(ctx.history[middle:])
+
+    def delete():
+        entry = next(entries)
+        storage.delete_recipe(entry["id"], entry)
+
+    return delete
+
+
+def _page(backend, ctx):
+    """
+    Time reading the newest page of the history.
+    """
+    storage = ctx.storage(backend)
+    return lambda: storage.page(0, 10)
+
+
+def _rollups(backend, ctx):
+    """
+    Time reading up-to-date rollups.
+    """
+    storage = ctx.storage(backend)
+    storage.rollups()
+    return storage.rollups
+
+
+for _backend in BACKENDS:
+    for _op, _setup in [
+        ("load_history", _load_history),
+        ("iter_history", _iter_history),
+        ("save_recipe", _save_recipe),
+        ("delete_recipe", _delete_recipe),
+        ("page", _page),
+        ("rollups", _rollups),
+    ]:
+        case(f"storage.{_backend}.{_op}")(partial(_setup, _backend))
+
+
+# ─── Analytics (render_analysis data preparation) ──────────
+@case("analytics.rollups_from_history")
+def _rollups_from_history(ctx):
+    """
+    Time rebuilding the rollups from the history.
+    """
+    return lambda: Rollups.from_history(ctx.history)
+
+
+@case("analytics.chart_frames")
+def _chart_frames(ctx):
+    """
+    Time building the chart DataFrames from the rollups.
+    """
+    rollups = Rollups.from_history(ctx.history)
+    return lambda: chart_frames(rollups)
+
+
+# ─── Parsing ───────────────────────────────────────────────
+@case("ingredients.normalize_ingredients")
+def _normalize(ctx):
+    """
+    Time normalizing every entry's ingredients.
+    """
+    lists = [e["recipe_ings"] for e in ctx.history]
+    return lambda: [normalize_ingredients(ings) for ings in lists]
+
+
+@case("display.parse_numeric")
+def _parse(ctx):
+    """
+    Time parsing every nutrition value.
+    """
+    values = [v for e in ctx.history for v in e["recipe"]["nutrition"].values()]
+    return lambda: [_parse_numeric(v) for v in values]
+
+
+# ─── Display exports ───────────────────────────────────────
+@case("display.exports")
+def _exports(ctx):
+    """
+    Time building the Markdown and text exports of every recipe.
+    """
+
+    def build():
+        # What display_recipe derives for its download buttons
+        for e in ctx.history:
+            ings = normalize_ingredients(e["recipe_ings"])
+            missing = IngredientIndex(e["user_ings"]).missing(ings)
+            export_markdown(e["recipe"], ings, missing)
+            export_text(e["recipe"], ings, missing)
+
+    return build
@@ -0,0 +1,164 @@
+import argparse
+import fnmatch
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.cases import CASES, Context
+from benchmarks.synthetic import make_history
+from utils.fileio import atomic_write
+
+SIZES = (1000, 10000, 100000)
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# A case regresses if it is this much slower than its baseline...
+THRESHOLD = 0.25
+# ...and at least this many seconds slower, so timer noise on
+# sub-millisecond cases does not fail the check
+MIN_DELTA = 0.002
+
+
+def _time(fn) -> float:
+    """
+    Time one call with the garbage collector paused, as ``timeit`` does.
+
+    :param fn: The callable to time.
+    :return: The wall-clock duration in seconds.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def run(sizes=SIZES, repeat: int = 3, pattern: str = "*", log=None) -> dict:
+    """
+    Run the benchmarks against synthetic histories.
+
+    :param sizes: The history sizes to run at.
+    :param repeat: The number of timed calls per case; the fastest is kept.
+    :param pattern: A glob selecting the cases to run by name.
+    :param log: Optional callable receiving one progress line per case.
+    :return: The results document, with seconds per case and size.
+    """
+    results = {}
+    for size in sizes:
+        history = make_history(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = Context(history, tmp)
+            for name, setup in CASES.items():
+                if not fnmatch.fnmatch(name, pattern):
+                    continue
+                fn = setup(ctx)
+                best = min(_time(fn) for _ in range(repeat))
+                results.setdefault(name, {})[str(size)] = best
+                if log:
+                    log(f"{name:<40} {size:>7} {best * 1000:>11.2f} ms")
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list:
+    """
+    Find the cases that got slower than their baseline.
+    Cases or sizes missing from either document are skipped.
+
+    :param results: The current results document.
+    :param baseline: The baseline results document.
+    :param threshold: The allowed slowdown, as a fraction of the baseline.
+    :return: ``(name, size, baseline, current)`` tuples for every regression.
+    """
+    regressions = []
+    for name, by_size in results["results"].items():
+        for size, current in by_size.items():
+            base = baseline["results"].get(name, {}).get(size)
+            if base is None:
+                continue
+            if current > base * (1 + threshold) and current - base > MIN_DELTA:
+                regressions.append((name, int(size), base, current))
+    return regressions
+
+
+def main(argv=None) -> int:
+    """
+    Run the benchmarks from the command line.
+
+    :param argv: The arguments; defaults to ``sys.argv[1:]``.
+    :return: The exit status; 1 if the check found regressions.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time the storage, parsing and rendering hot paths.",
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, SIZES)),
+        help="comma-separated history sizes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="timed calls per case (default: 3)"
+    )
+    parser.add_argument(
+        "-k", dest="pattern", default="*", help="glob selecting cases by name"
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument(
+        "--baseline",
+        default=str(BASELINE),
+        help="baseline results file (default: benchmarks/baseline.json)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of checking",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="fail if any case is slower than the baseline allows",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="allowed slowdown as a fraction (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = run(sizes, args.repeat, args.pattern, log=print)
+    document = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        atomic_write(args.output, document)
+    if args.save_baseline:
+        atomic_write(args.baseline, document)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not args.check:
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    regressions = compare(results, baseline, args.threshold)
+    for name, size, base, current in regressions:
+        print(
+            f"REGRESSION {name} at {size}: {base * 1000:.2f} ms -> "
+            f"{current * 1000:.2f} ms ({current / base:.2f}x)",
+            file=sys.stderr,
+        )
+    if regressions:
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}")
+    return 0
@@ -0,0 +1,114 @@
+import json
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+INGREDIENTS = """
+    tomato onion garlic carrot celery potato spinach kale broccoli zucchini
+    eggplant mushroom bell-pepper chili ginger lemon lime basil parsley
+    coriander thyme rosemary olive-oil butter flour sugar salt black-pepper
+    rice pasta quinoa chickpea lentil black-bean tofu chicken-breast beef
+    salmon shrimp egg milk yogurt cheddar parmesan cream coconut-milk
+    soy-sauce honey vinegar cumin paprika turmeric cinnamon oats almond
+""".split()
+
+UNITS = ["g", "cup", "tbsp", "tsp", "clove", "piece", "ml"]
+
+NUTRITION = {
+    "Calories": (150, 900, "kcal"),
+    "Protein": (2, 60, "g"),
+    "Fat": (1, 50, "g"),
+    "Carbs": (5, 120, "g"),
+    "Fiber": (0, 20, "g"),
+    "Sodium": (50, 2400, "mg"),
+}
+
+_START = datetime(2024, 1, 1)
+
+
+def make_entry(rng: random.Random, i: int) -> dict:
+    """
+    Build one realistic history entry.
+
+    :param rng: The random generator.
+    :param i: The position of the entry, which orders the timestamps.
+    :return: The history entry.
+    """
+    items = rng.sample(INGREDIENTS, rng.randint(4, 12))
+    ings = [
+        {
+            "item": item.replace("-", " "),
+            "amount": f"{rng.randint(1, 500)} {rng.choice(UNITS)}",
+        }
+        for item in items
+    ]
+    missing = [ing["item"] for ing in ings if rng.random() < 0.3]
+    recipe = {
+        "name": f"{items[0].replace('-', ' ').title()} Dish {i}",
+        "ingredients": ings,
+        "instructions": [
+            f"Step {n}: prepare the {rng.choice(items).replace('-', ' ')} and "
+            "cook it gently until tender, stirring now and then."
+            for n in range(1, rng.randint(4, 10))
+        ],
+        "nutrition": {
+            name: f"{rng.uniform(lo, hi):.1f} {unit}"
+            for name, (lo, hi, unit) in NUTRITION.items()
+        },
+        "shopping_list": missing,
+    }
+    when = _START + timedelta(minutes=7 * i + rng.randint(0, 6))
+    return {
+        "id": f"{rng.getrandbits(128):032x}",
+        "timestamp": when.isoformat(),
+        "recipe": recipe,
+        "recipe_ings": ings,
+        "image_url": f"https://images.example.com/{i}.jpg",
+        "user_ings": [ing["item"] for ing in ings if ing["item"] not in missing],
+        "substitutions": {item: [f"{item} substitute", "water"] for item in missing},
+    }
+
+
+def make_history(n: int, seed: int = 0) -> list:
+    """
+    Build a synthetic history; the same size and seed always give the
+    same entries.
+
+    :param n: The number of entries.
+    :param seed: The random seed.
+    :return: The entries, oldest first.
+    """
+    rng = random.Random(seed)
+    return [make_entry(rng, i) for i in range(n)]
+
+
+def write_history(history: list, path, backend: str):
+    """
+    Write a history directly in a storage backend's on-disk format, which
+    is much faster than saving the entries one by one.
+
+    :param history: The entries, oldest first.
+    :param path: The history file to create.
+    :param backend: One of ``"json"``, ``"journal"`` or ``"sqlite"``.
+    """
+    path = Path(path)
+    if backend == "json":
+        path.write_text(json.dumps(history, indent=2))
+    elif backend == "journal":
+        with path.open("w", encoding="utf-8") as f:
+            for entry in history:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    elif backend == "sqlite":
+        from utils.sqlite_storage import _SCHEMA
+
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.executescript(_SCHEMA)
+            conn.executemany(
+                "INSERT INTO history (id, timestamp, entry) VALUES (?, ?, ?)",
+                ((e["id"], e["timestamp"], json.dumps(e)) for e in history),
+            )
+        conn.close()
+    else:
+        raise ValueError(f"Unknown storage backend {backend!r}")
@@ -1,10 +1,19 @@
 import json
-import re
+import threading
+from collections import OrderedDict
 
-import altair as alt
-import pandas as pd
 import streamlit as st
 
+from utils.analytics import metric_label
+from utils.cache import cache_key
+from utils.ingredients import IngredientIndex
+from utils.nutrition import UNITS, parse_amount
+
+# Derived artifacts of recently shown recipes, shared by all sessions
+ARTIFACT_CACHE_SIZE = 256
+_artifacts = OrderedDict()
+_artifacts_lock = threading.Lock()
+
 
 def _parse_numeric(v: str) -> float:
     """
@@ -13,43 +22,163 @@ def _parse_numeric(v: str) -> float:
     :param v: The input string to parse.
     :return: The first numeric value as a float, or 0.0 if no numeric value is found.
     """
-    m = re.search(r"[\d]+(?:\.\d+)?", v)
-    return float(m.group()) if m else 0.0
+    value, _ = parse_amount(v)
+    return value if value is not None else 0.0
 
 
-def display_recipe(
-    recipe: dict,
-    recipe_ings: list,
-    image_url: str,
-    user_ings: list,
-    substitutions,
-    key_prefix: str = "default",
+def _difficulty(steps: list) -> str:
+    """
+    Estimate a recipe's difficulty from its number of steps.
+
+    :param steps: The list of instructions.
+    :return: "Easy", "Medium" or "Hard".
+    """
+    return "Easy" if len(steps) <= 5 else "Medium" if len(steps) <= 10 else "Hard"
+
+
+def _build_artifacts(recipe: dict) -> dict:
+    """
+    Compute everything ``display_recipe`` derives from a recipe's content.
+    Charts are kept as Vega-Lite specs so reruns skip Altair's serialization.
+
+    :param recipe: The recipe dictionary.
+    :return: A dict with the difficulty, the nutrition DataFrame and the
+        bar and arc chart specs (both None without nutrition data).
+    """
+    nutri = recipe.get("nutrition", {})
+    out = {
+        "difficulty": _difficulty(recipe.get("instructions", [])),
+        "nutrition": None,
+        "bar_chart": None,
+        "arc_chart": None,
+    }
+    if not nutri:
+        return out
+    # Only needed for recipes with nutrition data; keeps both off the
+    # startup path
+    import altair as alt
+    import pandas as pd
+
+    # Same canonical units as the analytics page, named in each label
+    rows = []
+    for metric, raw in nutri.items():
+        value, unit = parse_amount(raw)
+        base, factor = UNITS.get(unit, (None, 1.0))
+        amount = 0.0 if value is None else value * factor
+        rows.append((metric_label({"metric": metric, "unit": base}), amount, base))
+    df = pd.DataFrame(rows, columns=["Nutrient", "Amount", "Unit"])
+    out["nutrition"] = df
+    out["bar_chart"] = (
+        alt.Chart(df)
+        .mark_bar()
+        .encode(x="Nutrient", y="Amount", tooltip=["Nutrient", "Amount"])
+        .properties(height=200)
+        .to_dict()
+    )
+    out["arc_chart"] = (
+        alt.Chart(df)
+        .mark_arc(innerRadius=50)
+        .encode(theta="Amount", color="Nutrient", tooltip=["Nutrient", "Amount"])
+        .properties(height=200)
+        .to_dict()
+    )
+    return out
+
+
+def recipe_artifacts(recipe: dict, entry_id=None) -> dict:
+    """
+    Get the derived artifacts of a recipe, computing them only once.
+    Entries are keyed by entry id plus a hash of the recipe content, so an
+    edited recipe is never served stale artifacts.
+
+    :param recipe: The recipe dictionary.
+    :param entry_id: The history entry id, if the recipe has been saved.
+    :return: The artifacts dict built by ``_build_artifacts``.
+    """
+    key = (entry_id, cache_key(recipe))
+    with _artifacts_lock:
+        if key in _artifacts:
+            _artifacts.move_to_end(key)
+            return _artifacts[key]
+    artifacts = _build_artifacts(recipe)
+    with _artifacts_lock:
+        _artifacts[key] = artifacts
+        while len(_artifacts) > ARTIFACT_CACHE_SIZE:
+            _artifacts.popitem(last=False)
+    return artifacts
+
+
+def export_markdown(recipe: dict, recipe_ings: list, missing: list) -> str:
+    """
+    Render a recipe as a Markdown document.
+
+    :param recipe: The recipe dictionary.
+    :param recipe_ings: The list of ingredients in the recipe.
+    :param missing: The shopping list, appended when not empty.
+    :return: The Markdown text.
+    """
+    md = [f"# {recipe['name']}", "", "## Ingredients"]
+    for ing in recipe_ings:
+        md.append(f"- {ing}")
+    md += ["", "## Instructions"]
+    for i, s in enumerate(recipe.get("instructions", []), 1):
+        md.append(f"{i}. {s}")
+    md += ["", "## Nutrition"]
+    for n, v in recipe.get("nutrition", {}).items():
+        md.append(f"- **{n}**: {v}")
+    if missing:
+        md += ["", "## Shopping List"] + [f"- {l}" for l in missing]
+    return "\n".join(md)
+
+
+def export_text(recipe: dict, recipe_ings: list, missing: list) -> str:
+    """
+    Render a recipe as plain text.
+
+    :param recipe: The recipe dictionary.
+    :param recipe_ings: The list of ingredients in the recipe.
+    :param missing: The shopping list, appended when not empty.
+    :return: The plain text.
+    """
+    steps = recipe.get("instructions", [])
+    txt = [recipe["name"], "", "Ingredients:"] + [f"- {l}" for l in recipe_ings]
+    txt += ["", "Instructions:"] + [f"{i}. {s}" for i, s in enumerate(steps, 1)]
+    txt += ["", "Nutrition:"] + [
+        f"- {n}: {v}" for n, v in recipe.get("nutrition", {}).items()
+    ]
+    if missing:
+        txt += ["", "## Shopping List"] + [f"- {l}" for l in missing]
+    return "\n".join(txt)
+
+
+@st.fragment
+def _ingredient_checklist(
+    recipe_ings: list, user_ings: list, key_prefix: str, shopping: dict
 ):
     """
-    Displays a recipe with its ingredients, instructions, nutrition information, and download options.
+    Render the ingredient checkboxes and the resulting shopping list.
+    This is a fragment, so toggling a checkbox reruns only this function
+    instead of the whole app.
 
-    :param recipe: The recipe dictionary containing details like name, ingredients, instructions, and nutrition.
     :param recipe_ings: The list of ingredients in the recipe.
-    :param image_url: The URL of the hero image for the recipe.
     :param user_ings: The list of ingredients provided by the user.
-    :param substitutions: The substitutions for ingredients, either as a list of dicts or a dict mapping.
-    :param key_prefix: A prefix for the keys used in Streamlit components to avoid conflicts.
-    :return: None
+    :param key_prefix: A prefix for the keys used in Streamlit components.
+    :param shopping: A dict whose ``"missing"`` item is updated with the
+        current shopping list on every run.
     """
-    # — Hero Image
-    if image_url:
-        st.image(image_url, use_container_width=True)
-
     # — Ingredients
     st.subheader("📝 Ingredients")
+    have = IngredientIndex(user_ings)
     missing = []
     for idx, ing in enumerate(recipe_ings):
-        label = (
-            f"{ing['item']} — {ing['amount']}" if isinstance(ing, dict) else str(ing)
-        )
+        if isinstance(ing, dict):
+            label = f"{ing['item']} — {ing['amount']}"
+            name = ing["item"]
+        else:
+            label = name = str(ing)
         checked = st.checkbox(
             label,
-            value=label.lower() in (u.lower() for u in user_ings),
+            value=name in have,
             key=f"{key_prefix}_ing_{idx}",
         )
         if not checked:
@@ -62,45 +191,61 @@ def display_recipe(
             st.write(f"• {line}")
         st.download_button(
             "📋 Download shopping list (TXT)",
-            data="\n".join(missing),
+            data=lambda: "\n".join(missing),
             file_name="shopping_list.txt",
             mime="text/plain",
             key=f"{key_prefix}_dl_shop",
+            on_click="ignore",
         )
+    shopping["missing"] = missing
+
+
+def display_recipe(
+    recipe: dict,
+    recipe_ings: list,
+    image_url: str,
+    user_ings: list,
+    substitutions,
+    key_prefix: str = "default",
+    entry_id=None,
+):
+    """
+    Displays a recipe with its ingredients, instructions, nutrition information, and download options.
+
+    :param recipe: The recipe dictionary containing details like name, ingredients, instructions, and nutrition.
+    :param recipe_ings: The list of ingredients in the recipe.
+    :param image_url: The URL of the hero image for the recipe.
+    :param user_ings: The list of ingredients provided by the user.
+    :param substitutions: The substitutions for ingredients, either as a list of dicts or a dict mapping.
+    :param key_prefix: A prefix for the keys used in Streamlit components to avoid conflicts.
+    :param entry_id: The history entry id, used to key the cached artifacts.
+    :return: None
+    """
+    artifacts = recipe_artifacts(recipe, entry_id)
+
+    # — Hero Image
+    if image_url:
+        st.image(image_url, use_container_width=True)
+
+    # — Ingredients and shopping list rerun on their own when toggled;
+    # the exports below read the latest shopping list at download time
+    shopping = {"missing": []}
+    _ingredient_checklist(recipe_ings, user_ings, key_prefix, shopping)
 
     # — Nutrition Charts
     st.subheader("🔢 Nutrition per Serving")
-    nutri = recipe.get("nutrition", {})
-    names = list(nutri.keys())
-    vals = [_parse_numeric(v) for v in nutri.values()]
-    if names:
-        df = pd.DataFrame({"Nutrient": names, "Amount": vals})
+    if artifacts["nutrition"] is not None:
         c1, c2 = st.columns(2)
         with c1:
             st.subheader("📊 Nutrient Amounts")
-            st.altair_chart(
-                alt.Chart(df)
-                .mark_bar()
-                .encode(x="Nutrient", y="Amount", tooltip=["Nutrient", "Amount"])
-                .properties(height=200),
-                use_container_width=True,
-            )
+            st.vega_lite_chart(artifacts["bar_chart"], use_container_width=True)
         with c2:
             st.subheader("🍩 Nutrient Proportions")
-            st.altair_chart(
-                alt.Chart(df)
-                .mark_arc(innerRadius=50)
-                .encode(
-                    theta="Amount", color="Nutrient", tooltip=["Nutrient", "Amount"]
-                )
-                .properties(height=200),
-                use_container_width=True,
-            )
+            st.vega_lite_chart(artifacts["arc_chart"], use_container_width=True)
 
     # — Difficulty
     steps = recipe.get("instructions", [])
-    diff = "Easy" if len(steps) <= 5 else "Medium" if len(steps) <= 10 else "Hard"
-    st.markdown(f"### 🎯 Estimated Difficulty: **{diff}**")
+    st.markdown(f"### 🎯 Estimated Difficulty: **{artifacts['difficulty']}**")
 
     # — Instructions
     st.subheader("👩‍🍳 Instructions")
@@ -123,50 +268,31 @@ def display_recipe(
         else:
             st.write(str(substitutions))
 
-    # — Downloads (JSON, Markdown, TXT)
-    json_str = json.dumps(recipe, indent=2)
+    # — Downloads (JSON, Markdown, TXT), generated only when clicked
+    file_stem = recipe["name"].replace(" ", "_")
     st.download_button(
         "📄Download JSON",
-        data=json_str,
-        file_name=f"{recipe['name'].replace(' ', '_')}.json",
+        data=lambda: json.dumps(recipe, indent=2),
+        file_name=f"{file_stem}.json",
         mime="application/json",
         key=f"{key_prefix}_dl_json",
+        on_click="ignore",
     )
-
-    # — Download Markdown
-    md = [f"# {recipe['name']}", "", "## Ingredients"]
-    for ing in recipe_ings:
-        md.append(f"- {ing}")
-    md += ["", "## Instructions"]
-    for i, s in enumerate(steps, 1):
-        md.append(f"{i}. {s}")
-    md += ["", "## Nutrition"]
-    for n, v in recipe.get("nutrition", {}).items():
-        md.append(f"- **{n}**: {v}")
-    if missing:
-        md += ["", "## Shopping List"] + [f"- {l}" for l in missing]
     st.download_button(
         "🔖 Download Markdown",
-        data="\n".join(md),
-        file_name=f"{recipe['name'].replace(' ', '_')}.md",
+        data=lambda: export_markdown(recipe, recipe_ings, shopping["missing"]),
+        file_name=f"{file_stem}.md",
         mime="text/markdown",
         key=f"{key_prefix}_dl_md",
+        on_click="ignore",
     )
-
-    # — Download Plain TXT
-    txt = [recipe["name"], "", "Ingredients:"] + [f"- {l}" for l in recipe_ings]
-    txt += ["", "Instructions:"] + [f"{i}. {s}" for i, s in enumerate(steps, 1)]
-    txt += ["", "Nutrition:"] + [
-        f"- {n}: {v}" for n, v in recipe.get("nutrition", {}).items()
-    ]
-    if missing:
-        txt += ["", "## Shopping List"] + [f"- {l}" for l in missing]
     st.download_button(
         "🧾 Download Plain TXT",
-        data="\n".join(txt),
-        file_name=f"{recipe['name'].replace(' ', '_')}.txt",
+        data=lambda: export_text(recipe, recipe_ings, shopping["missing"]),
+        file_name=f"{file_stem}.txt",
         mime="text/plain",
         key=f"{key_prefix}_dl_txt",
+        on_click="ignore",
     )
 
     # — Return Home button (only when viewing current recipe)
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from analysis.cli import build_report, format_report, main, open_history
+from utils.analytics import Rollups
+from utils.sqlite_storage import SQLiteStorage
+from utils.storage import JournalStorage
+
+
+def _recipe(name, calories, ingredients):
+    return {
+        "name": name,
+        "ingredients": ingredients,
+        "instructions": ["Cook"],
+        "nutrition": {"Calories": f"{calories} kcal", "Protein": "5 g"},
+    }
+
+
+@pytest.fixture
+def journal(tmp_path):
+    store = JournalStorage(tmp_path / "history.jsonl")
+    store.save_recipe(_recipe("Soup", 200, ["Tomato", "onion"]), "", [], {})
+    gone = store.save_recipe(_recipe("Stew", 900, ["beef"]), "", [], {})
+    store.save_recipe(_recipe("Salad", 100, ["tomato"]), "", [], {})
+    store.delete_recipe(gone["id"])
+    return store.path
+
+
+def test_backend_is_inferred_from_the_extension(journal, tmp_path):
+    assert open_history(journal).backend == "journal"
+    db = SQLiteStorage(tmp_path / "history.db")
+    db.save_recipe(_recipe("Soup", 200, ["leek"]), "", [], {})
+    history = open_history(tmp_path / "history.db")
+    assert history.backend == "sqlite"
+    assert list(history.iter_history()) == db.load_history()
+    with pytest.raises(FileNotFoundError):
+        open_history(tmp_path / "missing.json")
+
+
+def test_history_is_opened_read_only(tmp_path):
+    path = tmp_path / "history.json"
+    entries = [{"id": "a", "recipe": _recipe("Soup", 200, ["leek"])}]
+    path.write_text(json.dumps(entries, indent=2))
+    before = path.read_bytes()
+    history = open_history(path, backend="journal")
+    assert list(history.iter_history()) == entries
+    assert main([str(path), str(tmp_path / "plots"), "--backend", "journal"]) == 0
+    assert path.read_bytes() == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["history.json", "plots"]
+
+
+def test_batched_report_matches_the_rollups(journal):
+    entries = list(open_history(journal).iter_history())
+    entries += [
+        {"id": "x", "timestamp": "bad", "recipe": {"nutrition": {"Sodium": "1,200 mg"}}}
+    ]
+    expected = Rollups.from_history(entries).to_dict()
+    assert build_report(entries, batch_size=2).to_dict() == expected
+
+
+def test_report_covers_live_entries_only(journal):
+    rollups = build_report(open_history(journal).iter_history())
+    assert rollups.recipes == 2
+    assert rollups.top_ingredients(1) == [("tomato", 2)]
+    text = format_report(rollups)
+    assert "Recipes analyzed: 2" in text
+    assert "beef" not in text
+
+
+def test_main_writes_every_plot(journal, tmp_path, capsys):
+    out = tmp_path / "plots"
+    assert main([str(journal), str(out), "--workers", "2"]) == 0
+    assert sorted(p.name for p in out.iterdir()) == [
+        "ingredient_frequency.png",
+        "nutrition_summary.png",
+        "trends_over_time.png",
+    ]
+    assert "Plot saved to" in capsys.readouterr().out
+
+
+def test_main_fails_without_history(tmp_path, capsys):
+    assert main([str(tmp_path / "missing.json"), str(tmp_path)]) == 1
+    assert "not found" in capsys.readouterr().err
+
+
+def test_main_reports_from_a_columnar_export(journal, tmp_path, capsys):
+    export = tmp_path / "export"
+    out = tmp_path / "plots"
+    assert main([str(journal), str(out), "--export", str(export)]) == 0
+    assert "Exported 2 new entries" in capsys.readouterr().out
+    assert main([str(export), str(out)]) == 0
+    assert "Recipes analyzed: 2" in capsys.readouterr().out
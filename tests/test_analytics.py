@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from utils.analytics import Rollups, chart_frames
+
+
+def _entry(i, calories, ingredients, day="2024-05-01"):
+    return {
+        "id": str(i),
+        "timestamp": f"{day}T12:00:00",
+        "recipe": {
+            "name": f"Dish {i}",
+            "ingredients": ingredients,
+            "nutrition": {"Calories": f"{calories} kcal", "Fat": "n/a"},
+        },
+    }
+
+
+@pytest.fixture
+def entries():
+    return [
+        _entry(0, 120, ["Tomato", {"item": "onion", "amount": "1"}]),
+        _entry(1, 450.5, [" tomato "], day="2024-05-02"),
+        _entry(2, 300, ["garlic", "onion"], day="2024-05-02"),
+        _entry(3, 300, ["tomato"]),
+        _entry(4, 80, []),
+    ]
+
+
+def test_summary_matches_numpy(entries):
+    (row,) = Rollups.from_history(entries).nutrition_summary()
+    values = [120, 450.5, 300, 300, 80]
+    assert row["metric"] == "Calories" and row["count"] == 5
+    assert row["mean"] == pytest.approx(np.mean(values))
+    for name, q in [("min", 0), ("q1", 0.25), ("median", 0.5), ("q3", 0.75)]:
+        assert row[name] == pytest.approx(np.quantile(values, q))
+    assert row["max"] == 450.5
+
+
+def test_daily_counts_and_top_ingredients(entries):
+    rollups = Rollups.from_history(entries)
+    assert rollups.daily_counts() == [("2024-05-01", 3), ("2024-05-02", 2)]
+    assert rollups.top_ingredients(2) == [("tomato", 3), ("onion", 2)]
+
+
+def test_remove_retracts_add_exactly(entries):
+    rollups = Rollups.from_history(entries)
+    for entry in entries[1:]:
+        rollups.remove(entry)
+    assert (
+        Rollups(rollups.to_dict()).to_dict()
+        == Rollups.from_history([entries[0]]).to_dict()
+    )
+    rollups.remove(entries[0])
+    assert rollups.to_dict() == Rollups().to_dict()
+
+
+def test_units_are_tracked_and_labelled():
+    entry = {"recipe": {"nutrition": {"Sodium": "500 mg", "Fiber": "3"}}}
+    rollups = Rollups.from_history(
+        [entry, {"recipe": {"nutrition": {"Sodium": "1 g"}}}]
+    )
+    fiber, sodium = rollups.nutrition_summary()
+    assert (sodium["unit"], sodium["min"], sodium["max"]) == ("g", 0.5, 1.0)
+    assert fiber["unit"] is None
+    assert chart_frames(rollups)["nutrition"]["label"].tolist() == [
+        "Fiber",
+        "Sodium (g)",
+    ]
+
+    rollups.remove(entry)
+    assert rollups.units == {"Sodium": {"g": 1}}
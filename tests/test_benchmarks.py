@@ -0,0 +1,47 @@
+import json
+
+from benchmarks.runner import compare, main, run
+from benchmarks.synthetic import make_history, write_history
+from utils.storage import open_storage
+
+
+def test_synthetic_history_is_deterministic():
+    first = make_history(20, seed=7)
+    assert first == make_history(20, seed=7)
+    assert first != make_history(20, seed=8)
+    assert len({e["id"] for e in first}) == 20
+    assert [e["timestamp"] for e in first] == sorted(e["timestamp"] for e in first)
+
+
+def test_written_history_loads_with_every_backend(tmp_path):
+    history = make_history(5)
+    for backend, ext in [("json", "json"), ("journal", "jsonl"), ("sqlite", "db")]:
+        path = tmp_path / f"history.{ext}"
+        write_history(history, path, backend)
+        storage = open_storage(backend, path)
+        assert storage.load_history() == history
+        assert storage.rollups().recipes == 5
+
+
+def test_run_records_every_selected_case():
+    results = run(sizes=[10], repeat=1, pattern="display.*")
+    assert set(results["results"]) == {"display.parse_numeric", "display.exports"}
+    assert all(set(by_size) == {"10"} for by_size in results["results"].values())
+
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = {"results": {"a": {"10": 0.100}, "b": {"10": 0.0001}, "c": {"10": 1}}}
+    results = {"results": {"a": {"10": 0.200}, "b": {"10": 0.0009}, "d": {"10": 5}}}
+    assert compare(results, baseline, threshold=0.25) == [("a", 10, 0.100, 0.200)]
+    assert compare(results, baseline, threshold=1.5) == []
+
+
+def test_check_fails_on_regression(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "10", "--repeat", "1", "-k", "display.exports"]
+    assert main(args + ["--baseline", str(baseline), "--save-baseline"]) == 0
+    data = json.loads(baseline.read_text())
+    data["results"]["display.exports"]["10"] = -1.0
+    baseline.write_text(json.dumps(data))
+    assert main(args + ["--baseline", str(baseline), "--check"]) == 1
+    assert "REGRESSION display.exports at 10" in capsys.readouterr().err
@@ -0,0 +1,171 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from utils import clients
+from utils.cache import DiskCache
+from utils.genai_client import GenAIRecipeGenerator
+
+
+class FakeModels:
+    """
+    Records generate_content calls and replies with canned JSON.
+    """
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    def generate_content(self, model, contents, config):
+        self.calls.append(contents)
+        reply = self.reply(contents) if callable(self.reply) else self.reply
+        return SimpleNamespace(text=json.dumps(reply))
+
+    def generate_content_stream(self, model, contents, config):
+        text = self.generate_content(model, contents, config).text
+        for start in range(0, len(text), 5):
+            yield SimpleNamespace(text=text[start : start + 5])
+
+
+@pytest.fixture
+def generator(tmp_path):
+    gen = GenAIRecipeGenerator(
+        "test-key",
+        cache=DiskCache(tmp_path / "cache.db", namespace="recipes"),
+        substitutions=DiskCache(tmp_path / "cache.db", namespace="substitutions"),
+    )
+    gen.client = SimpleNamespace(models=FakeModels({"name": "Soup"}))
+    return gen
+
+
+def test_disk_cache_ttl_and_lru(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("utils.cache.time.time", lambda: clock[0])
+    cache = DiskCache(tmp_path / "cache.db", ttl=60, max_entries=2)
+
+    cache.set("a", {"v": 1})
+    cache.set("b", [2])
+    clock[0] += 1
+    assert cache.get("a") == {"v": 1}  # "a" is now more recently used
+    clock[0] += 1
+    cache.set("c", "three")
+    assert cache.get("b") is None and len(cache) == 2
+
+    clock[0] += 120
+    assert cache.get("a", "expired") == "expired"
+
+    # Another handle on the same file sees the same entries
+    other = DiskCache(tmp_path / "cache.db", ttl=60)
+    other.set("d", 4)
+    assert cache.get("d") == 4
+
+
+def test_generate_uses_canonical_cache_key(generator):
+    first = generator.generate(["Tomato", " basil"], ["Vegan"], 2)
+    again = generator.generate(["basil", "tomato", "Basil"], ["vegan"], 2)
+    assert first == again == {"name": "Soup"}
+    assert len(generator.client.models.calls) == 1
+
+    generator.generate(["basil", "tomato"], ["vegan"], 4)
+    assert len(generator.client.models.calls) == 2
+
+
+def test_generate_stream_fills_and_replays_cache(generator):
+    generator.client.models.reply = {
+        "name": "Soup",
+        "ingredients": [{"item": "leek", "amount": "1"}],
+        "instructions": ["Boil."],
+    }
+    streamed = list(generator.generate_stream(["leek"], [], 2))
+    assert streamed == [
+        ("name", "Soup"),
+        ("ingredient", {"item": "leek", "amount": "1"}),
+        ("ingredients", [{"item": "leek", "amount": "1"}]),
+        ("instruction", "Boil."),
+        ("recipe", generator.client.models.reply),
+    ]
+    assert list(generator.generate_stream(["Leek"], [], 2)) == streamed
+    assert len(generator.client.models.calls) == 1
+
+
+def test_surprise_me_bypasses_cache(generator):
+    generator.generate([], [], 2)
+    generator.generate([], [], 2)
+    assert len(generator.client.models.calls) == 2
+    assert len(generator.cache) == 0
+
+
+def test_substitutions_only_request_unknown_ingredients(generator):
+    def reply(prompt):
+        names = prompt.split(": ", 1)[1].split(".\n")[0].split(", ")
+        return {name.upper(): [f"{name.lower()} alt"] for name in names}
+
+    generator.client.models.reply = reply
+    calls = generator.client.models.calls
+
+    assert generator.get_substitutions(["Butter", "eggs"]) == {
+        "Butter": ["butter alt"],
+        "eggs": ["eggs alt"],
+    }
+    subs = generator.get_substitutions(["soy sauce", "butter"])
+    assert subs == {"soy sauce": ["soy sauce alt"], "butter": ["butter alt"]}
+    assert calls[-1].startswith("Missing ingredients: soy sauce.")
+
+    # Everything cached: served without a network call
+    assert generator.get_substitutions(["EGGS", "Soy Sauce"]) == {
+        "EGGS": ["eggs alt"],
+        "Soy Sauce": ["soy sauce alt"],
+    }
+    assert len(calls) == 2
+
+
+def test_shared_clients_are_built_once(tmp_path):
+    path = tmp_path / "cache.db"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        caches = list(pool.map(lambda _: clients.get_cache(path, "x"), range(16)))
+    assert all(c is caches[0] for c in caches)
+
+    gen = clients.get_recipe_generator("key-1", cache=caches[0])
+    assert clients.get_recipe_generator("key-1", cache=caches[0]) is gen
+    assert clients.get_recipe_generator("key-2", cache=caches[0]) is not gen
+    assert clients.get_image_fetcher("k") is clients.get_image_fetcher("k")
+
+
+def test_disk_cache_stats_are_per_namespace(tmp_path):
+    path = tmp_path / "cache.db"
+    searches, recipes = DiskCache(path, "searches"), DiskCache(path, "recipes")
+    searches.set("q", [1])
+    searches.get("q")
+    searches.get("other")
+    recipes.get("q")
+    assert searches.stats() == {"hits": 1, "misses": 1, "entries": 1}
+    # Other handles see the lookups once they are flushed
+    assert DiskCache(path, "recipes").stats()["misses"] == 0
+    recipes.flush()
+    assert DiskCache(path, "recipes").stats() == {"hits": 0, "misses": 1, "entries": 0}
+
+
+def test_substitutions_are_keyed_by_canonical_name(generator):
+    generator.client.models.reply = {"Garlic": ["shallot"]}
+    assert generator.get_substitutions(["Garlic"]) == {"Garlic": ["shallot"]}
+    subs = generator.get_substitutions(["2 cloves garlic, minced"])
+    assert subs == {"2 cloves garlic, minced": ["shallot"]}
+    assert len(generator.client.models.calls) == 1
+
+
+def test_disk_cache_hits_do_not_write(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path / "cache.db")
+    cache.set("a", 1)
+    writes = []
+    monkeypatch.setattr(cache, "_write_pending", writes.append)
+    for _ in range(50):
+        assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert writes == []
+
+    monkeypatch.undo()
+    monkeypatch.setattr("utils.cache.FLUSH_INTERVAL", 0)
+    cache.get("a")
+    assert cache.stats() == {"hits": 51, "misses": 1, "entries": 1}
@@ -0,0 +1,123 @@
+import pytest
+
+from utils.analytics import Rollups
+from utils.columnar import ColumnarExport, flatten
+from utils.storage import JournalStorage
+
+
+def _recipe(i):
+    return {
+        "name": f"Dish {i}",
+        "ingredients": [{"item": " Tomato ", "amount": "2"}, "onion"],
+        "instructions": ["Chop", "Simmer"],
+        "nutrition": {"Calories": f"{100 * i} kcal", "Sodium": "1,200 mg", "Note": "-"},
+    }
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return JournalStorage(tmp_path / "history.jsonl")
+
+
+@pytest.fixture
+def export(tmp_path):
+    return ColumnarExport(tmp_path / "export", batch_size=2)
+
+
+def test_flatten_splits_an_entry_into_rows():
+    entry = {
+        "id": "e1",
+        "timestamp": "2024-05-01T12:00:00Z",
+        "recipe": _recipe(3),
+        "image_url": "",
+        "substitutions": [{"ingredient": "onion", "substitutes": ["leek", "shallot"]}],
+    }
+    rows = flatten(entry)
+    assert rows["recipes"][0][2:] == ("Dish 3", None, 2, 2)
+    assert rows["ingredients"][0] == ("e1", 0, " Tomato ", "2", "tomato")
+    assert rows["nutrition"][1] == ("e1", "Sodium", "1,200 mg", 1200.0, "mg", 1.2, "g")
+    assert rows["nutrition"][2][3:] == (None, None, None, None)
+    assert rows["substitutions"] == [
+        ("e1", "onion", "leek", 0),
+        ("e1", "onion", "shallot", 1),
+    ]
+
+
+def test_update_appends_only_new_entries(storage, export):
+    for i in range(3):
+        storage.save_recipe(_recipe(i), "", [], {"onion": ["leek"]})
+    assert export.update(storage) == (3, 0)
+    assert export.update(storage) == (0, 0)
+    storage.save_recipe(_recipe(3), "", [], {})
+    assert export.update(storage) == (1, 0)
+
+    assert len(export._read_state()["parts"]) == 2
+    assert export.table("recipes")["name"].to_pylist() == [
+        f"Dish {i}" for i in range(4)
+    ]
+    assert export.table("substitutions").num_rows == 3
+    assert export.table("ingredients").num_rows == 8
+
+
+def test_deletes_trigger_a_full_export(storage, export):
+    ids = [storage.save_recipe(_recipe(i), "", [], {})["id"] for i in range(3)]
+    export.update(storage)
+    storage.save_recipe(_recipe(3), "", [], {})
+    storage.delete_recipe(ids[0])
+    assert export.update(storage) == (1, 2)
+
+    parts = export._read_state()["parts"]
+    assert len(parts) == 1
+    assert sorted(p.stem for p in (export.root / "recipes").iterdir()) == parts
+    live = [e["id"] for e in storage.iter_history()]
+    assert export.table("recipes")["entry_id"].to_pylist() == live
+
+
+def test_parts_are_merged_past_the_limit(storage, tmp_path):
+    export = ColumnarExport(tmp_path / "export", batch_size=2, max_parts=3)
+    for i in range(4):
+        storage.save_recipe(_recipe(i), "", [], {"onion": ["leek"]})
+        assert export.update(storage) == (1, 0)
+    parts = export._read_state()["parts"]
+    assert len(parts) == 1
+    for name in ("recipes", "substitutions"):
+        assert sorted(p.stem for p in (export.root / name).iterdir()) == parts
+    assert export.table("recipes")["name"].to_pylist() == [
+        f"Dish {i}" for i in range(4)
+    ]
+    assert export.table("ingredients").num_rows == 8
+    storage.save_recipe(_recipe(4), "", [], {})
+    assert export.update(storage) == (1, 0)
+    assert len(export._read_state()["parts"]) == 2
+
+
+def test_rollups_match_the_storage_rollups(storage, export):
+    ids = [storage.save_recipe(_recipe(i), "", [], {})["id"] for i in range(5)]
+    storage.delete_recipe(ids[2])
+    export.update(storage)
+    expected = Rollups.from_history(storage.iter_history()).to_dict()
+    assert export.rollups().to_dict() == expected
+
+
+def test_missing_export_is_not_created_and_raises(export):
+    assert not export.exists()
+    with pytest.raises(FileNotFoundError):
+        export.rollups()
+    with pytest.raises(FileNotFoundError):
+        export.table("nutrition")
+    assert not export.root.exists()
+
+
+def test_empty_export(storage, export):
+    assert export.update(storage) == (0, 0)
+    assert not export.exists()
+    assert export.table("nutrition").num_rows == 0
+    assert export.rollups().recipes == 0
+
+
+def test_rollups_are_cached_at_update(storage, export, monkeypatch):
+    for i in range(3):
+        storage.save_recipe(_recipe(i), "", [], {})
+    export.update(storage)
+    monkeypatch.setattr(export, "table", None)
+    assert export.rollups().recipes == 3
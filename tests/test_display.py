@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import components.display as display
+from components.display import export_markdown, export_text, recipe_artifacts
+
+
+@pytest.fixture
+def recipe():
+    return {
+        "name": "Tomato Soup",
+        "ingredients": ["tomato", "onion"],
+        "instructions": ["Chop", "Simmer"],
+        "nutrition": {"Calories": "200 kcal", "Protein": "5 g"},
+    }
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    display._artifacts.clear()
+
+
+def test_artifacts_are_built_once_per_content(recipe, monkeypatch):
+    calls = []
+    build = display._build_artifacts
+    monkeypatch.setattr(
+        display, "_build_artifacts", lambda r: calls.append(r) or build(r)
+    )
+    first = recipe_artifacts(recipe, "id-1")
+    assert recipe_artifacts(json.loads(json.dumps(recipe)), "id-1") is first
+    assert len(calls) == 1
+
+    recipe["nutrition"]["Calories"] = "300 kcal"
+    changed = recipe_artifacts(recipe, "id-1")
+    assert changed is not first and len(calls) == 2
+    assert changed["nutrition"]["Amount"].tolist() == [300.0, 5.0]
+    assert changed["difficulty"] == "Easy"
+    assert changed["bar_chart"]["mark"]["type"] == "bar"
+
+
+def test_artifact_cache_is_bounded(recipe, monkeypatch):
+    monkeypatch.setattr(display, "ARTIFACT_CACHE_SIZE", 3)
+    for i in range(5):
+        recipe_artifacts(recipe, f"id-{i}")
+    assert [key[0] for key in display._artifacts] == ["id-2", "id-3", "id-4"]
+
+
+def test_recipe_without_nutrition_has_no_charts():
+    artifacts = recipe_artifacts({"name": "Toast", "instructions": []})
+    assert artifacts["nutrition"] is None and artifacts["bar_chart"] is None
+
+
+def test_exports_include_shopping_list(recipe):
+    md = export_markdown(recipe, recipe["ingredients"], ["onion"])
+    assert md.startswith("# Tomato Soup\n")
+    assert md.endswith("## Shopping List\n- onion")
+    txt = export_text(recipe, recipe["ingredients"], [])
+    assert "2. Simmer" in txt and "Shopping List" not in txt
+
+
+def test_nutrition_chart_uses_canonical_units(recipe):
+    recipe["nutrition"]["Sodium"] = "500 mg"
+    df = recipe_artifacts(recipe)["nutrition"]
+    assert df["Nutrient"].tolist() == ["Calories (kcal)", "Protein (g)", "Sodium (g)"]
+    assert df["Amount"].tolist() == [200.0, 5.0, 0.5]
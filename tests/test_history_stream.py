@@ -0,0 +1,96 @@
+import io
+import json
+
+import pytest
+
+from utils.history_stream import (
+    iter_journal,
+    iter_journal_reversed,
+    iter_json_array,
+    iter_tombstones,
+)
+
+ENTRIES = [
+    {"id": "a", "recipe": {"name": 'Quoted "]}" name', "nutrition": {"kcal": 45.5}}},
+    {"id": "b", "recipe": {"name": "Soup", "ingredients": ["x"] * 50}},
+    -1.25e-7,
+    None,
+]
+
+
+class CountingReader(io.StringIO):
+    def __init__(self, text):
+        super().__init__(text)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 20])
+def test_json_array_round_trips_across_chunk_boundaries(indent, chunk_size):
+    text = json.dumps(ENTRIES, indent=indent)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == ENTRIES
+
+
+def test_json_array_is_read_lazily():
+    f = CountingReader(json.dumps([{"id": str(i)} for i in range(1000)]))
+    entries = iter_json_array(f, chunk_size=64)
+    assert next(entries) == {"id": "0"}
+    assert f.reads == [64]
+
+
+@pytest.mark.parametrize("text", ["", "  [ ]\n"])
+def test_empty_json_array(text):
+    assert list(iter_json_array(io.StringIO(text))) == []
+
+
+@pytest.mark.parametrize("text", ["{}", "[1, 2", '[{"a": }]', "[1 2]"])
+def test_malformed_json_array_raises(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(text), chunk_size=2))
+
+
+def _journal(*records, tail=b""):
+    lines = b"".join(json.dumps(r).encode() + b"\n" for r in records)
+    return io.BytesIO(lines + tail)
+
+
+def test_journal_applies_tombstones():
+    f = _journal(
+        {"id": "a"},
+        {"id": "b"},
+        {"op": "delete", "id": "a"},
+        {"op": "delete", "id": "c"},
+        {"id": "c"},
+        tail=b'{"id": "torn',
+    )
+    assert [e["id"] for e in iter_journal(f)] == ["b", "c"]
+
+
+def test_journal_ignores_records_appended_while_reading(tmp_path):
+    path = tmp_path / "history.jsonl"
+    path.write_text('{"id": "a"}\n{"id": "b"}\n')
+    with path.open("rb") as f:
+        entries = iter_journal(f)
+        assert next(entries) == {"id": "a"}
+        with path.open("ab") as writer:
+            writer.write(b'{"id": "late"}\n')
+        assert [e["id"] for e in entries] == ["b"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64, 1 << 16])
+def test_journal_reversed_reads_newest_first(chunk_size):
+    lines = [
+        json.dumps({"id": "a"}),
+        json.dumps({"id": "b"}),
+        json.dumps({"op": "delete", "id": "a"}),
+        json.dumps({"id": "c"}),
+        '{"id": "torn',
+    ]
+    f = io.BytesIO("\n".join(lines).encode())
+    entries = iter_journal_reversed(f, "delete", chunk_size)
+    assert [e["id"] for e in entries] == ["c", "b"]
+    assert list(iter_tombstones(f, "delete")) == ["a"]
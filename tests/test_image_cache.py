@@ -0,0 +1,138 @@
+import io
+import os
+import time
+from pathlib import Path
+
+import pytest
+import requests
+from PIL import Image
+
+from utils import image_cache
+from utils.image_cache import ImageCache
+
+UNSPLASH = "https://images.unsplash.com/"
+
+
+def _png(size, color="orange"):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class FakeResponse:
+    """
+    Stands in for a streamed requests.Response.
+    """
+
+    def __init__(self, content):
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+
+class FakeSession:
+    """
+    Stands in for requests.Session and serves images by URL.
+    """
+
+    def __init__(self, images):
+        self.images = images
+        self.requested = []
+
+    def get(self, url, timeout, stream=False):
+        assert stream
+        self.requested.append(url)
+        if url not in self.images:
+            raise requests.ConnectionError(url)
+        return FakeResponse(self.images[url])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ImageCache(tmp_path / "images")
+    picture = _png((2000, 1000))
+    cache.session = FakeSession({UNSPLASH + "a": picture, UNSPLASH + "b": picture})
+    return cache
+
+
+def test_variants_are_resized_and_downloaded_once(cache):
+    thumb = cache.variant(UNSPLASH + "a", "thumb")
+    hero = cache.variant(UNSPLASH + "a", "hero")
+    assert Image.open(thumb).size == (400, 200)
+    assert Image.open(hero).size == (1280, 640)
+    assert cache.session.requested == [UNSPLASH + "a"]
+
+
+def test_same_content_is_stored_once(cache):
+    first, second = cache.prefetch([UNSPLASH + "a", UNSPLASH + "b"])
+    assert first == second
+    assert len(list(Path(first).parent.iterdir())) == 2  # thumb + hero
+
+
+def test_failed_download_falls_back_to_url(cache):
+    assert cache.variant(UNSPLASH + "missing") == UNSPLASH + "missing"
+    assert cache.variant("") == ""
+
+
+def test_least_recently_used_images_are_evicted(tmp_path):
+    images = {UNSPLASH + c: _png((900, 900), c) for c in ("red", "green", "blue")}
+    probe = ImageCache(tmp_path / "probe")
+    probe.session = FakeSession(images)
+    one_image = sum(
+        p.stat().st_size for p in Path(probe.variant(UNSPLASH + "red")).parent.iterdir()
+    )
+
+    cache = ImageCache(tmp_path / "images", max_bytes=int(one_image * 2.5))
+    cache.session = FakeSession(images)
+    red = cache.variant(UNSPLASH + "red")
+    green = cache.variant(UNSPLASH + "green")
+    os.utime(green, (1, 1))  # make green the least recently used
+    cache.variant(UNSPLASH + "red")
+    blue = cache.variant(UNSPLASH + "blue")
+
+    assert Path(red).exists() and Path(blue).exists()
+    assert not Path(green).exists()
+    assert cache.index.get(UNSPLASH + "green") is None
+    assert cache.variant(UNSPLASH + "green") == green  # downloaded again
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://images.unsplash.com/a",
+        "https://169.254.169.254/latest/meta-data",
+        "https://images.unsplash.com.evil.test/a",
+        "file:///etc/passwd",
+    ],
+)
+def test_other_hosts_are_never_fetched(cache, url):
+    assert cache.variant(url) == url
+    assert cache.resolve([url]) == [url]
+    assert cache.session.requested == []
+
+
+def test_oversized_download_is_abandoned(cache, monkeypatch):
+    monkeypatch.setattr(image_cache, "MAX_DOWNLOAD_BYTES", 1000)
+    assert cache.variant(UNSPLASH + "a") == UNSPLASH + "a"
+    assert cache.index.get(UNSPLASH + "a") is None
+
+
+def test_resolve_warms_misses_in_the_background(cache):
+    assert cache.resolve([UNSPLASH + "a", ""]) == [UNSPLASH + "a", ""]
+    deadline = time.monotonic() + 10
+    while cache.cached(UNSPLASH + "a") is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    (thumb,) = cache.resolve([UNSPLASH + "a"])
+    assert Image.open(thumb).size == (400, 200)
+    assert cache.session.requested == [UNSPLASH + "a"]
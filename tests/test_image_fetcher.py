@@ -0,0 +1,96 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from urllib3 import HTTPResponse
+
+from utils.cache import DiskCache
+from utils.image_fetcher import MAX_RETRY_AFTER, UnsplashImageFetcher
+
+
+class FakeSession:
+    """
+    Stands in for requests.Session and counts searches per query.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params, timeout):
+        with self.lock:
+            self.queries.append(params["query"])
+        results = [
+            {"urls": {"regular": f"https://img/{params['query']}/{i}"}}
+            for i in range(params["per_page"])
+        ]
+        return SimpleNamespace(ok=True, json=lambda: {"results": results})
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = UnsplashImageFetcher("key")
+    fetcher.session = FakeSession()
+    return fetcher
+
+
+def test_fetch_images_is_memoized(fetcher):
+    urls = fetcher.fetch_images("soup", n=2)
+    assert urls == ["https://img/soup recipe food/0", "https://img/soup recipe food/1"]
+    assert fetcher.fetch_images("soup", n=2) == urls
+    assert fetcher.session.queries == ["soup recipe food"]
+
+
+def test_fetch_images_batch_resolves_each_query_once(fetcher):
+    queries = [f"dish {i % 5}" for i in range(20)]
+    results = fetcher.fetch_images_batch(queries, n=1)
+    assert sorted(results) == sorted(set(queries))
+    assert results["dish 3"] == ["https://img/dish 3 recipe food/0"]
+    assert len(fetcher.session.queries) == 5
+
+
+def test_missing_key_returns_nothing():
+    assert UnsplashImageFetcher("").fetch_images("soup") == []
+
+
+def test_disk_cache_is_shared_across_fetchers(tmp_path):
+    path = tmp_path / "cache.db"
+    first = UnsplashImageFetcher("key", cache=DiskCache(path, "image_search"))
+    first.session = FakeSession()
+    urls = first.fetch_images("soup", n=2)
+
+    # A fresh fetcher stands in for another replica or a restarted process
+    cache = DiskCache(path, "image_search")
+    second = UnsplashImageFetcher("key", cache=cache)
+    second.session = FakeSession()
+    assert second.fetch_images("soup", n=2) == urls
+    assert second.session.queries == []
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_failed_search_is_not_cached(tmp_path):
+    cache = DiskCache(tmp_path / "cache.db", "image_search")
+    fetcher = UnsplashImageFetcher("key", cache=cache)
+    fetcher.session = SimpleNamespace(
+        get=lambda *a, **kw: SimpleNamespace(ok=False, json=dict)
+    )
+    assert fetcher.fetch_images("soup") == []
+    assert len(cache) == 0
+
+
+def test_memo_keeps_only_the_most_recent_searches():
+    fetcher = UnsplashImageFetcher("key", memo_size=2)
+    fetcher.session = FakeSession()
+    for query in ("soup", "stew", "soup", "salad"):
+        fetcher.fetch_images(query, n=1)
+    assert [query for query, _ in fetcher._memo] == ["soup", "salad"]
+    fetcher.fetch_images("stew", n=1)
+    assert fetcher.session.queries.count("stew recipe food") == 2
+
+
+def test_retry_after_is_capped():
+    retries = UnsplashImageFetcher("key").session.get_adapter("https://x").max_retries
+    response = HTTPResponse(status=429, headers={"Retry-After": "3600"})
+    assert retries.get_retry_after(response) == MAX_RETRY_AFTER
+    response = HTTPResponse(status=429, headers={"Retry-After": "2"})
+    assert retries.get_retry_after(response) == 2
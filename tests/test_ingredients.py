@@ -0,0 +1,75 @@
+import pytest
+
+from utils.ingredients import IngredientIndex, canonicalize, singularize
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("2 cloves garlic, minced", "garlic"),
+        ("1/2 cup all-purpose flour", "flour"),
+        ("3 large tomatoes (diced)", "tomato"),
+        ("salt to taste", "salt"),
+        ("1 tsp ground cloves", "ground clove"),
+        ("Butter or margarine", "butter"),
+        ("Fresh cilantro leaves", "coriander"),
+        ("200g chicken breasts", "chicken breast"),
+        ("2", ""),
+    ],
+)
+def test_canonicalize(text, expected):
+    assert canonicalize(text) == expected
+
+
+@pytest.mark.parametrize(
+    "word, expected",
+    [
+        ("berries", "berry"),
+        ("peaches", "peach"),
+        ("potatoes", "potato"),
+        ("eggs", "egg"),
+        ("molasses", "molasses"),
+        ("asparagus", "asparagus"),
+    ],
+)
+def test_singularize(word, expected):
+    assert singularize(word) == expected
+
+
+def test_index_matches_canonical_names_and_suffixes():
+    have = IngredientIndex(["Garlic", "olive oil", "Cilantro", "eggs"])
+    assert have.match("2 cloves garlic") == "Garlic"
+    assert have.match("2 tbsp extra virgin olive oil") == "olive oil"
+    assert have.match("fresh coriander") == "Cilantro"
+    assert "1 egg, beaten" in have
+    recipe = ["sesame oil", "3 eggs", "onion", "garlic cloves"]
+    assert have.missing(recipe) == ["sesame oil", "onion"]
+    assert len(have) == 4 and "anything" not in IngredientIndex()
+
+
+@pytest.mark.parametrize(
+    "have, recipe",
+    [
+        ("salt", "1 tsp sea salt"),
+        ("salt", "kosher salt"),
+        ("cinnamon", "ground cinnamon"),
+        ("soy sauce", "light soy sauce"),
+        ("bell pepper", "1 red bell pepper"),
+    ],
+)
+def test_index_matches_qualified_and_multi_word_suffixes(have, recipe):
+    assert recipe in IngredientIndex([have])
+
+
+@pytest.mark.parametrize(
+    "have, recipe",
+    [
+        ("butter", "2 tbsp peanut butter"),
+        ("milk", "1 can coconut milk"),
+        ("cream", "ice cream"),
+        ("powder", "1 tsp baking powder"),
+        ("sugar", "1/2 cup brown sugar"),
+    ],
+)
+def test_index_does_not_match_different_ingredients(have, recipe):
+    assert recipe not in IngredientIndex([have])
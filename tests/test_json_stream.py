@@ -0,0 +1,58 @@
+import json
+import random
+
+import pytest
+
+from utils.json_stream import RecipeStreamParser
+
+RECIPE = {
+    "name": 'Spicy "Quoted" Stew \\ {with} [brackets]',
+    "ingredients": [
+        {"item": "tomato, diced", "amount": "2"},
+        {"item": "chili", "amount": "1 tsp", "extra": [1, {"n": None}]},
+    ],
+    "instructions": ["Chop, then stir.", "Simmer 10 min }]"],
+    "nutrition": {"calories": "250 kcal", "servings": 2, "vegan": True},
+    "shopping_list": [],
+}
+
+
+def _feed_all(text, sizes):
+    parser = RecipeStreamParser()
+    events, pos = [], 0
+    for size in sizes:
+        events.extend(parser.feed(text[pos : pos + size]))
+        pos += size
+    events.extend(parser.feed(text[pos:]))
+    return parser, events
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("seed", range(5))
+def test_events_independent_of_chunking(indent, seed):
+    text = json.dumps(RECIPE, indent=indent)
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 7) for _ in range(len(text))]
+
+    parser, events = _feed_all(text, sizes)
+    assert events == [
+        ("name", RECIPE["name"]),
+        ("ingredient", RECIPE["ingredients"][0]),
+        ("ingredient", RECIPE["ingredients"][1]),
+        ("ingredients", RECIPE["ingredients"]),
+        ("instruction", RECIPE["instructions"][0]),
+        ("instruction", RECIPE["instructions"][1]),
+    ]
+    assert parser.close() == RECIPE
+
+
+def test_events_arrive_before_stream_ends():
+    parser = RecipeStreamParser()
+    assert parser.feed('{"name": "Sou') == []
+    assert parser.feed('p", "ingredients": [{"item": "leek"}') == [
+        ("name", "Soup"),
+        ("ingredient", {"item": "leek"}),
+    ]
+    assert parser.feed('], "instructions": ["Boil') == [
+        ("ingredients", [{"item": "leek"}]),
+    ]
@@ -0,0 +1,169 @@
+import json
+
+import pytest
+
+from utils import localstorage
+from utils.localstorage import (
+    CHUNK_PREFIX,
+    LEGACY_KEY,
+    MANIFEST_KEY,
+    ROLLUPS_KEY,
+    decode_chunk,
+    decode_manifest,
+    encode_chunk,
+)
+
+
+class FakeLocalStorage:
+    """
+    In-memory stand-in for the streamlit_local_storage component.
+    """
+
+    items = {}
+    writes = []
+
+    def __init__(self):
+        self.storedItems = FakeLocalStorage.items
+
+    def getItem(self, itemKey):
+        return self.storedItems.get(itemKey)
+
+    def setItem(self, itemKey, itemValue, key="set"):
+        FakeLocalStorage.writes.append(itemKey)
+        self.storedItems[itemKey] = itemValue
+
+    def deleteItem(self, itemKey, key="deleteItem"):
+        self.storedItems.pop(itemKey)
+
+    def deleteAll(self, key="deleteAll"):
+        self.storedItems.clear()
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    FakeLocalStorage.items = {}
+    FakeLocalStorage.writes = []
+    monkeypatch.setattr(localstorage, "LocalStorage", FakeLocalStorage)
+    return FakeLocalStorage
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_chunk_codec_roundtrip(compress):
+    entries = [{"id": "a", "recipe": {"name": "Ünïcode"}}]
+    assert decode_chunk(encode_chunk(entries, compress)) == entries
+    assert decode_chunk(None) == [] and decode_chunk("garbage") == []
+
+
+def test_saves_and_deletes_touch_only_one_chunk(browser):
+    session = {}
+    storage = localstorage.Storage(chunk_size=2, state=session)
+    saved = [storage.save_recipe({"name": str(i)}, "", [], {}) for i in range(5)]
+    assert storage.count() == 5
+    assert browser.writes == []  # nothing leaves the session until a flush
+
+    storage.flush()
+    assert len(decode_manifest(browser.items[MANIFEST_KEY])["chunks"]) == 3
+    # Three chunks, the rollups and the manifest, once each
+    assert len(browser.writes) == 5
+
+    browser.writes.clear()
+    storage.delete_recipe(saved[0]["id"])
+    storage.flush()
+    storage.flush()
+    assert browser.writes == [f"{CHUNK_PREFIX}0", ROLLUPS_KEY, MANIFEST_KEY]
+
+    # The next rerun reuses the session mirror; a new session reads the browser
+    for state in (session, {}):
+        reloaded = localstorage.Storage(chunk_size=2, state=state)
+        names = [e["recipe"]["name"] for e in reloaded.load_history()]
+        assert names == list("1234")
+        assert [e["recipe"]["name"] for e in reloaded.page(1, 2)] == ["2", "1"]
+        assert reloaded.get(saved[3]["id"]) == saved[3]
+
+    reloaded.clear_history()
+    assert reloaded.load_history() == [] and browser.items == {}
+
+
+def test_manifest_is_compressed_and_lists_no_entry_ids(browser):
+    storage = localstorage.Storage(chunk_size=2, state={})
+    saved = [storage.save_recipe({"name": str(i)}, "", [], {}) for i in range(5)]
+    storage.flush()
+    raw = browser.items[MANIFEST_KEY]
+    assert raw.startswith("z:")
+    assert not any(entry["id"] in decode_chunk(raw) for entry in saved)
+    assert [c["count"] for c in decode_manifest(raw)["chunks"]] == [2, 2, 1]
+
+
+def test_manifest_with_entry_ids_is_upgraded(browser):
+    entries = [{"id": str(i), "recipe": {"name": str(i)}} for i in range(3)]
+    browser.items[f"{CHUNK_PREFIX}0"] = encode_chunk(entries)
+    browser.items[MANIFEST_KEY] = json.dumps(
+        {"next": 1, "chunks": [{"key": f"{CHUNK_PREFIX}0", "ids": ["0", "1", "2"]}]}
+    )
+    storage = localstorage.Storage(state={})
+    assert storage.count() == 3
+    assert storage.get("1") == entries[1]
+    storage.delete_recipe("0")
+    storage.flush()
+    assert decode_manifest(browser.items[MANIFEST_KEY])["chunks"][0]["count"] == 2
+
+
+def test_mirror_picks_up_external_changes(browser):
+    session = {}
+    assert localstorage.Storage(state=session).count() == 0
+
+    other_tab = localstorage.Storage(state={})
+    other_tab.save_recipe({"name": "x"}, "", [], {})
+    other_tab.flush()
+    assert localstorage.Storage(state=session).count() == 1
+
+
+def test_legacy_single_key_is_migrated(browser):
+    legacy = [{"id": str(i), "recipe": {"name": str(i)}} for i in range(3)]
+    browser.items[LEGACY_KEY] = json.dumps(legacy, indent=2)
+
+    storage = localstorage.Storage(chunk_size=2, state={})
+    assert storage.load_history() == legacy
+    storage.flush()
+    assert LEGACY_KEY not in browser.items
+    assert MANIFEST_KEY in browser.items
+
+
+def test_rollups_have_their_own_compressed_key(browser):
+    storage = localstorage.Storage(chunk_size=2, state={})
+    saved = [
+        storage.save_recipe({"name": str(i), "ingredients": ["egg"]}, "", [], {})
+        for i in range(3)
+    ]
+    storage.delete_recipe(saved[0]["id"])
+    storage.flush()
+    assert "rollups" not in decode_manifest(browser.items[MANIFEST_KEY])
+    assert browser.items[ROLLUPS_KEY].startswith("z:")
+    assert decode_chunk(browser.items[ROLLUPS_KEY])["recipes"] == 2
+
+    reloaded = localstorage.Storage(chunk_size=2, state={})
+    assert reloaded.rollups().top_ingredients() == [("egg", 2)]
+
+
+def test_rollups_in_an_older_manifest_are_moved(browser):
+    entries = [{"id": "a", "recipe": {"ingredients": ["egg"]}}]
+    browser.items[f"{CHUNK_PREFIX}0"] = encode_chunk(entries)
+    rollups = {"recipes": 1, "ingredients": {"egg": 1}}
+    browser.items[MANIFEST_KEY] = encode_chunk(
+        {
+            "next": 1,
+            "chunks": [{"key": f"{CHUNK_PREFIX}0", "count": 1}],
+            "rollups": rollups,
+        }
+    )
+    storage = localstorage.Storage(state={})
+    assert storage.rollups().top_ingredients() == [("egg", 1)]
+    storage.flush()
+    assert "rollups" not in decode_manifest(browser.items[MANIFEST_KEY])
+    assert decode_chunk(browser.items[ROLLUPS_KEY])["ingredients"] == {"egg": 1}
+
+
+def test_rollups_are_built_for_migrated_history(browser):
+    legacy = [{"id": str(i), "recipe": {"ingredients": ["rice"]}} for i in range(3)]
+    browser.items[LEGACY_KEY] = json.dumps(legacy)
+    assert localstorage.Storage(state={}).rollups().top_ingredients() == [("rice", 3)]
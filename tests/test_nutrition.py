@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from components.display import _parse_numeric
+from utils.nutrition import (
+    extract_amounts,
+    normalize_amount,
+    nutrition_table,
+    nutrition_wide,
+    parse_amount,
+    parse_timestamps,
+)
+
+VALUES = ["12g", "Approximately 5.5 mg", "no number here", "1,200 kcal", "837 kJ", 7]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("12g", (12.0, "g")),
+        ("Approximately 5.5 mg", (5.5, "mg")),
+        ("no number here", (None, None)),
+        ("1,200 mg sodium", (1200.0, "mg")),
+        (None, (None, None)),
+        (7, (7.0, None)),
+    ],
+)
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+def test_normalize_amount_converts_units():
+    assert normalize_amount("500mg") == pytest.approx(0.5)
+    assert normalize_amount("837 kJ") == pytest.approx(200.05, abs=0.01)
+    assert normalize_amount("3 units") == 3.0
+    assert normalize_amount("none") is None
+
+
+def test_vectorized_matches_scalar():
+    out = extract_amounts(pd.Series(VALUES, dtype=object))
+    for text, value, amount in zip(VALUES, out["value"], out["amount"]):
+        expected = normalize_amount(text)
+        if expected is None:
+            assert pd.isna(value) and pd.isna(amount)
+        else:
+            assert value == parse_amount(text)[0]
+            assert amount == pytest.approx(expected)
+    assert out["base_unit"].tolist()[:2] == ["g", "g"]
+
+
+def test_display_keeps_raw_numbers():
+    assert _parse_numeric("Approximately 5.5 mg") == 5.5
+    assert _parse_numeric("no number here") == 0.0
+
+
+def test_nutrition_tables():
+    history = [
+        {"recipe": {"name": "A", "nutrition": {"Calories": "200 kcal", "Fat": "?"}}},
+        {"recipe": {"name": "A", "nutrition": {"Sodium": "300mg"}}},
+        {"recipe": {}},
+    ]
+    table = nutrition_table(history)
+    assert table[["entry", "metric"]].values.tolist() == [
+        [0, "Calories"],
+        [1, "Sodium"],
+    ]
+
+    wide = nutrition_wide(history)
+    assert wide.index.tolist() == ["A", "A"]
+    assert wide.loc["A", "Sodium"].iloc[1] == pytest.approx(0.3)
+    assert nutrition_wide([]).empty
+
+
+def test_parse_timestamps():
+    parsed = parse_timestamps(["2024-05-01T12:00:00.5Z", "2024-05-02T08:00:00", "bad"])
+    assert parsed.dt.day.tolist()[:2] == [1, 2]
+    assert parsed.isna().tolist() == [False, False, True]
@@ -0,0 +1,278 @@
+import json
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.analytics import Rollups
+from utils.sqlite_storage import SQLiteStorage
+from utils.storage import JournalStorage, Storage, open_storage
+
+RECIPE = {
+    "name": "Test Dish",
+    "ingredients": ["a", "b"],
+    "nutrition": {},
+    "instructions": [],
+}
+
+
+def test_journal_save_delete_replay(tmp_path):
+    journal = tmp_path / "history.jsonl"
+    storage = JournalStorage(journal)
+    assert storage.load_history() == []
+
+    storage.save_recipe(RECIPE, "http://img", ["a"], {"b": ["c"]})
+    storage.save_recipe({"name": "Other"}, "", [], {})
+    first, second = storage.load_history()
+    storage.delete_recipe(first["id"])
+
+    # One compact line per save plus one tombstone, nothing rewritten
+    lines = journal.read_text().splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[-1]) == {"op": "delete", "id": first["id"]}
+    assert [e["id"] for e in storage.load_history()] == [second["id"]]
+
+    storage.compact()
+    assert len(journal.read_text().splitlines()) == 1
+
+    storage.clear_history()
+    assert storage.load_history() == []
+
+
+def test_journal_tolerates_torn_line(tmp_path):
+    journal = tmp_path / "history.jsonl"
+    storage = JournalStorage(journal)
+    storage.save_recipe(RECIPE, "", [], {})
+    with journal.open("a") as f:
+        f.write('{"id": "torn", "reci')
+
+    storage.save_recipe({"name": "After"}, "", [], {})
+    names = [e["recipe"]["name"] for e in storage.load_history()]
+    assert names == ["Test Dish", "After"]
+
+
+def test_journal_migrates_json_array(tmp_path):
+    legacy = tmp_path / "recipe_history.json"
+    legacy.write_text(
+        json.dumps([{"id": "x1", "timestamp": "2024-01-01T00:00:00", "recipe": {}}])
+    )
+
+    storage = JournalStorage.migrate(legacy, tmp_path / "recipe_history.jsonl")
+    assert [e["id"] for e in storage.load_history()] == ["x1"]
+
+    # Pointing a journal at the legacy file converts it in place
+    in_place = JournalStorage(legacy)
+    assert [e["id"] for e in in_place.load_history()] == ["x1"]
+    assert legacy.read_text().startswith("{")
+
+
+def test_sqlite_storage_point_ops(tmp_path):
+    storage = SQLiteStorage(tmp_path / "history.db")
+    assert storage.load_history() == []
+
+    for name in ("one", "two", "three"):
+        storage.save_recipe({"name": name}, "", [], {})
+    ids = [e["id"] for e in storage.load_history()]
+    assert [e["recipe"]["name"] for e in storage.latest(2)] == ["three", "two"]
+
+    storage.delete_recipe(ids[1])
+    storage.delete_recipe("missing")
+    assert [e["id"] for e in storage.load_history()] == [ids[0], ids[2]]
+
+    storage.clear_history()
+    assert storage.load_history() == []
+
+
+@pytest.mark.parametrize(
+    "backend, cls",
+    [("json", Storage), ("journal", JournalStorage), ("sqlite", SQLiteStorage)],
+)
+def test_open_storage_backends(tmp_path, backend, cls):
+    storage = open_storage(backend, tmp_path / f"history.{backend}")
+    assert isinstance(storage, cls)
+    storage.save_recipe(RECIPE, "", [], {})
+    assert storage.load_history()[0]["recipe"]["name"] == "Test Dish"
+
+
+def test_open_storage_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        open_storage("redis")
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite"])
+def test_paged_reads(tmp_path, backend):
+    storage = open_storage(backend, tmp_path / f"history.{backend}")
+    saved = [storage.save_recipe({"name": str(i)}, "", [], {}) for i in range(5)]
+    assert saved[-1]["recipe"]["name"] == "4"
+
+    assert storage.count() == 5
+    assert [e["recipe"]["name"] for e in storage.latest(2)] == ["4", "3"]
+    assert [e["recipe"]["name"] for e in storage.page(1, 2)] == ["2", "1"]
+    assert [e["recipe"]["name"] for e in storage.page(2, 2)] == ["0"]
+    assert storage.page(3, 2) == []
+    assert storage.get(saved[2]["id"]) == saved[2]
+    assert storage.get("missing") is None
+
+
+@pytest.mark.parametrize("cls", [Storage, JournalStorage])
+def test_count_and_pages_do_not_load_the_history(tmp_path, cls, monkeypatch):
+    storage = cls(tmp_path / "history")
+    for i in range(5):
+        storage.save_recipe({"name": str(i)}, "", [], {})
+    monkeypatch.setattr(storage, "load_history", None)
+    monkeypatch.setattr(storage, "iter_history", None)
+    assert storage.count() == 5
+
+    monkeypatch.undo()
+    monkeypatch.setattr(storage, "load_history", None)
+    assert [e["recipe"]["name"] for e in storage.page(1, 2)] == ["2", "1"]
+
+
+def _save_many(path, count):
+    storage = Storage(path)
+    for i in range(count):
+        storage.save_recipe({"name": str(i)}, "", [], {})
+
+
+@pytest.mark.parametrize("cls", [Storage, JournalStorage])
+def test_concurrent_saves_are_not_lost(tmp_path, cls):
+    path = tmp_path / "history"
+    storage = cls(path)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(
+            pool.map(lambda i: storage.save_recipe({"name": i}, "", [], {}), range(80))
+        )
+    assert storage.count() == 80
+    assert storage.rollups().recipes == 80
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_multiprocess_saves_are_not_lost(tmp_path):
+    path = tmp_path / "history.json"
+    Storage(path)
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_save_many, args=(path, 20)) for _ in range(3)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=60)
+    assert all(proc.exitcode == 0 for proc in procs)
+    assert len(json.loads(path.read_text())) == 60
+    assert Storage(path).rollups().recipes == 60
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite"])
+def test_rollups_follow_saves_and_deletes(tmp_path, backend):
+    storage = open_storage(backend, tmp_path / f"history.{backend}")
+    saved = [
+        storage.save_recipe(
+            {"name": str(i), "ingredients": ["salt"], "nutrition": {"Fat": f"{i} g"}},
+            "",
+            [],
+            {},
+        )
+        for i in range(4)
+    ]
+    storage.delete_recipe(saved[1]["id"])
+    storage.delete_recipe("missing")
+
+    rollups = storage.rollups()
+    assert rollups.to_dict() == Rollups.from_history(storage.load_history()).to_dict()
+    assert rollups.recipes == 3 and rollups.top_ingredients() == [("salt", 3)]
+
+    storage.clear_history()
+    assert storage.rollups().recipes == 0
+
+
+@pytest.mark.parametrize("cls", [Storage, JournalStorage])
+def test_stale_rollups_sidecar_is_rebuilt(tmp_path, cls):
+    path = tmp_path / "history"
+    storage = cls(path)
+    storage.save_recipe(RECIPE, "", [], {})
+    assert storage.rollups().recipes == 1
+
+    # A history written without updating the sidecar (e.g. by an old version)
+    legacy = [{"id": "x", "timestamp": "2024-01-01T00:00:00", "recipe": RECIPE}] * 2
+    with path.open("w") as f:
+        if cls is Storage:
+            json.dump(legacy, f)
+        else:
+            f.write("".join(json.dumps(e) + "\n" for e in legacy[:1]))
+    assert storage.rollups().recipes == len(storage.load_history())
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite"])
+def test_iter_history_matches_load_history(tmp_path, backend):
+    storage = open_storage(backend, tmp_path / f"history.{backend}")
+    ids = [storage.save_recipe(RECIPE, "", [], {})["id"] for _ in range(4)]
+    storage.delete_recipe(ids[1])
+    assert list(storage.iter_history()) == storage.load_history()
+    assert storage.count() == 3
+    assert storage.get(ids[2])["id"] == ids[2]
+    assert storage.get(ids[1]) is None
+
+
+def test_journal_delete_with_entry_does_not_read_the_journal(tmp_path, monkeypatch):
+    storage = JournalStorage(tmp_path / "history.jsonl")
+    saved = [storage.save_recipe(RECIPE, "", [], {}) for _ in range(3)]
+    storage.rollups()
+
+    def fail(*args):
+        raise AssertionError("journal was read")
+
+    monkeypatch.setattr("utils.storage.iter_journal", fail)
+    monkeypatch.setattr("utils.storage.iter_journal_reversed", fail)
+    storage.delete_recipe(saved[0]["id"], saved[0])
+    # Deleting the same entry again is a no-op
+    storage.delete_recipe(saved[0]["id"], saved[0])
+    assert storage.rollups().recipes == 2
+
+    monkeypatch.undo()
+    assert (
+        storage.rollups().to_dict()
+        == Rollups.from_history(storage.load_history()).to_dict()
+    )
+
+
+def test_journal_remembers_deletes_across_compaction(tmp_path):
+    storage = JournalStorage(tmp_path / "history.jsonl")
+    saved = [storage.save_recipe(RECIPE, "", [], {}) for _ in range(3)]
+    storage.delete_recipe(saved[1]["id"])
+    storage.compact()
+    storage.delete_recipe(saved[1]["id"], saved[1])
+    storage.delete_recipe(saved[2]["id"])
+    assert storage.rollups().recipes == 1
+    assert [e["id"] for e in storage.load_history()] == [saved[0]["id"]]
+
+
+def test_journal_pages_read_backwards(tmp_path, monkeypatch):
+    storage = JournalStorage(tmp_path / "history.jsonl")
+    saved = [storage.save_recipe({"name": str(i)}, "", [], {}) for i in range(6)]
+    storage.delete_recipe(saved[4]["id"])
+    storage.delete_recipe(saved[1]["id"])
+    monkeypatch.setattr(storage, "iter_history", None)
+
+    assert [e["recipe"]["name"] for e in storage.page(0, 2)] == ["5", "3"]
+    assert [e["recipe"]["name"] for e in storage.page(1, 2)] == ["2", "0"]
+    assert storage.page(2, 2) == []
+    assert storage.get(saved[3]["id"]) == saved[3]
+    assert storage.get(saved[4]["id"]) is None
+
+
+def test_json_and_journal_on_one_path_use_their_own_committers(tmp_path):
+    path = tmp_path / "recipe_history.json"
+    Storage(path).save_recipe(RECIPE, "", [], {})
+
+    journal = JournalStorage.migrate(path, path)
+    journal.save_recipe({"name": "After"}, "", [], {})
+    names = [e["recipe"]["name"] for e in journal.load_history()]
+    assert names == ["Test Dish", "After"]
+    assert journal.rollups().recipes == 2
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite"])
+@pytest.mark.parametrize("page, size", [(-1, 2), (0, 0), (0, -1)])
+def test_invalid_pages_are_empty(tmp_path, backend, page, size):
+    storage = open_storage(backend, tmp_path / f"history.{backend}")
+    storage.save_recipe(RECIPE, "", [], {})
+    assert storage.page(page, size) == []
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import utils.timing as timing
+from utils.timing import RunTimer, format_report
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_marks_split_the_run_into_phases(monkeypatch):
+    clock = iter([1.5, 4.0])
+    monkeypatch.setattr(timing.time, "perf_counter", lambda: next(clock))
+    timer = RunTimer(start=1.0)
+    timer.mark("imports")
+    timer.mark("render")
+    assert timer.phases == [("imports", 0.5), ("render", 2.5)]
+    assert timer.total == 3.0
+    assert format_report(timer) == "imports 500 ms, render 2500 ms, total 3000 ms"
+
+
+def test_first_finished_run_is_the_cold_start(monkeypatch):
+    monkeypatch.setattr(timing, "_first_run", None)
+    cold, warm = RunTimer(), RunTimer()
+    assert cold.finish() is cold
+    assert warm.finish() is cold
+    assert timing.first_run() is cold
+
+
+def test_startup_modules_do_not_import_heavy_dependencies():
+    code = (
+        "import sys\n"
+        "import components.display, components.inputs\n"
+        "import utils.clients, utils.storage, utils.timing\n"
+        "heavy = ('altair', 'pandas', 'google.genai', 'PIL', 'streamlit_local_storage')\n"
+        "print(' '.join(m for m in heavy if m in sys.modules))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == ""
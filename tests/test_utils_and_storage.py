@@ -2,9 +2,9 @@ import json
 from pathlib import Path
 
 import pytest
-from your_project import normalize_ingredients  # adjust import path
 
 from components.display import _parse_numeric
+from utils.ingredients import normalize_ingredients
 from utils.storage import Storage
 
 
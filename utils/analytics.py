@@ -0,0 +1,298 @@
+import math
+from collections import Counter
+
+from utils.nutrition import UNITS, parse_amount, parse_timestamp
+
+
+def _nutrition_values(entry: dict) -> list:
+    """
+    Extract the numeric nutrition values of one history entry, converted
+    to their canonical units.
+
+    :param entry: The history entry.
+    :return: A list of ``(metric, value, base_unit)`` tuples; the base unit
+        is None for unknown or missing units, and unparsable values are
+        skipped.
+    """
+    nutri = entry.get("recipe", {}).get("nutrition", {}) or {}
+    out = []
+    for metric, val in nutri.items():
+        value, unit = parse_amount(val)
+        if value is not None:
+            base, factor = UNITS.get(unit, (None, 1.0))
+            out.append((metric, value * factor, base))
+    return out
+
+
+def _entry_ingredients(entry: dict) -> list:
+    """
+    Get the normalized ingredient names of one history entry.
+
+    :param entry: The history entry.
+    :return: A list of stripped, lowercased ingredient names.
+    """
+    out = []
+    for ing in entry.get("recipe", {}).get("ingredients", []):
+        if isinstance(ing, dict):
+            ing = ing.get("item", ing.get("name", str(ing)))
+        out.append(str(ing).strip().lower())
+    return out
+
+
+def _bump(counter: dict, key, delta: int):
+    """
+    Add ``delta`` to a counter, dropping keys that reach zero.
+
+    :param counter: The counter to update.
+    :param key: The key to update.
+    :param delta: The amount to add.
+    """
+    count = counter.get(key, 0) + delta
+    if count > 0:
+        counter[key] = count
+    else:
+        counter.pop(key, None)
+
+
+def _quantile(values: list, total: int, q: float) -> float:
+    """
+    Compute a quantile of a value histogram with linear interpolation,
+    matching ``numpy.quantile``'s default method.
+
+    :param values: ``(value, count)`` pairs sorted by value.
+    :param total: The sum of all counts.
+    :param q: The quantile, between 0 and 1.
+    :return: The interpolated quantile.
+    """
+    pos = (total - 1) * q
+    lo_rank, hi_rank = math.floor(pos), math.ceil(pos)
+    lo = hi = None
+    seen = 0
+    for value, count in values:
+        seen += count
+        if lo is None and seen > lo_rank:
+            lo = value
+        if seen > hi_rank:
+            hi = value
+            break
+    return lo + (hi - lo) * (pos - lo_rank)
+
+
+class Rollups:
+    """
+    Aggregates over the recipe history that are kept up to date as entries
+    are saved and deleted, so the analytics page never rescans the history.
+
+    Nutrition values are kept as one value histogram per metric, which
+    makes deletes exact and still yields quartiles for the box plots.
+    Values are converted to their canonical unit, and a counter per metric
+    of those units names the unit the metric is charted in. Daily recipe
+    counts and ingredient frequencies are plain counters.
+    """
+
+    def __init__(self, data=None):
+        """
+        Initialize the rollups, optionally from a ``to_dict`` snapshot.
+
+        :param data: A dict previously produced by ``to_dict``.
+        """
+        data = data or {}
+        self.recipes = data.get("recipes", 0)
+        self.nutrition = {
+            metric: dict(hist) for metric, hist in data.get("nutrition", {}).items()
+        }
+        self.daily = dict(data.get("daily", {}))
+        self.ingredients = dict(data.get("ingredients", {}))
+        self.units = {
+            metric: dict(counts) for metric, counts in data.get("units", {}).items()
+        }
+
+    @staticmethod
+    def is_current(data) -> bool:
+        """
+        Check whether a stored snapshot has every aggregate this version
+        keeps; older snapshots have to be rebuilt from the history.
+
+        :param data: A dict previously produced by ``to_dict``.
+        :return: True if the snapshot can be used as is.
+        """
+        return isinstance(data, dict) and "units" in data
+
+    @classmethod
+    def from_history(cls, history) -> "Rollups":
+        """
+        Build the rollups from scratch.
+
+        :param history: An iterable of history entries.
+        :return: The rollups of every entry.
+        """
+        rollups = cls()
+        for entry in history:
+            rollups.add(entry)
+        return rollups
+
+    def add(self, entry: dict):
+        """
+        Account for a newly saved entry.
+
+        :param entry: The history entry.
+        """
+        self._apply(entry, 1)
+
+    def add_many(self, entries: list):
+        """
+        Account for a batch of newly saved entries at once. Nutrition values
+        and timestamps are parsed with the vectorized helpers of
+        ``utils.nutrition``, which give the same results as ``add`` per entry.
+
+        :param entries: The history entries.
+        """
+        from utils.nutrition import nutrition_table, parse_timestamps
+
+        self.recipes += len(entries)
+        table = nutrition_table(entries)
+        counts = table.groupby(["metric", "amount"], sort=False).size()
+        for (metric, amount), count in counts.items():
+            _bump(self.nutrition.setdefault(metric, {}), repr(float(amount)), count)
+        units = table.groupby(["metric", "base_unit"], sort=False).size()
+        for (metric, base), count in units.items():
+            _bump(self.units.setdefault(metric, {}), base, count)
+        days = parse_timestamps([e.get("timestamp", "") for e in entries]).dropna()
+        for day, count in days.dt.strftime("%Y-%m-%d").value_counts().items():
+            _bump(self.daily, day, count)
+        for entry in entries:
+            for ing in _entry_ingredients(entry):
+                _bump(self.ingredients, ing, 1)
+
+    def remove(self, entry: dict):
+        """
+        Retract a deleted entry.
+
+        :param entry: The history entry.
+        """
+        self._apply(entry, -1)
+
+    def _apply(self, entry: dict, sign: int):
+        """
+        Add or subtract one entry's contribution to every aggregate.
+
+        :param entry: The history entry.
+        :param sign: 1 to add the entry, -1 to remove it.
+        """
+        self.recipes = max(self.recipes + sign, 0)
+        for metric, value, base in _nutrition_values(entry):
+            hist = self.nutrition.setdefault(metric, {})
+            _bump(hist, repr(value), sign)
+            if not hist:
+                del self.nutrition[metric]
+            if base is not None:
+                units = self.units.setdefault(metric, {})
+                _bump(units, base, sign)
+                if not units:
+                    del self.units[metric]
+        day = parse_timestamp(entry.get("timestamp", ""))
+        if day is not None:
+            _bump(self.daily, day.date().isoformat(), sign)
+        for ing in _entry_ingredients(entry):
+            _bump(self.ingredients, ing, sign)
+
+    def to_dict(self) -> dict:
+        """
+        Serialize the rollups to a JSON-compatible dict.
+
+        :return: The snapshot dict.
+        """
+        return {
+            "recipes": self.recipes,
+            "nutrition": self.nutrition,
+            "daily": self.daily,
+            "ingredients": self.ingredients,
+            "units": self.units,
+        }
+
+    def nutrition_summary(self) -> list:
+        """
+        Summarize each nutrition metric for a box plot.
+
+        :return: One dict per metric with ``metric``, ``unit`` (the most
+            common canonical unit, or None if no value had a known unit),
+            ``count``, ``mean``, ``min``, ``q1``, ``median``, ``q3`` and ``max``.
+        """
+        rows = []
+        for metric, hist in sorted(self.nutrition.items()):
+            values = sorted((float(v), c) for v, c in hist.items())
+            total = sum(c for _, c in values)
+            units = self.units.get(metric, {})
+            rows.append(
+                {
+                    "metric": metric,
+                    "unit": max(sorted(units), key=units.get) if units else None,
+                    "count": total,
+                    "mean": sum(v * c for v, c in values) / total,
+                    "min": values[0][0],
+                    "q1": _quantile(values, total, 0.25),
+                    "median": _quantile(values, total, 0.5),
+                    "q3": _quantile(values, total, 0.75),
+                    "max": values[-1][0],
+                }
+            )
+        return rows
+
+    def daily_counts(self) -> list:
+        """
+        Get the number of recipes saved per day.
+
+        :return: ``(iso_date, count)`` pairs in date order.
+        """
+        return sorted(self.daily.items())
+
+    def top_ingredients(self, n: int = 10) -> list:
+        """
+        Get the most frequently used ingredients.
+
+        :param n: The number of ingredients to return.
+        :return: ``(ingredient, count)`` pairs, most frequent first.
+        """
+        return Counter(self.ingredients).most_common(n)
+
+
+def metric_label(row: dict) -> str:
+    """
+    Name a nutrition metric together with the unit its values are in.
+
+    :param row: A row of ``Rollups.nutrition_summary``.
+    :return: E.g. ``"Sodium (g)"``, or just the metric without a known unit.
+    """
+    return f"{row['metric']} ({row['unit']})" if row.get("unit") else row["metric"]
+
+
+def chart_frames(rollups: Rollups, top: int = 10) -> dict:
+    """
+    Prepare the DataFrames behind the analytics page's charts.
+
+    :param rollups: The rollups of the history.
+    :param top: The number of ingredients to chart.
+    :return: A dict with the ``nutrition`` summary, the ``daily`` counts and
+        the ``ingredients`` frequencies; each is None when there is no data.
+        The nutrition summary gets a ``label`` column naming each metric's
+        unit, e.g. ``"Sodium (g)"``.
+    """
+    import pandas as pd
+
+    frames = {"nutrition": None, "daily": None, "ingredients": None}
+    summary = rollups.nutrition_summary()
+    if summary:
+        df_nutri = pd.DataFrame(summary)
+        df_nutri["label"] = [metric_label(row) for row in summary]
+        frames["nutrition"] = df_nutri
+    daily = rollups.daily_counts()
+    if daily:
+        df_time = pd.DataFrame(daily, columns=["date", "count"])
+        df_time["date"] = pd.to_datetime(df_time["date"])
+        frames["daily"] = df_time
+    counts = rollups.top_ingredients(top)
+    if counts:
+        frames["ingredients"] = pd.DataFrame(
+            counts, columns=["ingredient", "frequency"]
+        )
+    return frames
@@ -0,0 +1,260 @@
+import atexit
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+# Seconds between writes of the hit/miss counts and access times that
+# lookups collect in memory
+FLUSH_INTERVAL = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    value     TEXT NOT NULL,
+    created   REAL NOT NULL,
+    accessed  REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (namespace, accessed);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    namespace TEXT PRIMARY KEY,
+    hits      INTEGER NOT NULL DEFAULT 0,
+    misses    INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def cache_key(*parts) -> str:
+    """
+    Build a stable cache key from JSON-serializable parts.
+
+    :param parts: The values identifying the cached item.
+    :return: A hex SHA-256 digest of the canonical JSON encoding.
+    """
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """
+    Persistent key/value cache stored in SQLite.
+
+    The database file can be shared by every server process on a host.
+    Entries expire ``ttl`` seconds after they were written, and once a
+    namespace holds more than ``max_entries`` items the least recently
+    used ones are evicted. Hit and miss counts are kept in the database
+    too, so they add up across processes and restarts.
+
+    Lookups only read the database. The hit and miss counts and the access
+    times they produce are collected in memory and written in one
+    transaction every ``FLUSH_INTERVAL`` seconds, on every ``set`` (before
+    it evicts) and at exit, so readers never queue on the write lock.
+    """
+
+    def __init__(
+        self, path="pantrypal_cache.db", namespace="default", ttl=None, max_entries=None
+    ):
+        """
+        Initialize the cache.
+
+        :param path: The path to the SQLite database file.
+        :param namespace: The namespace isolating this cache's keys.
+        :param ttl: The time-to-live in seconds, or None to never expire.
+        :param max_entries: The maximum number of entries, or None for no bound.
+        """
+        self.path = Path(path)
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+        self._touched = {}
+        self._flushed = time.monotonic()
+        atexit.register(self._flush_at_exit)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection to the database.
+        Connections are short-lived so the cache can be shared across threads.
+
+        :return: The SQLite connection.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _expired(self, created: float, now: float) -> bool:
+        """
+        Check whether an entry written at ``created`` has outlived the TTL.
+
+        :param created: The time the entry was written.
+        :param now: The current time.
+        :return: True if the entry is expired.
+        """
+        return self.ttl is not None and now - created > self.ttl
+
+    def _write_pending(self, conn: sqlite3.Connection):
+        """
+        Write the lookups collected since the last flush.
+
+        :param conn: The connection whose transaction records them.
+        """
+        with self._lock:
+            hits, misses, touched = self._hits, self._misses, self._touched
+            self._hits = self._misses = 0
+            self._touched = {}
+            self._flushed = time.monotonic()
+        if hits or misses:
+            conn.execute(
+                "INSERT INTO cache_stats (namespace, hits, misses) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace) DO UPDATE SET "
+                "hits = hits + excluded.hits, misses = misses + excluded.misses",
+                (self.namespace, hits, misses),
+            )
+        if touched:
+            conn.executemany(
+                "UPDATE cache SET accessed = max(accessed, ?) "
+                "WHERE namespace = ? AND key = ?",
+                [(when, self.namespace, key) for key, when in touched.items()],
+            )
+
+    def flush(self):
+        """
+        Write the hit and miss counts and access times collected in memory.
+        """
+        with self._lock:
+            if not (self._hits or self._misses or self._touched):
+                return
+        with closing(self._connect()) as conn, conn:
+            self._write_pending(conn)
+
+    def _flush_at_exit(self):
+        """
+        Flush on interpreter exit, when the database may already be gone.
+        """
+        try:
+            self.flush()
+        except sqlite3.Error:
+            pass
+
+    def get(self, key: str, default=None):
+        """
+        Look up a cached value and mark it as recently used.
+        Expired entries are left for the next ``set`` to purge.
+
+        :param key: The cache key.
+        :param default: The value to return on a miss.
+        :return: The cached value, or ``default`` if missing or expired.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value, created FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        hit = row is not None and not self._expired(row[1], now)
+        with self._lock:
+            if hit:
+                self._hits += 1
+                self._touched[key] = now
+            else:
+                self._misses += 1
+            due = time.monotonic() - self._flushed >= FLUSH_INTERVAL
+        if due:
+            self.flush()
+        return json.loads(row[0]) if hit else default
+
+    def set(self, key: str, value):
+        """
+        Store a value, then evict expired and least recently used entries.
+
+        :param key: The cache key.
+        :param value: The JSON-serializable value to store.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            # Recent lookups must count as uses before anything is evicted
+            self._write_pending(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), now, now),
+            )
+            if self.ttl is not None:
+                conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND created < ?",
+                    (self.namespace, now - self.ttl),
+                )
+            if self.max_entries is not None:
+                conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                    "  SELECT key FROM cache WHERE namespace = ?"
+                    "  ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.namespace, self.namespace, self.max_entries),
+                )
+
+    def delete(self, key: str):
+        """
+        Remove a single entry.
+
+        :param key: The cache key.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+
+    def delete_values(self, values):
+        """
+        Remove every entry holding one of the given values.
+
+        :param values: The JSON-serializable values to remove.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "DELETE FROM cache WHERE namespace = ? AND value = ?",
+                [(self.namespace, json.dumps(value)) for value in values],
+            )
+
+    def stats(self) -> dict:
+        """
+        Report the lookups recorded for this cache's namespace.
+
+        :return: A dict with ``hits``, ``misses`` and ``entries``.
+        """
+        self.flush()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT hits, misses FROM cache_stats WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()
+        hits, misses = row or (0, 0)
+        return {"hits": hits, "misses": misses, "entries": len(self)}
+
+    def clear(self):
+        """
+        Remove every entry in this cache's namespace.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def __len__(self) -> int:
+        """
+        Count the entries in this cache's namespace, including expired ones
+        that have not been purged yet.
+
+        :return: The number of entries.
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
@@ -0,0 +1,83 @@
+import threading
+
+from utils.cache import DiskCache
+from utils.genai_client import GenAIRecipeGenerator
+from utils.image_cache import ImageCache
+from utils.image_fetcher import UnsplashImageFetcher
+
+# Streamlit re-executes app.py on every interaction, so anything built at the
+# top of the script is rebuilt per rerun. These instances live for the whole
+# server process instead and are shared by all sessions and threads.
+_instances = {}
+_lock = threading.Lock()
+
+
+def _shared(key: tuple, factory):
+    """
+    Return the process-wide instance for ``key``, building it on first use.
+
+    :param key: The identity of the instance.
+    :param factory: A callable building the instance.
+    :return: The shared instance.
+    """
+    with _lock:
+        if key not in _instances:
+            _instances[key] = factory()
+        return _instances[key]
+
+
+def get_cache(path, namespace: str, ttl=None, max_entries=None) -> DiskCache:
+    """
+    Get the shared DiskCache for a database file and namespace.
+
+    :param path: The path to the SQLite database file.
+    :param namespace: The cache namespace.
+    :param ttl: The time-to-live in seconds, or None to never expire.
+    :param max_entries: The maximum number of entries, or None for no bound.
+    :return: The shared DiskCache.
+    """
+    return _shared(
+        ("cache", str(path), namespace, ttl, max_entries),
+        lambda: DiskCache(path, namespace=namespace, ttl=ttl, max_entries=max_entries),
+    )
+
+
+def get_recipe_generator(
+    api_key: str, cache=None, substitutions=None
+) -> GenAIRecipeGenerator:
+    """
+    Get the shared GenAIRecipeGenerator (and its pooled HTTP client) for an API key.
+
+    :param api_key: API key for Google GenAI.
+    :param cache: Optional DiskCache for generated recipes.
+    :param substitutions: Optional DiskCache used as the substitution table.
+    :return: The shared generator.
+    """
+    return _shared(
+        ("genai", api_key, id(cache), id(substitutions)),
+        lambda: GenAIRecipeGenerator(api_key, cache=cache, substitutions=substitutions),
+    )
+
+
+def get_image_fetcher(access_key: str, cache=None) -> UnsplashImageFetcher:
+    """
+    Get the shared UnsplashImageFetcher (and its HTTP session) for an access key.
+
+    :param access_key: The access key for Unsplash API.
+    :param cache: Optional DiskCache for search results.
+    :return: The shared fetcher.
+    """
+    return _shared(
+        ("unsplash", access_key, id(cache)),
+        lambda: UnsplashImageFetcher(access_key, cache=cache),
+    )
+
+
+def get_image_cache(root) -> ImageCache:
+    """
+    Get the shared ImageCache for a cache directory.
+
+    :param root: The directory holding cached images.
+    :return: The shared ImageCache.
+    """
+    return _shared(("images", str(root)), lambda: ImageCache(root))
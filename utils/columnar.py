@@ -0,0 +1,479 @@
+import json
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.analytics import Rollups
+from utils.fileio import FileLock, atomic_write
+from utils.ingredients import canonicalize
+from utils.nutrition import UNITS, parse_amount, parse_timestamp
+
+# One table per kind of row; every table is keyed by the history entry ID
+SCHEMAS = {
+    "recipes": pa.schema(
+        [
+            ("entry_id", pa.string()),
+            ("timestamp", pa.timestamp("us")),
+            ("name", pa.string()),
+            ("image_url", pa.string()),
+            ("ingredients", pa.int32()),
+            ("instructions", pa.int32()),
+        ]
+    ),
+    "ingredients": pa.schema(
+        [
+            ("entry_id", pa.string()),
+            ("position", pa.int32()),
+            ("ingredient", pa.string()),
+            ("amount", pa.string()),
+            ("canonical", pa.string()),
+        ]
+    ),
+    "nutrition": pa.schema(
+        [
+            ("entry_id", pa.string()),
+            ("metric", pa.string()),
+            ("raw", pa.string()),
+            ("value", pa.float64()),
+            ("unit", pa.string()),
+            ("amount", pa.float64()),
+            ("base_unit", pa.string()),
+        ]
+    ),
+    "substitutions": pa.schema(
+        [
+            ("entry_id", pa.string()),
+            ("ingredient", pa.string()),
+            ("substitute", pa.string()),
+            ("rank", pa.int32()),
+        ]
+    ),
+}
+
+
+def _ingredient_text(ing) -> str:
+    """
+    Get the text of one recipe ingredient, as the analytics rollups see it.
+
+    :param ing: The ingredient, either a string or an ``{"item", "amount"}`` dict.
+    :return: The ingredient text.
+    """
+    if isinstance(ing, dict):
+        return str(ing.get("item", ing.get("name", str(ing))))
+    return str(ing)
+
+
+def _substitution_rows(substitutions) -> list:
+    """
+    Flatten an entry's substitutions, stored either as a mapping or as a
+    list of ``{"ingredient", "substitutes"}`` dicts.
+
+    :param substitutions: The stored substitutions.
+    :return: ``(ingredient, substitute, rank)`` tuples.
+    """
+    if isinstance(substitutions, dict):
+        pairs = substitutions.items()
+    elif isinstance(substitutions, list):
+        pairs = [
+            (
+                s.get("ingredient") or s.get("item") or "Unknown",
+                s.get("substitutes") or s.get("subs") or [],
+            )
+            for s in substitutions
+            if isinstance(s, dict)
+        ]
+    else:
+        return []
+    return [
+        (str(ing), str(sub), rank)
+        for ing, subs in pairs
+        if isinstance(subs, list)
+        for rank, sub in enumerate(subs)
+    ]
+
+
+def flatten(entry: dict) -> dict:
+    """
+    Split one history entry into rows of the columnar tables.
+
+    :param entry: The history entry.
+    :return: A dict mapping each table name to a list of row tuples, in
+        the column order of ``SCHEMAS``.
+    """
+    eid = entry.get("id")
+    recipe = entry.get("recipe", {}) or {}
+    ings = recipe.get("ingredients", []) or []
+    rows = {name: [] for name in SCHEMAS}
+    rows["recipes"].append(
+        (
+            eid,
+            parse_timestamp(entry.get("timestamp", "")),
+            recipe.get("name"),
+            entry.get("image_url") or None,
+            len(ings),
+            len(recipe.get("instructions", []) or []),
+        )
+    )
+    for pos, ing in enumerate(ings):
+        text = _ingredient_text(ing)
+        amount = ing.get("amount") if isinstance(ing, dict) else None
+        rows["ingredients"].append(
+            (
+                eid,
+                pos,
+                text,
+                None if amount is None else str(amount),
+                canonicalize(text),
+            )
+        )
+    for metric, raw in (recipe.get("nutrition", {}) or {}).items():
+        value, unit = parse_amount(raw)
+        base, factor = UNITS.get(unit, (None, 1.0))
+        rows["nutrition"].append(
+            (
+                eid,
+                metric,
+                str(raw),
+                value,
+                unit,
+                None if value is None else value * factor,
+                base,
+            )
+        )
+    for ing, sub, rank in _substitution_rows(entry.get("substitutions")):
+        rows["substitutions"].append((eid, ing, sub, rank))
+    return rows
+
+
+class _PartWriter:
+    """
+    Writes one part of every table, flushing a record batch per
+    ``batch_size`` entries so memory stays bounded. Files are written
+    under a temporary name and only renamed into place by ``commit``.
+    """
+
+    def __init__(self, root: Path, part: str, batch_size: int):
+        self.batch_size = batch_size
+        self.entries = 0
+        self._paths = {name: root / name / f"{part}.arrow" for name in SCHEMAS}
+        self._rows = {name: [] for name in SCHEMAS}
+        self._sinks, self._writers = {}, {}
+        for name, path in self._paths.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._sinks[name] = pa.OSFile(f"{path}.tmp", "wb")
+            self._writers[name] = pa.ipc.new_file(self._sinks[name], SCHEMAS[name])
+
+    def add(self, entry: dict):
+        """
+        Buffer the rows of one entry.
+
+        :param entry: The history entry.
+        """
+        for name, rows in flatten(entry).items():
+            self._rows[name].extend(rows)
+        self.entries += 1
+        if self.entries % self.batch_size == 0:
+            self._flush()
+
+    def _flush(self):
+        """
+        Write the buffered rows as one record batch per table.
+        """
+        for name, rows in self._rows.items():
+            if rows:
+                columns = list(zip(*rows))
+                batch = pa.RecordBatch.from_arrays(
+                    [
+                        pa.array(col, type=f.type)
+                        for col, f in zip(columns, SCHEMAS[name])
+                    ],
+                    schema=SCHEMAS[name],
+                )
+                self._writers[name].write_batch(batch)
+            self._rows[name] = []
+
+    def _close(self):
+        """
+        Close every writer and its file.
+        """
+        for name in SCHEMAS:
+            self._writers[name].close()
+            self._sinks[name].close()
+
+    def commit(self) -> bool:
+        """
+        Finish the part.
+
+        :return: True if the part holds entries and was renamed into place;
+            an empty part is discarded.
+        """
+        self._flush()
+        self._close()
+        for path in self._paths.values():
+            if self.entries:
+                os.replace(f"{path}.tmp", path)
+            else:
+                os.unlink(f"{path}.tmp")
+        return bool(self.entries)
+
+    def abort(self):
+        """
+        Discard the part.
+        """
+        self._close()
+        for path in self._paths.values():
+            os.unlink(f"{path}.tmp")
+
+
+class ColumnarExport:
+    """
+    Columnar copy of the recipe history for analytics.
+
+    Each history entry is flattened into the ``recipes``, ``ingredients``,
+    ``nutrition`` and ``substitutions`` tables. Every ``update`` appends one
+    Arrow IPC part per table holding only the entries exported since the
+    last update, and a small ``export.json`` lists the committed parts.
+    Once there are more than ``max_parts`` parts they are merged into one.
+    The uncompressed IPC files are memory-mapped when read, so tables are
+    never parsed or copied into the heap. The rollups of the exported
+    entries are computed once per update and cached in ``export.json``.
+
+    Only ``update`` writes; opening an export and reading from it never
+    creates files, and reading an export that does not exist raises.
+    """
+
+    STATE = "export.json"
+
+    def __init__(self, root, batch_size: int = 10000, max_parts: int = 16):
+        """
+        Point at an export directory; nothing is created until ``update``.
+
+        :param root: The directory holding the export.
+        :param batch_size: The number of entries per record batch.
+        :param max_parts: The number of parts beyond which they are merged.
+        """
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.max_parts = max_parts
+        self._state_path = self.root / self.STATE
+
+    def _read_state(self) -> dict:
+        """
+        Read the list of committed parts.
+
+        :return: The state dict with ``parts`` and ``next_part``.
+        """
+        try:
+            return json.loads(self._state_path.read_text())
+        except FileNotFoundError:
+            return {"parts": [], "next_part": 0}
+
+    def _committed_state(self) -> dict:
+        """
+        Read the list of committed parts of an export that must exist.
+
+        :return: The state dict.
+        :raises FileNotFoundError: If nothing was ever exported to ``root``.
+        """
+        if not self._state_path.exists():
+            raise FileNotFoundError(f"no columnar export in {self.root}")
+        return self._read_state()
+
+    def exists(self) -> bool:
+        """
+        Check whether anything has been exported yet.
+
+        :return: True if at least one part is committed.
+        """
+        return bool(self._read_state()["parts"])
+
+    def table(self, name: str, parts=None) -> pa.Table:
+        """
+        Read one table by memory-mapping its committed parts.
+
+        :param name: A key of ``SCHEMAS``.
+        :param parts: The parts to read; defaults to the committed parts.
+        :return: The table, backed by the mapped files.
+        :raises FileNotFoundError: If the export does not exist.
+        """
+        if parts is None:
+            parts = self._committed_state()["parts"]
+        tables = [
+            pa.ipc.open_file(
+                pa.memory_map(str(self.root / name / f"{p}.arrow"))
+            ).read_all()
+            for p in parts
+        ]
+        if not tables:
+            return SCHEMAS[name].empty_table()
+        return pa.concat_tables(tables)
+
+    def _write_part(self, state: dict, entries):
+        """
+        Write a new part holding the given entries.
+
+        :param state: The export state; its ``next_part`` is advanced.
+        :param entries: The entries to write.
+        :return: A ``(part, count)`` tuple; the part is None if it was empty.
+        """
+        part = f"part-{state['next_part']:05d}"
+        state["next_part"] += 1
+        writer = _PartWriter(self.root, part, self.batch_size)
+        try:
+            for entry in entries:
+                writer.add(entry)
+        except BaseException:
+            writer.abort()
+            raise
+        return (part if writer.commit() else None), writer.entries
+
+    def _merge_parts(self, state: dict, parts: list) -> str:
+        """
+        Merge committed parts into a new part, copying record batches
+        from the mapped files without flattening the entries again.
+
+        :param state: The export state; its ``next_part`` is advanced.
+        :param parts: The parts to merge.
+        :return: The name of the merged part.
+        """
+        part = f"part-{state['next_part']:05d}"
+        state["next_part"] += 1
+        paths = {name: self.root / name / f"{part}.arrow" for name in SCHEMAS}
+        for name, path in paths.items():
+            table = self.table(name, parts)
+            with pa.OSFile(f"{path}.tmp", "wb") as sink:
+                with pa.ipc.new_file(sink, SCHEMAS[name]) as writer:
+                    for batch in table.to_batches(max_chunksize=self.batch_size):
+                        writer.write_batch(batch)
+        for path in paths.values():
+            os.replace(f"{path}.tmp", path)
+        return part
+
+    def _remove(self, parts):
+        """
+        Delete the files of parts that are no longer committed.
+
+        :param parts: The part names.
+        """
+        for part in parts:
+            for name in SCHEMAS:
+                (self.root / name / f"{part}.arrow").unlink(missing_ok=True)
+
+    def update(self, storage) -> tuple:
+        """
+        Append the entries saved since the last update.
+        If entries were deleted from the history in the meantime, the old
+        parts hold stale rows, so everything is exported again instead.
+
+        :param storage: A storage object exposing ``iter_history``.
+        :return: An ``(added, rewritten)`` tuple: the number of entries
+            exported for the first time, and the number of previously
+            exported entries written again because of deletions.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with FileLock(self._state_path):
+            state = self._read_state()
+            known = set(self.table("recipes", state["parts"])["entry_id"].to_pylist())
+            added = kept = 0
+
+            def tally(entries, keep_known: bool):
+                nonlocal added, kept
+                added = kept = 0
+                for entry in entries:
+                    if entry.get("id") not in known:
+                        added += 1
+                        yield entry
+                    else:
+                        kept += 1
+                        if keep_known:
+                            yield entry
+
+            parts, stale = list(state["parts"]), []
+            part, _ = self._write_part(state, tally(storage.iter_history(), False))
+            rewritten = 0
+            if kept < len(known):
+                stale = parts + ([part] if part else [])
+                parts = []
+                entries = tally(storage.iter_history(), True)
+                part, _ = self._write_part(state, entries)
+                rewritten = kept
+            if part:
+                parts.append(part)
+            if len(parts) > self.max_parts:
+                stale += parts
+                parts = [self._merge_parts(state, parts)]
+            state = {
+                "parts": parts,
+                "next_part": state["next_part"],
+                "rollups": self._aggregate(parts).to_dict(),
+            }
+            atomic_write(self._state_path, json.dumps(state))
+            self._remove(stale)
+        return added, rewritten
+
+    def rollups(self) -> Rollups:
+        """
+        Get the same rollups the storage backends maintain, as cached by the
+        last ``update``, without touching the JSON history. Exports written
+        before the current rollups were cached are aggregated from their
+        tables.
+
+        :return: The rollups of every exported entry.
+        :raises FileNotFoundError: If the export does not exist.
+        """
+        state = self._committed_state()
+        if Rollups.is_current(state.get("rollups")):
+            return Rollups(state["rollups"])
+        return self._aggregate(state["parts"])
+
+    def _aggregate(self, parts: list) -> Rollups:
+        """
+        Aggregate the tables of some parts into rollups.
+
+        :param parts: The parts to aggregate.
+        :return: The rollups of the entries in those parts.
+        """
+        recipes = self.table("recipes", parts)
+        data = {"recipes": recipes.num_rows, "nutrition": {}}
+        days = pc.strftime(pc.drop_null(recipes["timestamp"]), format="%Y-%m-%d")
+        data["daily"] = _counts(days)
+        names = self.table("ingredients", parts)["ingredient"]
+        data["ingredients"] = _counts(pc.utf8_lower(pc.utf8_trim_whitespace(names)))
+        nutrition = self.table("nutrition", parts)
+        nutrition = nutrition.filter(pc.is_valid(pc.field("amount")))
+        grouped = nutrition.group_by(["metric", "amount"]).aggregate(
+            [("amount", "count")]
+        )
+        for metric, amount, count in zip(
+            grouped["metric"].to_pylist(),
+            grouped["amount"].to_pylist(),
+            grouped["amount_count"].to_pylist(),
+        ):
+            data["nutrition"].setdefault(metric, {})[repr(float(amount))] = count
+        data["units"] = {}
+        units = nutrition.filter(pc.is_valid(pc.field("base_unit")))
+        grouped = units.group_by(["metric", "base_unit"]).aggregate(
+            [("base_unit", "count")]
+        )
+        for metric, base, count in zip(
+            grouped["metric"].to_pylist(),
+            grouped["base_unit"].to_pylist(),
+            grouped["base_unit_count"].to_pylist(),
+        ):
+            data["units"].setdefault(metric, {})[base] = count
+        return Rollups(data)
+
+
+def _counts(values) -> dict:
+    """
+    Count the occurrences of each value of an Arrow array.
+
+    :param values: The values.
+    :return: A dict mapping each value to its count.
+    """
+    counts = pc.value_counts(values)
+    return dict(
+        zip(counts.field("values").to_pylist(), counts.field("counts").to_pylist())
+    )
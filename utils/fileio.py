@@ -0,0 +1,208 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None
+
+
+class FileLock:
+    """
+    Advisory inter-process lock held on a ``<path>.lock`` sidecar file.
+
+    The lock file is separate from the data file so the data file can be
+    swapped out with an atomic rename while the lock is held. On platforms
+    without ``fcntl`` the lock only serializes threads of this process.
+    """
+
+    _thread_locks = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path):
+        """
+        Initialize the lock for the given data file.
+
+        :param path: The path of the file being protected.
+        """
+        self.lock_path = Path(f"{path}.lock")
+        key = str(self.lock_path.resolve())
+        with self._registry_lock:
+            self._thread_lock = self._thread_locks.setdefault(key, threading.Lock())
+        self._fd = None
+
+    def __enter__(self):
+        # flock is per open file description, so threads of one process
+        # also need to be serialized with a regular lock.
+        self._thread_lock.acquire()
+        try:
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._release()
+
+    def _release(self):
+        """
+        Release the file lock and the thread lock.
+        """
+        if self._fd is not None:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+def atomic_write(path, data):
+    """
+    Durably replace a file's contents.
+    The data is written to a temporary file in the same directory, fsynced
+    and renamed over the target, so readers never see a partial file.
+
+    :param path: The path of the file to write.
+    :param data: The text or bytes to write.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if isinstance(data, bytes):
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", encoding="utf-8")
+        with f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    fsync_dir(path.parent)
+
+
+def fsync_dir(directory):
+    """
+    Flush a directory entry so that a rename inside it survives a crash.
+    This is a no-op where directories cannot be opened (e.g. Windows).
+
+    :param directory: The directory to flush.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class _Pending:
+    """
+    A single operation waiting for the next group commit.
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class GroupCommit:
+    """
+    Coalesce concurrent writes to one file into a single commit.
+
+    Callers hand a payload to ``submit``. The first caller becomes the
+    leader and passes every payload queued so far to ``commit`` in one
+    batch, so writers arriving together share one lock acquisition and one
+    fsync. The other callers simply wait for their result.
+    """
+
+    def __init__(self, commit):
+        """
+        Initialize the committer.
+
+        :param commit: A callable taking a list of payloads and returning one
+            result per payload, or an exception instance for failed payloads.
+        """
+        self._commit = commit
+        self._mutex = threading.Lock()
+        self._queue = []
+        self._leader = False
+
+    def submit(self, payload):
+        """
+        Queue a payload and block until the batch containing it is committed.
+
+        :param payload: The operation to commit.
+        :return: The result the commit callable produced for this payload.
+        """
+        op = _Pending(payload)
+        with self._mutex:
+            self._queue.append(op)
+            lead = not self._leader
+            self._leader = True
+        if lead:
+            self._drain()
+        op.done.wait()
+        if op.error is not None:
+            raise op.error
+        return op.result
+
+    def _drain(self):
+        """
+        Commit queued batches until the queue is empty, then step down.
+        """
+        while True:
+            with self._mutex:
+                batch, self._queue = self._queue, []
+                if not batch:
+                    self._leader = False
+                    return
+            try:
+                results = self._commit([op.payload for op in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            for op, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    op.error = result
+                else:
+                    op.result = result
+                op.done.set()
+
+
+_committers = {}
+_committers_lock = threading.Lock()
+
+
+def group_commit_for(path, commit) -> GroupCommit:
+    """
+    Get the process-wide committer for a file, creating it on first use.
+    Every storage object pointing at the same file with the same kind of
+    commit shares one committer. Committers are keyed by the commit
+    function as well, so e.g. a ``Storage`` and a ``JournalStorage`` opened
+    on the same path (as during a migration) never receive each other's
+    payloads; the file lock still serializes their writes.
+
+    :param path: The path of the file being written.
+    :param commit: The commit callable used if a new committer is created;
+        for a ``functools.partial`` its underlying function is the kind.
+    :return: The shared GroupCommit.
+    """
+    key = (str(Path(path).resolve()), getattr(commit, "func", commit))
+    with _committers_lock:
+        if key not in _committers:
+            _committers[key] = GroupCommit(commit)
+        return _committers[key]
@@ -1,10 +1,23 @@
 import json
 import random
 import re
+import threading
 from datetime import datetime
 
-from google import genai
-from google.genai import types
+from utils.cache import cache_key
+from utils.ingredients import canonicalize
+from utils.json_stream import RecipeStreamParser
+
+
+def _substitution_key(ingredient) -> str:
+    """
+    Key an ingredient in the substitution table by its canonical name, so
+    "2 cloves garlic" and "Garlic" share one entry.
+
+    :param ingredient: The ingredient as written.
+    :return: The table key.
+    """
+    return canonicalize(ingredient) or str(ingredient).strip().lower()
 
 
 class GenAIRecipeGenerator:
@@ -12,23 +25,95 @@ class GenAIRecipeGenerator:
     Class to interact with the Google GenAI API for recipe generation and ingredient substitution.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache=None, substitutions=None):
         """
         Initialize the GenAI client with the provided API key.
 
         :param api_key: API key for Google GenAI.
+        :param cache: Optional DiskCache for generated recipes, shared across processes.
+        :param substitutions: Optional DiskCache used as a per-ingredient substitution table.
         """
-        self.client = genai.Client(api_key=api_key)
+        self.api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.cache = cache
+        self.substitutions = substitutions
 
-    def generate(self, ings, restrs, serves):
+    @property
+    def client(self):
         """
-        Generate a recipe based on the provided ingredients, dietary restrictions, and number of servings.
+        The google-genai client. It is built on first use, so the SDK is only
+        imported once a recipe is actually requested.
+        """
+        with self._client_lock:
+            if self._client is None:
+                import httpx
+                from google import genai
+                from google.genai import types
+
+                # Keep connections alive between calls; one instance is meant
+                # to be shared by every session (see utils.clients)
+                self._client = genai.Client(
+                    api_key=self.api_key,
+                    http_options=types.HttpOptions(
+                        client_args={
+                            "limits": httpx.Limits(
+                                max_connections=32,
+                                max_keepalive_connections=16,
+                                keepalive_expiry=120,
+                            )
+                        }
+                    ),
+                )
+            return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @staticmethod
+    def request_key(ings, restrs, serves) -> str:
+        """
+        Build the cache key for a recipe request.
+        Ingredients and restrictions are stripped, lowercased, de-duplicated
+        and sorted, so equivalent requests share one cache entry.
 
         :param ings: The list of ingredients.
         :param restrs: The list of dietary restrictions.
         :param serves: The number of servings.
-        :return: The generated recipe as a JSON object.
+        :return: The cache key.
+        """
+
+        def canon(items):
+            return sorted({i.strip().lower() for i in items if i.strip()})
+
+        return cache_key("recipe", canon(ings), canon(restrs), int(serves))
+
+    def _recipe_key(self, ings, restrs, serves):
+        """
+        Get the cache key for a recipe request, if it may be cached.
+        "Surprise me!" calls must stay random, so they are never cached.
+
+        :param ings: The list of ingredients.
+        :param restrs: The list of dietary restrictions.
+        :param serves: The number of servings.
+        :return: The cache key, or None if the cache must be bypassed.
+        """
+        if self.cache is None or not ings:
+            return None
+        return self.request_key(ings, restrs, serves)
+
+    def _recipe_request(self, ings, restrs, serves):
         """
+        Build the prompt and generation config for a recipe request.
+
+        :param ings: The list of ingredients.
+        :param restrs: The list of dietary restrictions.
+        :param serves: The number of servings.
+        :return: A ``(prompt, config)`` tuple.
+        """
+        from google.genai import types
+
         # Strict JSON‐only system prompt
         sys = (
             "You are a world-class chef AI.  "
@@ -96,28 +181,122 @@ class GenAIRecipeGenerator:
             "Output ONLY the JSON object."
         )
 
+        config = types.GenerateContentConfig(
+            system_instruction=sys,
+            temperature=temp,
+            top_p=top_p,
+            top_k=top_k,
+            max_output_tokens=8192,
+            response_mime_type="application/json",
+        )
+        return prompt, config
+
+    def generate(self, ings, restrs, serves):
+        """
+        Generate a recipe based on the provided ingredients, dietary restrictions, and number of servings.
+
+        :param ings: The list of ingredients.
+        :param restrs: The list of dietary restrictions.
+        :param serves: The number of servings.
+        :return: The generated recipe as a JSON object.
+        """
+        key = self._recipe_key(ings, restrs, serves)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        prompt, config = self._recipe_request(ings, restrs, serves)
         resp = self.client.models.generate_content(
-            model="gemini-2.0-flash-lite",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=sys,
-                temperature=temp,
-                top_p=top_p,
-                top_k=top_k,
-                max_output_tokens=8192,
-                response_mime_type="application/json",
-            ),
+            model="gemini-2.0-flash-lite", contents=prompt, config=config
         )
-        return json.loads(resp.text)
+        recipe = json.loads(resp.text)
+        if key:
+            self.cache.set(key, recipe)
+        return recipe
+
+    def generate_stream(self, ings, restrs, serves):
+        """
+        Generate a recipe while streaming partial results.
+        The response is parsed incrementally, so the name, each ingredient,
+        the complete ingredient list and each instruction are yielded as soon
+        as they are complete, followed by the full recipe once the stream ends.
+
+        :param ings: The list of ingredients.
+        :param restrs: The list of dietary restrictions.
+        :param serves: The number of servings.
+        :return: An iterator of ``(event, value)`` tuples, where event is
+            ``"name"``, ``"ingredient"``, ``"ingredients"``, ``"instruction"``
+            or finally ``"recipe"``.
+        """
+        key = self._recipe_key(ings, restrs, serves)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            yield "name", cached.get("name")
+            for ing in cached.get("ingredients", []):
+                yield "ingredient", ing
+            yield "ingredients", cached.get("ingredients", [])
+            for step in cached.get("instructions", []):
+                yield "instruction", step
+            yield "recipe", cached
+            return
+
+        prompt, config = self._recipe_request(ings, restrs, serves)
+        parser = RecipeStreamParser()
+        for chunk in self.client.models.generate_content_stream(
+            model="gemini-2.0-flash-lite", contents=prompt, config=config
+        ):
+            if chunk.text:
+                yield from parser.feed(chunk.text)
+        recipe = parser.close()
+        if key:
+            self.cache.set(key, recipe)
+        yield "recipe", recipe
 
     def get_substitutions(self, missing: list[str]) -> dict[str, list[str]]:
         """
         Generate a mapping of missing ingredients to their substitutes.
-        This method uses the GenAI API to find substitutes for missing ingredients.
+        Ingredients already in the substitution table are answered from it;
+        only the rest are sent to the GenAI API, and the answers are merged
+        back into the table. When nothing is new, no API call is made.
 
         :param missing: The list of missing ingredients.
         :return: The mapping of missing ingredients to their substitutes as a JSON object.
         """
+        if self.substitutions is None:
+            return self._request_substitutions(missing)
+
+        found, unknown = {}, []
+        for ing in missing:
+            subs = self.substitutions.get(_substitution_key(ing))
+            if subs is None:
+                unknown.append(ing)
+            else:
+                found[ing] = subs
+        if not unknown:
+            return found
+
+        fresh = {
+            _substitution_key(k): v
+            for k, v in self._request_substitutions(unknown).items()
+            if isinstance(v, list)
+        }
+        for name, subs in fresh.items():
+            self.substitutions.set(name, subs)
+        for ing in unknown:
+            if _substitution_key(ing) in fresh:
+                found[ing] = fresh[_substitution_key(ing)]
+        return {ing: found[ing] for ing in missing if ing in found}
+
+    def _request_substitutions(self, missing: list[str]) -> dict[str, list[str]]:
+        """
+        Ask the GenAI API for substitutes for the given ingredients.
+
+        :param missing: The list of missing ingredients.
+        :return: The mapping returned by the model, or an empty dict if unparseable.
+        """
+        from google.genai import types
+
         sys = (
             "You are a culinary expert.  "
             "Given a list of missing ingredients, output ONLY a valid JSON object "
@@ -0,0 +1,187 @@
+import json
+import re
+
+# Bytes or characters read per refill; a buffer never holds much more
+# than this plus the largest single entry
+CHUNK_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = re.compile(r"[\s,]*")
+_WHITESPACE = re.compile(r"\s*")
+
+
+def iter_json_array(f, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield the elements of a JSON array one at a time.
+
+    The file is read in chunks and each element is decoded as soon as it
+    is complete, so memory is bounded by the chunk size and the largest
+    element instead of the size of the file. A buffer that does not hold a
+    complete element yet is refilled with at least as much as it holds,
+    which keeps very large elements linear to decode.
+
+    :param f: A text file positioned at the start of the array.
+    :param chunk_size: The number of characters to read per refill.
+    :return: An iterator over the array elements.
+    :raises json.JSONDecodeError: If the array is malformed or truncated.
+    """
+    buf, pos, eof, started = "", 0, False, False
+    while True:
+        pos = _SEPARATORS.match(buf, pos).end()
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != "[":
+                    raise json.JSONDecodeError("Expecting '['", buf, pos)
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # Only a delimiter proves the value is complete: "45." may
+                # still be "45.5" once the next chunk arrives
+                after = _WHITESPACE.match(buf, end).end()
+                if after < len(buf) and buf[after] in ",]":
+                    yield value
+                    pos = after
+                    continue
+                if eof:
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buf, after)
+        elif eof:
+            if not started:
+                return
+            raise json.JSONDecodeError("Unterminated array", buf, pos)
+        chunk = f.read(max(chunk_size, len(buf) - pos))
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+
+def _is_tombstone_line(line: bytes, tombstone: str):
+    """
+    Decode a journal line if it is a tombstone.
+
+    :param line: The raw journal line.
+    :param tombstone: The ``op`` value that marks a deletion.
+    :return: The tombstone record, or None for entries and torn lines.
+    """
+    # Cheap pre-check so entries are not decoded twice
+    if b'"op"' not in line:
+        return None
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(record, dict) and record.get("op") == tombstone:
+        return record
+    return None
+
+
+def iter_journal(f, tombstone: str = "delete"):
+    """
+    Yield the live entries of a JSON Lines journal one at a time.
+
+    The first pass only remembers the line of the last tombstone for each
+    deleted ID, and the second yields every entry no later tombstone
+    deletes. Entries are always appended under a fresh ID, so memory is
+    bounded by the number of deletions rather than the size of the
+    journal. The second pass stops where the first ended, so records
+    appended in between are not half-applied. Torn lines are skipped.
+
+    :param f: The journal opened in binary mode.
+    :param tombstone: The ``op`` value that marks a deletion.
+    :return: An iterator over the live entries, oldest first.
+    """
+    deleted, end = {}, 0
+    f.seek(0)
+    for lineno, line in enumerate(f):
+        end += len(line)
+        record = _is_tombstone_line(line, tombstone)
+        if record is not None:
+            deleted[record.get("id")] = lineno
+    f.seek(0)
+    offset = 0
+    for lineno, line in enumerate(f):
+        if offset >= end:
+            return
+        offset += len(line)
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if record.get("op") == tombstone:
+            continue
+        if deleted.get(record.get("id"), -1) < lineno:
+            yield record
+
+
+def iter_tombstones(f, tombstone: str = "delete"):
+    """
+    Yield the IDs deleted by a JSON Lines journal.
+
+    :param f: The journal opened in binary mode.
+    :param tombstone: The ``op`` value that marks a deletion.
+    :return: An iterator over the deleted IDs, in journal order.
+    """
+    f.seek(0)
+    for line in f:
+        record = _is_tombstone_line(line, tombstone)
+        if record is not None:
+            yield record.get("id")
+
+
+def _iter_lines_reversed(f, chunk_size: int):
+    """
+    Yield the lines of a binary file from the last to the first.
+
+    :param f: The file opened in binary mode.
+    :param chunk_size: The number of bytes read per step.
+    :return: An iterator over the lines without their newlines, last first.
+    """
+    pos = f.seek(0, 2)
+    tail = b""
+    while pos > 0:
+        step = min(chunk_size, pos)
+        pos -= step
+        f.seek(pos)
+        lines = (f.read(step) + tail).split(b"\n")
+        tail = lines[0]
+        yield from reversed(lines[1:])
+    yield tail
+
+
+def iter_journal_reversed(f, tombstone: str = "delete", chunk_size: int = 1 << 16):
+    """
+    Yield the live entries of a JSON Lines journal, newest first.
+
+    The journal is read backwards from its current end, so a caller that
+    only needs the newest entries (a page, a recent entry) reads only the
+    tail of the file. A tombstone always follows the entry it deletes, so
+    it is seen first; memory is bounded by the number of deletions passed.
+    Torn lines are skipped.
+
+    :param f: The journal opened in binary mode.
+    :param tombstone: The ``op`` value that marks a deletion.
+    :param chunk_size: The number of bytes read per step.
+    :return: An iterator over the live entries, newest first.
+    """
+    deleted = set()
+    for line in _iter_lines_reversed(f, chunk_size):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        if record.get("op") == tombstone:
+            deleted.add(record.get("id"))
+        elif record.get("id") not in deleted:
+            yield record
@@ -0,0 +1,270 @@
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.cache import DiskCache
+from utils.fileio import atomic_write
+
+# Longest side in pixels for each stored variant
+VARIANTS = {"thumb": 400, "hero": 1280}
+# Bytes of image files kept before the least recently used are evicted
+MAX_BYTES = int(os.getenv("PANTRYPAL_IMAGE_CACHE_MB", 256)) << 20
+# URLs remembered by the URL-to-digest index
+MAX_URLS = 10000
+# Only images served from these hosts over HTTPS are ever downloaded; image
+# URLs come from history entries, which browser storage lets users edit
+ALLOWED_HOSTS = ("images.unsplash.com",)
+# Largest download accepted, in bytes
+MAX_DOWNLOAD_BYTES = 10 << 20
+# Largest decoded image accepted, in pixels
+MAX_PIXELS = 40_000_000
+
+# One download pool per server process, shared by every prefetch
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PANTRYPAL_IMAGE_WORKERS", 8)),
+    thread_name_prefix="pantrypal-img",
+)
+
+
+class ImageCache:
+    """
+    Local, content-addressed cache of resized recipe images.
+
+    Each remote image is downloaded once. Its bytes are hashed and every
+    variant is stored as ``<root>/<digest[:2]>/<digest>_<variant>.jpg``, so
+    the same picture reached through different URLs is stored only once.
+    A small URL-to-digest index lets later lookups skip the download.
+
+    Both are bounded: every hit refreshes the modification time of the
+    variant it returns, and once the stored files exceed ``max_bytes`` the
+    least recently used images are deleted together with the index rows
+    pointing at them. The index itself keeps at most ``max_urls`` URLs.
+    """
+
+    def __init__(
+        self,
+        root=".pantrypal_images",
+        pool_size: int = 8,
+        max_bytes: int = MAX_BYTES,
+        max_urls: int = MAX_URLS,
+    ):
+        """
+        Initialize the cache directory and its URL index.
+
+        :param root: The directory holding cached images.
+        :param pool_size: The maximum number of pooled connections.
+        :param max_bytes: The total size of image files to keep.
+        :param max_urls: The maximum number of URLs in the index.
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index = DiskCache(
+            self.root / "index.db", namespace="image_urls", max_entries=max_urls
+        )
+        self.max_bytes = max_bytes
+        self._warming = set()
+        self._warming_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.mount(
+            "https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        )
+
+    def _variant_path(self, digest: str, variant: str) -> Path:
+        """
+        Get the on-disk location of one variant.
+
+        :param digest: The SHA-256 digest of the original image bytes.
+        :param variant: The variant name.
+        :return: The path of the variant file.
+        """
+        return self.root / digest[:2] / f"{digest}_{variant}.jpg"
+
+    @staticmethod
+    def allowed(url: str) -> bool:
+        """
+        Check whether an image URL may be downloaded.
+
+        :param url: The remote image URL.
+        :return: True for HTTPS URLs on one of ``ALLOWED_HOSTS``.
+        """
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return False
+        return parts.scheme == "https" and parts.hostname in ALLOWED_HOSTS
+
+    def cached(self, url: str, variant: str = "thumb"):
+        """
+        Look up a stored variant without downloading anything.
+
+        :param url: The remote image URL.
+        :param variant: The variant to return, a key of ``VARIANTS``.
+        :return: The local file path, or None if it is not cached.
+        """
+        if not url or not self.allowed(url):
+            return None
+        digest = self.index.get(url)
+        if not digest:
+            return None
+        path = self._variant_path(digest, variant)
+        try:
+            # The modification time is the recency eviction goes by
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return str(path)
+
+    def variant(self, url: str, variant: str = "thumb") -> str:
+        """
+        Get a local, resized copy of an image, downloading it on first use.
+
+        :param url: The remote image URL.
+        :param variant: The variant to return, a key of ``VARIANTS``.
+        :return: The local file path, or the original URL if the image is not
+            on an allowed host or could not be downloaded or decoded.
+        """
+        if not url or not self.allowed(url):
+            return url
+        path = self.cached(url, variant)
+        if path:
+            return path
+        from PIL import Image
+
+        try:
+            digest = self._store(url)
+        except (requests.RequestException, OSError, Image.DecompressionBombError):
+            return url
+        return str(self._variant_path(digest, variant))
+
+    def prefetch(self, urls: list[str], variant: str = "thumb") -> list[str]:
+        """
+        Resolve several images concurrently, e.g. all options of the picker.
+
+        :param urls: The remote image URLs.
+        :param variant: The variant to return for each URL.
+        :return: The local paths (or original URLs on failure), in input order.
+        """
+        return list(_executor.map(lambda u: self.variant(u, variant), urls))
+
+    def resolve(self, urls: list[str], variant: str = "thumb") -> list[str]:
+        """
+        Resolve images without waiting on the network: cached variants are
+        returned right away, and every other URL is returned unchanged and
+        downloaded in the background so a later rerun finds it cached.
+
+        :param urls: The remote image URLs.
+        :param variant: The variant to return for each URL.
+        :return: The local paths or original URLs, in input order.
+        """
+        out = []
+        for url in urls:
+            path = self.cached(url, variant)
+            if path is None and url and self.allowed(url):
+                self._warm(url)
+            out.append(path or url)
+        return out
+
+    def _warm(self, url: str):
+        """
+        Download an image in the background unless that is already under way.
+
+        :param url: The remote image URL.
+        """
+        with self._warming_lock:
+            if url in self._warming:
+                return
+            self._warming.add(url)
+
+        def fetch():
+            try:
+                self.variant(url)
+            finally:
+                with self._warming_lock:
+                    self._warming.discard(url)
+
+        _executor.submit(fetch)
+
+    def _download(self, url: str) -> bytes:
+        """
+        Download an image, giving up once it exceeds ``MAX_DOWNLOAD_BYTES``.
+
+        :param url: The remote image URL.
+        :return: The image bytes.
+        :raises OSError: If the image is too large.
+        """
+        with self.session.get(url, timeout=10, stream=True) as r:
+            r.raise_for_status()
+            buf = bytearray()
+            for chunk in r.iter_content(chunk_size=64 << 10):
+                buf += chunk
+                if len(buf) > MAX_DOWNLOAD_BYTES:
+                    raise OSError(f"{url} exceeds {MAX_DOWNLOAD_BYTES} bytes")
+        return bytes(buf)
+
+    def _store(self, url: str) -> str:
+        """
+        Download an image and write every variant that is not stored yet.
+
+        :param url: The remote image URL.
+        :return: The digest of the downloaded bytes.
+        """
+        from PIL import Image
+
+        Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+        content = self._download(url)
+        digest = hashlib.sha256(content).hexdigest()
+        img = None
+        for name, size in VARIANTS.items():
+            path = self._variant_path(digest, name)
+            if path.exists():
+                continue
+            if img is None:
+                img = Image.open(io.BytesIO(content)).convert("RGB")
+            resized = img.copy()
+            resized.thumbnail((size, size))
+            buf = io.BytesIO()
+            resized.save(buf, format="JPEG", quality=82, optimize=True)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(path, buf.getvalue())
+        self.index.set(url, digest)
+        self._evict(keep=digest)
+        return digest
+
+    def _evict(self, keep: str = None):
+        """
+        Delete the least recently used images until the stored files fit in
+        ``max_bytes``, and drop the index rows of the deleted images.
+        All variants of an image are evicted together.
+
+        :param keep: A digest that must not be evicted, e.g. the one just stored.
+        """
+        images, total = {}, 0
+        for path in self.root.glob("??/*.jpg"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            digest = path.stem.rsplit("_", 1)[0]
+            used, size, paths = images.get(digest, (0, 0, []))
+            images[digest] = (max(used, st.st_mtime), size + st.st_size, paths + [path])
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for digest, (_, size, paths) in sorted(images.items(), key=lambda i: i[1][0]):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            for path in paths:
+                path.unlink(missing_ok=True)
+            total -= size
+            evicted.append(digest)
+        self.index.delete_values(evicted)
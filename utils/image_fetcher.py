@@ -1,5 +1,30 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.cache import cache_key
+
+SEARCH_URL = "https://api.unsplash.com/search/photos"
+# Longest Retry-After, in seconds, a rate-limited search waits before retrying
+MAX_RETRY_AFTER = 10
+
+
+class _CappedRetry(Retry):
+    """
+    Retry policy that honours ``Retry-After`` but never sleeps longer than
+    ``MAX_RETRY_AFTER``, so a large header value cannot stall a caller.
+    """
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
 
 
 class UnsplashImageFetcher:
@@ -7,33 +32,117 @@ class UnsplashImageFetcher:
     Fetches images from Unsplash based on a search query.
     """
 
-    def __init__(self, access_key: str):
+    def __init__(
+        self,
+        access_key: str,
+        ttl: int = 3600,
+        pool_size: int = 8,
+        cache=None,
+        memo_size: int = 256,
+    ):
         """
         Initialize the Unsplash client with the provided access key.
 
         :param access_key: The access key for Unsplash API.
+        :param ttl: How long search results are memoized, in seconds.
+        :param pool_size: The maximum number of pooled connections, which also
+            bounds the concurrency of batch searches.
+        :param cache: Optional DiskCache for search results, shared by every
+            process using the same database and kept across restarts.
+        :param memo_size: The maximum number of searches memoized in memory;
+            the least recently used are dropped first.
         """
         self.access_key = access_key
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.cache = cache
+        # A session reuses TCP/TLS connections across searches; failed
+        # requests and rate-limit/server errors are retried with backoff
+        self.session = requests.Session()
+        retries = _CappedRetry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+        )
+        self.session.mount("https://", adapter)
+        # Replaces st.cache_data so the fetcher also works outside Streamlit
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
 
-    @st.cache_data(ttl=3600)
-    def fetch_images(_self, query: str, n: int = 5) -> list[str]:
+    def fetch_images(self, query: str, n: int = 5) -> list[str]:
         """
         Fetches images from Unsplash based on a search query.
-        Uses caching to avoid repeated API calls.
+        Results are looked up in memory, then in the disk cache, before
+        the API is called.
 
         :param query: The search query for the images.
         :param n: The number of images to fetch.
         :return: The list of image URLs.
         """
-        if not _self.access_key:
+        if not self.access_key:
             return []
-        url = "https://api.unsplash.com/search/photos"
+        key = (query, n)
+        now = time.monotonic()
+        with self._memo_lock:
+            hit = self._memo.get(key)
+            if hit and hit[0] > now:
+                self._memo.move_to_end(key)
+                return list(hit[1])
+
+        disk_key = cache_key("unsplash", query, n)
+        urls = self.cache.get(disk_key) if self.cache is not None else None
+        if urls is None:
+            urls = self._search(query, n)
+            if urls and self.cache is not None:
+                self.cache.set(disk_key, urls)
+        if urls:
+            with self._memo_lock:
+                self._memo[key] = (now + self.ttl, urls)
+                self._memo.move_to_end(key)
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+        return list(urls)
+
+    def fetch_images_batch(self, queries: list[str], n: int = 5) -> dict:
+        """
+        Resolve many searches concurrently over the pooled session,
+        e.g. when backfilling images across history entries.
+
+        :param queries: The search queries.
+        :param n: The number of images to fetch per query.
+        :return: A mapping of each query to its list of image URLs.
+        """
+        unique = list(dict.fromkeys(queries))
+        if not unique:
+            return {}
+        workers = min(self.pool_size, len(unique))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda q: self.fetch_images(q, n), unique)
+            return dict(zip(unique, results))
+
+    def _search(self, query: str, n: int) -> list[str]:
+        """
+        Run one search against the Unsplash API.
+
+        :param query: The search query for the images.
+        :param n: The number of images to fetch.
+        :return: The list of image URLs, or an empty list on failure.
+        """
         params = {
             "query": f"{query} recipe food",
             "per_page": n,
-            "client_id": _self.access_key,
+            "client_id": self.access_key,
         }
-        r = requests.get(url, params=params, timeout=5)
+        try:
+            r = self.session.get(SEARCH_URL, params=params, timeout=5)
+        except requests.RequestException:
+            return []
         if r.ok:
             return [res["urls"]["regular"] for res in r.json().get("results", [])]
         return []
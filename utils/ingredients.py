@@ -0,0 +1,189 @@
+import json
+import re
+
+_WORD = re.compile(r"[a-z]+(?:[-'][a-z]+)*")
+_PARENS = re.compile(r"\([^)]*\)")
+# "garlic, minced" / "butter or margarine": keep the first alternative
+_CUT = re.compile(r",|;|\bor\b")
+
+# Measures that may lead an ingredient, in singular form
+UNITS = frozenset("""
+    bag bottle box bunch c can cm cup dash drop fillet g gallon gram handful
+    head inch jar kg kilogram l lb liter litre mg ml milliliter oz ounce
+    package packet piece pinch pint pkg pound pt qt quart sheet slice sprig
+    stalk stick tablespoon tb tbs tbsp teaspoon tin tsp clove
+    """.split())
+
+# Preparation and size words that do not change what the ingredient is
+DESCRIPTORS = frozenset("""
+    about approximately as beaten boiled boneless canned chopped coarsely cooked
+    crushed cubed diced divided drained dried extra finely freshly fresh frozen
+    garnish grated halved heaping large level lightly medium melted minced
+    more needed of optional packed peeled plus quartered raw rinsed ripe
+    roughly salted serving shredded skinless sliced small softened some
+    taste temperature the thinly to trimmed unsalted whole a an for room
+    """.split())
+
+# Words that may lead an ingredient without making it a different one, so
+# "sea salt" is still salt while "peanut butter" is not butter
+QUALIFIERS = frozenset("""
+    dark fat-free good-quality ground kosher light low-fat low-sodium natural
+    organic plain pure quality reduced-fat reduced-sodium sea unsweetened virgin
+    """.split())
+
+# Canonical name for common synonyms, applied after singularization
+ALIASES = {
+    "all-purpose flour": "flour",
+    "plain flour": "flour",
+    "aubergine": "eggplant",
+    "capsicum": "bell pepper",
+    "caster sugar": "sugar",
+    "granulated sugar": "sugar",
+    "white sugar": "sugar",
+    "chile": "chili",
+    "chilli": "chili",
+    "cilantro": "coriander",
+    "cilantro leaf": "coriander",
+    "confectioners' sugar": "powdered sugar",
+    "icing sugar": "powdered sugar",
+    "courgette": "zucchini",
+    "extra-virgin olive oil": "olive oil",
+    "garbanzo": "chickpea",
+    "garbanzo bean": "chickpea",
+    "garlic clove": "garlic",
+    "prawn": "shrimp",
+    "scallion": "green onion",
+    "spring onion": "green onion",
+    "virgin olive oil": "olive oil",
+    "yoghurt": "yogurt",
+}
+
+_IRREGULAR = {"leaves": "leaf", "loaves": "loaf", "halves": "half"}
+_UNCOUNTABLE = frozenset({"molasses", "swiss", "grits", "lemongrass", "series"})
+
+
+def normalize_ingredients(raw_ings):
+    """
+    Normalize the ingredients list to a consistent format.
+
+    :param raw_ings: The raw ingredients list, which can contain strings or dictionaries.
+    :return: A list of normalized ingredient strings.
+    """
+    out = []
+    for i in raw_ings:
+        if isinstance(i, str):
+            out.append(i)
+        elif isinstance(i, dict):
+            txt = i.get("item") or i.get("name") or i.get("text")
+            out.append(txt if isinstance(txt, str) else json.dumps(i))
+        else:
+            out.append(str(i))
+    return out
+
+
+def singularize(word: str) -> str:
+    """
+    Reduce an English plural to its singular with a few suffix rules.
+
+    :param word: A lowercase word.
+    :return: The singular form.
+    """
+    if word in _IRREGULAR:
+        return _IRREGULAR[word]
+    if word in _UNCOUNTABLE or len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "sses", "xes", "zes", "oes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def canonicalize(text) -> str:
+    """
+    Reduce an ingredient line to the name of the ingredient, so that
+    e.g. "2 cloves garlic, minced" and "Garlic" compare equal.
+    Quantities, parentheticals, leading units and preparation words are
+    dropped, words are singularized and the alias table is applied.
+
+    :param text: The ingredient as written by the user or the model.
+    :return: The canonical name, or an empty string if nothing is left.
+    """
+    text = _PARENS.sub(" ", str(text).lower())
+    text = _CUT.split(text, maxsplit=1)[0]
+    words = [singularize(w) for w in _WORD.findall(text)]
+    words = [w for w in words if w not in DESCRIPTORS]
+    while len(words) > 1 and words[0] in UNITS:
+        words.pop(0)
+    name = " ".join(words)
+    return ALIASES.get(name, name)
+
+
+class IngredientIndex:
+    """
+    Lookup table answering "does the user have this ingredient?".
+
+    The user's ingredients are canonicalized once into a dict. A recipe
+    ingredient matches if its canonical name, or a trailing part of it of
+    at least two words, is in the dict, so "red bell pepper" matches
+    "bell pepper" while "sesame oil" does not match "olive oil". A single
+    trailing word only counts if everything before it is in
+    ``QUALIFIERS``: "sea salt" matches "salt", but "peanut butter" does not
+    match "butter". Each lookup costs a few dict probes, however many
+    ingredients the user has.
+    """
+
+    def __init__(self, ingredients=()):
+        """
+        Build the index.
+
+        :param ingredients: The ingredients the user has.
+        """
+        self._index = {}
+        for ing in ingredients:
+            self.add(ing)
+
+    def add(self, ingredient):
+        """
+        Add one ingredient to the index.
+
+        :param ingredient: The ingredient as written by the user.
+        """
+        key = canonicalize(ingredient)
+        if key:
+            self._index.setdefault(key, ingredient)
+
+    def match(self, ingredient):
+        """
+        Find the user's ingredient covering a recipe ingredient.
+
+        :param ingredient: The recipe ingredient.
+        :return: The user's spelling of the matching ingredient, or None.
+        """
+        words = canonicalize(ingredient).split()
+        for start in range(len(words)):
+            if start == len(words) - 1 and start:
+                if not QUALIFIERS.issuperset(words[:start]):
+                    return None
+            suffix = " ".join(words[start:])
+            hit = self._index.get(ALIASES.get(suffix, suffix))
+            if hit is not None:
+                return hit
+        return None
+
+    def __contains__(self, ingredient) -> bool:
+        return self.match(ingredient) is not None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def missing(self, ingredients) -> list:
+        """
+        Filter a recipe's ingredients down to the ones the user lacks.
+
+        :param ingredients: The recipe ingredients.
+        :return: The ingredients without a match, in their original order.
+        """
+        return [ing for ing in ingredients if ing not in self]
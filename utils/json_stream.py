@@ -0,0 +1,129 @@
+import json
+
+_WHITESPACE = " \t\r\n"
+
+# Paths of the values worth surfacing early, mapped to the event they emit
+RECIPE_EVENTS = {
+    ("name",): "name",
+    ("ingredients", None): "ingredient",
+    ("ingredients",): "ingredients",
+    ("instructions", None): "instruction",
+}
+
+
+class RecipeStreamParser:
+    """
+    Incremental JSON parser for a recipe object arriving in pieces.
+
+    Text is fed in arbitrary chunks. The parser keeps a resumable scanner
+    state (open containers, string/escape flags, pending literal) so each
+    character is examined once, and reports the recipe name, every
+    ingredient, the whole ingredient list and every instruction as soon as
+    that value is complete.
+    """
+
+    def __init__(self, events=None):
+        """
+        Initialize the parser.
+
+        :param events: Mapping of value paths to event names; ``None`` in a
+            path matches any array index. Defaults to ``RECIPE_EVENTS``.
+        """
+        self.events = RECIPE_EVENTS if events is None else events
+        self._buf = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._literal_start = None
+
+    def feed(self, text: str) -> list:
+        """
+        Consume the next piece of the response.
+
+        :param text: The newly received text.
+        :return: A list of ``(event, value)`` tuples completed by this piece.
+        """
+        self._buf += text
+        out = []
+        buf = self._buf
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._end_string(self._string_start, i + 1, out)
+                continue
+            if self._literal_start is not None and (c in _WHITESPACE or c in ",]}"):
+                self._complete(self._literal_start, i, out)
+                self._literal_start = None
+            if c in _WHITESPACE:
+                continue
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._stack.append(
+                    {"type": c, "start": i, "key": None, "index": 0, "expect_key": True}
+                )
+            elif c in "}]":
+                frame = self._stack.pop() if self._stack else None
+                if frame is not None:
+                    self._complete(frame["start"], i + 1, out)
+            elif c == ":":
+                if self._stack:
+                    self._stack[-1]["expect_key"] = False
+            elif c == ",":
+                if self._stack:
+                    frame = self._stack[-1]
+                    frame["expect_key"] = True
+                    frame["index"] += 1
+            elif self._literal_start is None:
+                self._literal_start = i
+        self._pos = len(buf)
+        return out
+
+    def close(self) -> dict:
+        """
+        Parse the complete response once the stream has ended.
+
+        :return: The full recipe object.
+        """
+        return json.loads(self._buf)
+
+    def _end_string(self, start: int, end: int, out: list):
+        """
+        Handle a closed string, which is either an object key or a value.
+
+        :param start: The offset of the opening quote.
+        :param end: The offset just past the closing quote.
+        :param out: The list collecting events.
+        """
+        frame = self._stack[-1] if self._stack else None
+        if frame is not None and frame["type"] == "{" and frame["expect_key"]:
+            frame["key"] = json.loads(self._buf[start:end])
+        else:
+            self._complete(start, end, out)
+
+    def _complete(self, start: int, end: int, out: list):
+        """
+        Emit an event if the value that just finished sits on a watched path.
+
+        :param start: The offset where the value starts.
+        :param end: The offset just past the value.
+        :param out: The list collecting events.
+        """
+        path = tuple(
+            frame["key"] if frame["type"] == "{" else frame["index"]
+            for frame in self._stack
+        )
+        event = self.events.get(path)
+        if event is None and path and isinstance(path[-1], int):
+            event = self.events.get(path[:-1] + (None,))
+        if event is not None:
+            out.append((event, json.loads(self._buf[start:end])))
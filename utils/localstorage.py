@@ -1,83 +1,419 @@
+import base64
 import json
-import uuid
-from datetime import datetime
+import zlib
 
+import streamlit as st
 from streamlit_local_storage import LocalStorage
 
-_local = LocalStorage()
+from utils.analytics import Rollups
+from utils.storage import _new_entry
+
+LEGACY_KEY = "pantrypal_history"
+MANIFEST_KEY = "pantrypal_history_manifest"
+ROLLUPS_KEY = "pantrypal_history_rollups"
+CHUNK_PREFIX = "pantrypal_history_chunk_"
+MIRROR_STATE_KEY = "_pantrypal_history_mirror"
+_ZLIB_TAG = "z:"
+
+
+def encode_chunk(entries, compress: bool = True) -> str:
+    """
+    Encode a chunk of entries as compact JSON, optionally zlib-compressed.
+    The manifest is stored with the same encoding.
+
+    :param entries: The entries in the chunk, or the manifest dict.
+    :param compress: Whether to compress the JSON (base64 encoded for storage).
+    :return: The encoded chunk.
+    """
+    raw = json.dumps(entries, separators=(",", ":"))
+    if not compress:
+        return raw
+    packed = base64.b64encode(zlib.compress(raw.encode("utf-8"), 6)).decode("ascii")
+    return _ZLIB_TAG + packed
+
+
+def decode_chunk(data) -> list:
+    """
+    Decode a chunk written by ``encode_chunk`` in either encoding.
+
+    :param data: The stored chunk value.
+    :return: The entries in the chunk, or an empty list if it is unreadable.
+    """
+    if not data:
+        return []
+    try:
+        if isinstance(data, str) and data.startswith(_ZLIB_TAG):
+            data = zlib.decompress(base64.b64decode(data[len(_ZLIB_TAG) :]))
+        return json.loads(data)
+    except (ValueError, zlib.error):
+        return []
+
+
+def decode_manifest(data):
+    """
+    Decode a manifest written by ``encode_chunk``, upgrading manifests from
+    before chunk records carried a count instead of the list of entry IDs.
+
+    :param data: The stored manifest value.
+    :return: The manifest dict, or None if it is missing or unreadable.
+    """
+    manifest = decode_chunk(data)
+    if not isinstance(manifest, dict) or "chunks" not in manifest:
+        return None
+    for chunk in manifest["chunks"]:
+        if "ids" in chunk:
+            chunk["count"] = len(chunk.pop("ids"))
+    return manifest
 
 
 class Storage:
     """
     Class to manage the local storage of recipe history.
+
+    History is sharded across fixed-size chunk keys plus a small manifest
+    key listing each chunk and how many entries it holds, which keeps each
+    write small and well under the browser's localStorage quota. Chunks and
+    the manifest are both stored compressed. The analytics rollups live
+    under a key of their own, compressed the same way, and are only written
+    when a save or delete changes them.
+
+    Reads and writes go through a mirror kept in the Streamlit session, so
+    decoded chunks are reused across reruns. Writes only mark chunks dirty;
+    ``flush`` pushes the dirty chunks and the manifest to the browser in one
+    go and should be called once at the end of every script run.
     """
 
-    def __init__(self):
+    def __init__(self, chunk_size: int = 25, compress: bool = True, state=None):
         """
         Initialize the storage manager using browser localStorage.
+        A history saved in the old single-key layout is migrated on first use.
+
+        :param chunk_size: The maximum number of entries per chunk.
+        :param compress: Whether to zlib-compress chunks and the manifest.
+        :param state: The mapping holding the mirror; defaults to ``st.session_state``.
+        """
+        self._local = LocalStorage()
+        if getattr(self._local, "storedItems", None) is None:
+            self._local.storedItems = {}
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self._state = st.session_state if state is None else state
+        self._mirror = self._load_mirror()
+
+    # ─── Low-level helpers ─────────────────────────────────────
+    def _get(self, key: str):
+        """
+        Read a raw value from localStorage.
+
+        :param key: The localStorage key.
+        :return: The stored value, or None if missing or unavailable.
+        """
+        try:
+            return self._local.getItem(key)
+        except Exception:
+            # If localStorage isn't ready or storedItems is invalid,
+            # treat the key as missing.
+            return None
+
+    def _load_mirror(self) -> dict:
+        """
+        Get the session mirror, (re)building it from localStorage when the
+        browser's manifest changed underneath a clean mirror (e.g. once the
+        component has delivered the stored items, or another tab saved).
+
+        :return: The mirror dictionary.
+        """
+        raw = self._get(MANIFEST_KEY)
+        mirror = self._state.get(MIRROR_STATE_KEY)
+        if mirror is not None and (self._is_dirty(mirror) or mirror["source"] == raw):
+            return mirror
+
+        mirror = {
+            "source": raw,
+            "manifest": {"next": 0, "chunks": []},
+            "chunks": {},
+            "dirty": set(),
+            "removed": set(),
+            "manifest_dirty": False,
+        }
+        self._state[MIRROR_STATE_KEY] = mirror
+        self._mirror = mirror
+        manifest = decode_manifest(raw)
+        if manifest is not None:
+            mirror["manifest"] = manifest
+            if "rollups" in manifest:
+                # Older manifests carried the rollups; move them to their key
+                self._store_rollups(manifest.pop("rollups"))
+                mirror["manifest_dirty"] = True
+            return mirror
+        legacy = self._get(LEGACY_KEY)
+        if legacy:
+            try:
+                history = json.loads(legacy)
+            except json.JSONDecodeError:
+                history = []
+            for start in range(0, len(history), self.chunk_size):
+                self._write_chunk(None, history[start : start + self.chunk_size])
+            mirror["removed"].add(LEGACY_KEY)
+        return mirror
+
+    @staticmethod
+    def _is_dirty(mirror: dict) -> bool:
+        """
+        Check whether a mirror holds changes not yet flushed.
+
+        :param mirror: The mirror dictionary.
+        :return: True if a flush is pending.
+        """
+        return bool(mirror["dirty"] or mirror["removed"] or mirror["manifest_dirty"])
+
+    @property
+    def _manifest(self) -> dict:
+        return self._mirror["manifest"]
+
+    def _read_chunk(self, chunk: dict) -> list:
+        """
+        Read one chunk, decoding it from localStorage only on first access.
+
+        :param chunk: The manifest record for the chunk.
+        :return: The entries in the chunk.
+        """
+        cache = self._mirror["chunks"]
+        if chunk["key"] not in cache:
+            cache[chunk["key"]] = decode_chunk(self._get(chunk["key"]))
+        return cache[chunk["key"]]
+
+    def _write_chunk(self, chunk, entries: list):
+        """
+        Replace one chunk in the mirror and mark it dirty.
+        Passing ``chunk=None`` appends a new chunk to the manifest.
+
+        :param chunk: The manifest record of the chunk, or None for a new one.
+        :param entries: The entries the chunk should hold.
+        """
+        manifest = self._manifest
+        if chunk is None:
+            chunk = {"key": f"{CHUNK_PREFIX}{manifest['next']}", "count": 0}
+            manifest["next"] += 1
+            manifest["chunks"].append(chunk)
+        chunk["count"] = len(entries)
+        self._mirror["chunks"][chunk["key"]] = entries
+        self._mirror["dirty"].add(chunk["key"])
+        self._mirror["removed"].discard(chunk["key"])
+        self._mirror["manifest_dirty"] = True
+
+    def _remove_chunk(self, chunk: dict):
         """
-        # Nothing to initialize beyond the LocalStorage instance
-        pass
+        Drop one chunk from the mirror and schedule its key for deletion.
 
+        :param chunk: The manifest record of the chunk.
+        """
+        self._manifest["chunks"].remove(chunk)
+        self._mirror["chunks"].pop(chunk["key"], None)
+        self._mirror["dirty"].discard(chunk["key"])
+        self._mirror["removed"].add(chunk["key"])
+        self._mirror["manifest_dirty"] = True
+
+    def _find_chunk(self, entry_id: str):
+        """
+        Find the chunk holding an entry.
+        The manifest does not list entry IDs, so chunks are searched newest
+        first; the chunks of the pages on screen are already decoded in the
+        mirror, so looking up a displayed entry decodes nothing.
+
+        :param entry_id: The ID of the recipe entry.
+        :return: The manifest record of the chunk, or None.
+        """
+        for chunk in reversed(self._manifest["chunks"]):
+            if any(e["id"] == entry_id for e in self._read_chunk(chunk)):
+                return chunk
+        return None
+
+    def flush(self):
+        """
+        Write all pending changes to localStorage.
+        Only dirty chunks, the rollups if they changed, deleted chunk keys and
+        the manifest are sent across the component bridge; a clean mirror
+        makes this a no-op.
+        """
+        mirror = self._mirror
+        for key in sorted(mirror["dirty"]):
+            self._local.setItem(
+                key,
+                encode_chunk(mirror["chunks"][key], self.compress),
+                key=f"set_{key}",
+            )
+        for key in sorted(mirror["removed"]):
+            if key in self._local.storedItems:
+                self._local.deleteItem(key, key=f"del_{key}")
+        if mirror["manifest_dirty"]:
+            raw = encode_chunk(mirror["manifest"], self.compress)
+            self._local.setItem(MANIFEST_KEY, raw, key=f"set_{MANIFEST_KEY}")
+            mirror["source"] = raw
+        mirror["dirty"].clear()
+        mirror["removed"].clear()
+        mirror["manifest_dirty"] = False
+
+    # ─── Storage API ───────────────────────────────────────────
     def load_history(self) -> list:
         """
-        Load the recipe history from localStorage.
+        Load the recipe history from the session mirror.
 
         :return: A list of recipe entries.
         """
-        raw = _local.getItem("pantrypal_history") or "[]"
-        try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            return []
+        history = []
+        for chunk in self._manifest["chunks"]:
+            history.extend(self._read_chunk(chunk))
+        return history
+
+    def iter_history(self):
+        """
+        Iterate over the recipe history one chunk at a time.
+
+        :return: An iterator over the recipe entries, oldest first.
+        """
+        for chunk in self._manifest["chunks"]:
+            yield from self._read_chunk(chunk)
+
+    def count(self) -> int:
+        """
+        Count the entries in the history from the manifest alone.
+
+        :return: The number of recipe entries.
+        """
+        return sum(chunk["count"] for chunk in self._manifest["chunks"])
+
+    def latest(self, n: int) -> list:
+        """
+        Load the ``n`` most recent entries.
+
+        :param n: The number of entries to return.
+        :return: A list of recipe entries, newest first.
+        """
+        return self.page(0, n)
+
+    def page(self, page: int, size: int = 10) -> list:
+        """
+        Load one page of the history, counting pages from the newest entry.
+        Only the chunks overlapping the page are decoded.
+
+        :param page: The zero-based page number.
+        :param size: The number of entries per page.
+        :return: A list of recipe entries, newest first.
+        """
+        skip, out = page * size, []
+        for chunk in reversed(self._manifest["chunks"]):
+            if len(out) >= size:
+                break
+            if skip >= chunk["count"]:
+                skip -= chunk["count"]
+                continue
+            newest_first = self._read_chunk(chunk)[::-1]
+            out.extend(newest_first[skip : skip + size - len(out)])
+            skip = 0
+        return out
+
+    def get(self, entry_id: str):
+        """
+        Look up a single entry by ID, decoding only its chunk.
+
+        :param entry_id: The ID of the recipe entry.
+        :return: The recipe entry, or None if it does not exist.
+        """
+        chunk = self._find_chunk(entry_id)
+        if chunk is None:
+            return None
+        return next((e for e in self._read_chunk(chunk) if e["id"] == entry_id), None)
+
+    def rollups(self) -> Rollups:
+        """
+        Get the analytics rollups of the history.
+        Histories saved before rollups existed get them built once.
+
+        :return: The rollups.
+        """
+        cache = self._mirror["chunks"]
+        if ROLLUPS_KEY not in cache:
+            cache[ROLLUPS_KEY] = decode_chunk(self._get(ROLLUPS_KEY))
+        data = cache[ROLLUPS_KEY]
+        if not Rollups.is_current(data) or data.get("recipes") != self.count():
+            data = Rollups.from_history(self.iter_history()).to_dict()
+            self._store_rollups(data)
+        return Rollups(data)
+
+    def _store_rollups(self, data: dict):
+        """
+        Replace the rollups in the mirror and mark their key dirty.
+
+        :param data: The rollups snapshot from ``Rollups.to_dict``.
+        """
+        self._mirror["chunks"][ROLLUPS_KEY] = data
+        self._mirror["dirty"].add(ROLLUPS_KEY)
+
+    def _update_rollups(self, added=None, removed=None):
+        """
+        Apply one saved or deleted entry to the rollups.
+        Call before the chunk itself is changed.
+
+        :param added: The entry being saved, if any.
+        :param removed: The entry being deleted, if any.
+        """
+        rollups = self.rollups()
+        if added is not None:
+            rollups.add(added)
+        if removed is not None:
+            rollups.remove(removed)
+        self._store_rollups(rollups.to_dict())
 
     def save_recipe(self, recipe, image_url, user_ings, substitutions):
         """
         Save a recipe entry to the history.
-        This includes the recipe details, image URL, user ingredients, and substitutions.
-        The entry is appended to the existing history.
-        Each entry is assigned a unique ID and timestamp.
-        The history is saved back to localStorage.
+        The entry goes into the newest chunk, or a new chunk once that is full;
+        only that chunk and the manifest are written on the next flush.
 
         :param recipe: The recipe dictionary containing details like name, ingredients, instructions, and nutrition.
         :param image_url: The URL of the hero image for the recipe.
         :param user_ings: The list of ingredients provided by the user.
         :param substitutions: The substitutions for ingredients, either as a list of dicts or a dict mapping.
+        :return: The newly created history entry.
         """
-        history = self.load_history()
-        entry = {
-            "id": uuid.uuid4().hex,
-            # Local time instead of UTC
-            "timestamp": datetime.now().isoformat(),
-            "recipe": recipe,
-            "recipe_ings": recipe.get("ingredients", []),
-            "image_url": image_url,
-            "user_ings": user_ings,
-            "substitutions": substitutions,
-        }
-        history.append(entry)
-        _local.setItem("pantrypal_history", json.dumps(history, indent=2))
+        entry = _new_entry(recipe, image_url, user_ings, substitutions)
+        self._update_rollups(added=entry)
+        chunks = self._manifest["chunks"]
+        if chunks and chunks[-1]["count"] < self.chunk_size:
+            last = chunks[-1]
+            self._write_chunk(last, self._read_chunk(last) + [entry])
+        else:
+            self._write_chunk(None, [entry])
+        return entry
 
-    def delete_recipe(self, entry_id: str):
+    def delete_recipe(self, entry_id: str, entry: dict = None):
         """
         Delete a recipe entry from the history.
-        This method removes the entry with the specified ID from the history.
-        The updated history is saved back to localStorage.
-        If the entry ID is not found, no action is taken.
-        The history is saved back to localStorage.
+        Only the chunk holding the entry and the manifest are written on the
+        next flush; a chunk left empty is removed. If the entry ID is not
+        found, no action is taken.
 
         :param entry_id: The ID of the recipe entry to delete.
+        :param entry: Unused; accepted for parity with ``JournalStorage``.
         """
-        history = self.load_history()
-        history = [e for e in history if e["id"] != entry_id]
-        _local.setItem("pantrypal_history", json.dumps(history, indent=2))
+        chunk = self._find_chunk(entry_id)
+        if chunk is None:
+            return
+        entries = self._read_chunk(chunk)
+        self._update_rollups(removed=next(e for e in entries if e["id"] == entry_id))
+        entries = [e for e in entries if e["id"] != entry_id]
+        if entries:
+            self._write_chunk(chunk, entries)
+        else:
+            self._remove_chunk(chunk)
 
     def clear_history(self):
         """
         Clear the entire recipe history.
-        This method removes all entries from the history.
-        The history is saved back to localStorage as an empty list.
-
-        :return: The updated recipe history (empty list).
+        This method removes all entries from the history right away and
+        discards any pending writes.
         """
-        _local.deleteAll()
+        self._local.deleteAll()
+        self._state.pop(MIRROR_STATE_KEY, None)
+        self._mirror = self._load_mirror()
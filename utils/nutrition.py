@@ -0,0 +1,153 @@
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Canonical unit and conversion factor for every recognised unit spelling
+UNITS = {
+    "g": ("g", 1.0),
+    "gram": ("g", 1.0),
+    "grams": ("g", 1.0),
+    "kg": ("g", 1000.0),
+    "mg": ("g", 1e-3),
+    "milligram": ("g", 1e-3),
+    "milligrams": ("g", 1e-3),
+    "mcg": ("g", 1e-6),
+    "µg": ("g", 1e-6),
+    "μg": ("g", 1e-6),
+    "ug": ("g", 1e-6),
+    "kcal": ("kcal", 1.0),
+    "cal": ("kcal", 1.0),  # food "Calories" are kilocalories
+    "cals": ("kcal", 1.0),
+    "calorie": ("kcal", 1.0),
+    "calories": ("kcal", 1.0),
+    "kj": ("kcal", 1 / 4.184),
+}
+
+# The first number in a value, plus the word directly after it as its unit
+_AMOUNT = r"(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[^\W\d_]+)?"
+_AMOUNT_RE = re.compile(_AMOUNT)
+# Thousands separators, e.g. "1,200 mg"
+_THOUSANDS = r"(?<=\d),(?=\d{3}(?!\d))"
+_THOUSANDS_RE = re.compile(_THOUSANDS)
+
+_BASE_UNIT = {unit: base for unit, (base, _) in UNITS.items()}
+_FACTOR = {unit: factor for unit, (_, factor) in UNITS.items()}
+
+
+def parse_amount(text) -> tuple:
+    """
+    Extract the first number in a nutrition value and the unit after it.
+
+    :param text: The value as generated, e.g. ``"Approximately 5.5 mg"``.
+    :return: A ``(value, unit)`` tuple; the value is None if there is no
+        number and the unit is lowercased, or None if absent.
+    """
+    text = "" if text is None else str(text)
+    m = _AMOUNT_RE.search(_THOUSANDS_RE.sub("", text))
+    if not m:
+        return None, None
+    unit = m.group("unit")
+    return float(m.group("value")), unit.lower() if unit else None
+
+
+def normalize_amount(text):
+    """
+    Parse a nutrition value and convert it to its canonical unit
+    (grams for masses, kcal for energy). Values with an unknown or missing
+    unit are returned unconverted.
+
+    :param text: The value as generated.
+    :return: The converted amount, or None if there is no number.
+    """
+    value, unit = parse_amount(text)
+    if value is None:
+        return None
+    return value * _FACTOR.get(unit, 1.0)
+
+
+def extract_amounts(values: "pd.Series") -> "pd.DataFrame":
+    """
+    Vectorized ``parse_amount`` plus unit normalization for a column of values.
+
+    :param values: The nutrition values as generated.
+    :return: A DataFrame aligned with ``values`` holding ``value``, ``unit``,
+        ``amount`` (in the canonical unit) and ``base_unit``.
+    """
+    import pandas as pd
+
+    text = values.astype("string").str.replace(_THOUSANDS, "", regex=True)
+    out = text.str.extract(_AMOUNT)
+    out["value"] = pd.to_numeric(out["value"]).astype("float64")
+    out["unit"] = out["unit"].str.lower()
+    factor = out["unit"].map(_FACTOR).astype("float64").fillna(1.0)
+    out["amount"] = out["value"] * factor
+    out["base_unit"] = out["unit"].map(_BASE_UNIT)
+    return out
+
+
+def nutrition_table(history) -> "pd.DataFrame":
+    """
+    Flatten a history into one row per parsable nutrition value.
+
+    :param history: An iterable of history entries.
+    :return: A long DataFrame with ``entry`` (position in the history),
+        ``name``, ``metric``, ``raw`` and the ``extract_amounts`` columns.
+    """
+    import pandas as pd
+
+    rows = [
+        (i, entry.get("recipe", {}).get("name", "Unknown"), metric, raw)
+        for i, entry in enumerate(history)
+        for metric, raw in (entry.get("recipe", {}).get("nutrition", {}) or {}).items()
+    ]
+    table = pd.DataFrame(rows, columns=["entry", "name", "metric", "raw"])
+    table = pd.concat([table, extract_amounts(table["raw"])], axis=1)
+    return table.dropna(subset=["value"]).reset_index(drop=True)
+
+
+def nutrition_wide(history) -> "pd.DataFrame":
+    """
+    Tabulate normalized nutrition amounts with one row per recipe.
+
+    :param history: An iterable of history entries.
+    :return: A DataFrame indexed by recipe name with one column per metric.
+    """
+    import pandas as pd
+
+    table = nutrition_table(history)
+    if table.empty:
+        return pd.DataFrame(index=pd.Index([], name="name"))
+    wide = table.pivot_table(
+        index=["entry", "name"], columns="metric", values="amount", aggfunc="first"
+    )
+    wide.columns.name = None
+    return wide.reset_index("entry", drop=True)
+
+
+def parse_timestamp(text):
+    """
+    Parse one history timestamp.
+
+    :param text: The ISO timestamp, optionally with a trailing ``Z``.
+    :return: The naive datetime, or None if it is unparsable.
+    """
+    try:
+        return datetime.fromisoformat(str(text).replace("Z", ""))
+    except ValueError:
+        return None
+
+
+def parse_timestamps(values) -> "pd.Series":
+    """
+    Vectorized ``parse_timestamp``.
+
+    :param values: The ISO timestamps.
+    :return: A datetime64 Series; unparsable timestamps become NaT.
+    """
+    import pandas as pd
+
+    text = pd.Series(values, dtype="string").str.replace("Z", "", regex=False)
+    return pd.to_datetime(text, format="ISO8601", errors="coerce")
@@ -0,0 +1,51 @@
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# One pool per server process; work submitted here must not call st.* APIs
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PANTRYPAL_BACKGROUND_WORKERS", 8)),
+    thread_name_prefix="pantrypal-bg",
+)
+
+
+def submit(fn, *args, **kwargs) -> Future:
+    """
+    Run a function on the shared background thread pool.
+
+    :param fn: The function to run.
+    :param args: Positional arguments for the function.
+    :param kwargs: Keyword arguments for the function.
+    :return: A Future for the function's result.
+    """
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def resolved(value) -> Future:
+    """
+    Wrap an already-known value in a completed Future.
+
+    :param value: The result value.
+    :return: A Future whose result is ``value``.
+    """
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def result_or(future: Future, default, timeout=None):
+    """
+    Wait for a background result, falling back to a default on failure.
+
+    :param future: The Future to wait on.
+    :param default: The value to return if the work failed or timed out.
+    :param timeout: The maximum number of seconds to wait, or None.
+    :return: The Future's result, or ``default``.
+    """
+    try:
+        return future.result(timeout=timeout)
+    except Exception:
+        logger.exception("Background task failed")
+        return default
@@ -0,0 +1,225 @@
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from utils.analytics import Rollups
+from utils.storage import _new_entry
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+    id        TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    entry     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE TABLE IF NOT EXISTS rollups (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+class SQLiteStorage:
+    """
+    Class to manage recipe history in a SQLite database.
+
+    Entries are stored one row each, with ``id`` and ``timestamp`` indexed,
+    so point deletes and "most recent N" reads never touch the rest of the
+    history. Analytics rollups live in their own table and are updated in
+    the same transaction as every insert and delete.
+    """
+
+    def __init__(self, path="recipe_history.db"):
+        """
+        Initialize the storage with the given database path.
+
+        :param path: The path to the SQLite database file.
+        """
+        self.path = Path(path)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        with closing(self._connect()) as conn, conn:
+            # Databases created before rollups existed get them built once
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT data FROM rollups").fetchone()
+            if row is None or not Rollups.is_current(json.loads(row[0])):
+                self._store_rollups(conn, self._load_rollups(conn))
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection to the database.
+        Connections are short-lived so the storage can be shared across threads.
+
+        :return: The SQLite connection.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _load_rollups(self, conn: sqlite3.Connection) -> Rollups:
+        """
+        Read the stored rollups, building them from the history if this
+        database predates them or their current form.
+
+        :param conn: The connection to read with.
+        :return: The rollups.
+        """
+        row = conn.execute("SELECT data FROM rollups WHERE name = 'history'").fetchone()
+        data = json.loads(row[0]) if row is not None else None
+        if Rollups.is_current(data):
+            return Rollups(data)
+        rows = conn.execute("SELECT entry FROM history ORDER BY seq")
+        return Rollups.from_history(json.loads(r[0]) for r in rows)
+
+    @staticmethod
+    def _store_rollups(conn: sqlite3.Connection, rollups: Rollups):
+        """
+        Write the rollups; call inside the transaction that changed the history.
+
+        :param conn: The connection holding the transaction.
+        :param rollups: The rollups to store.
+        """
+        conn.execute(
+            "INSERT OR REPLACE INTO rollups (name, data) VALUES ('history', ?)",
+            (json.dumps(rollups.to_dict()),),
+        )
+
+    def load_history(self) -> list:
+        """
+        Load the full recipe history from the database.
+
+        :return: A list of recipe entries, oldest first.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT entry FROM history ORDER BY seq").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_history(self):
+        """
+        Stream the recipe history one entry at a time from a cursor, so
+        memory stays bounded however large the table is.
+
+        :return: An iterator over the recipe entries, oldest first.
+        """
+        with closing(self._connect()) as conn:
+            for (entry,) in conn.execute("SELECT entry FROM history ORDER BY seq"):
+                yield json.loads(entry)
+
+    def count(self) -> int:
+        """
+        Count the entries in the history.
+
+        :return: The number of recipe entries.
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def latest(self, n: int) -> list:
+        """
+        Load the ``n`` most recent entries using the timestamp index.
+
+        :param n: The number of entries to return.
+        :return: A list of recipe entries, newest first.
+        """
+        return self.page(0, n)
+
+    def page(self, page: int, size: int = 10) -> list:
+        """
+        Load one page of the history, counting pages from the newest entry.
+
+        :param page: The zero-based page number.
+        :param size: The number of entries per page.
+        :return: A list of recipe entries, newest first.
+        """
+        # A negative LIMIT would mean no limit at all in SQLite
+        if page < 0 or size <= 0:
+            return []
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT entry FROM history ORDER BY timestamp DESC, seq DESC "
+                "LIMIT ? OFFSET ?",
+                (size, page * size),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, entry_id: str):
+        """
+        Look up a single entry by ID using the unique index.
+
+        :param entry_id: The ID of the recipe entry.
+        :return: The recipe entry, or None if it does not exist.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT entry FROM history WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def rollups(self) -> Rollups:
+        """
+        Get the analytics rollups of the history.
+
+        :return: The rollups.
+        """
+        with closing(self._connect()) as conn:
+            return self._load_rollups(conn)
+
+    def flush(self):
+        """
+        No-op kept for API parity with the browser storage; writes are
+        committed as soon as each call returns.
+        """
+
+    def save_recipe(self, recipe, image_url, user_ings, substitutions):
+        """
+        Save a recipe entry to the history as a single row insert.
+
+        :param recipe: The recipe dictionary containing details like name, ingredients, instructions, and nutrition.
+        :param image_url: The URL of the hero image for the recipe.
+        :param user_ings: The list of ingredients provided by the user.
+        :param substitutions: The substitutions for ingredients, either as a list of dicts or a dict mapping.
+        :return: The newly created history entry.
+        """
+        entry = _new_entry(recipe, image_url, user_ings, substitutions)
+        with closing(self._connect()) as conn, conn:
+            # Take the write lock first so concurrent rollup updates serialize
+            conn.execute("BEGIN IMMEDIATE")
+            rollups = self._load_rollups(conn)
+            conn.execute(
+                "INSERT INTO history (id, timestamp, entry) VALUES (?, ?, ?)",
+                (entry["id"], entry["timestamp"], json.dumps(entry)),
+            )
+            rollups.add(entry)
+            self._store_rollups(conn, rollups)
+        return entry
+
+    def delete_recipe(self, entry_id: str, entry: dict = None):
+        """
+        Delete a recipe entry by ID using the unique index.
+        If the entry ID is not found, no action is taken.
+
+        :param entry_id: The ID of the recipe entry to delete.
+        :param entry: Unused; accepted for parity with ``JournalStorage``.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT entry FROM history WHERE id = ?", (entry_id,)
+            ).fetchone()
+            if row is None:
+                return
+            rollups = self._load_rollups(conn)
+            conn.execute("DELETE FROM history WHERE id = ?", (entry_id,))
+            rollups.remove(json.loads(row[0]))
+            self._store_rollups(conn, rollups)
+
+    def clear_history(self):
+        """
+        Clear the entire recipe history.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM history")
+            self._store_rollups(conn, Rollups())
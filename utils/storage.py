@@ -1,12 +1,53 @@
 import json
+import os
 import uuid
+from collections import deque
 from datetime import datetime
+from functools import partial
+from itertools import islice
 from pathlib import Path
 
+from utils.analytics import Rollups
+from utils.fileio import FileLock, atomic_write, group_commit_for
+from utils.history_stream import (
+    iter_journal,
+    iter_journal_reversed,
+    iter_json_array,
+    iter_tombstones,
+)
+
+
+def _new_entry(recipe, image_url, user_ings, substitutions) -> dict:
+    """
+    Build a new history entry with a fresh ID and timestamp.
+
+    :param recipe: The recipe dictionary.
+    :param image_url: The URL of the hero image for the recipe.
+    :param user_ings: The list of ingredients provided by the user.
+    :param substitutions: The substitutions for ingredients.
+    :return: The history entry.
+    """
+    return {
+        "id": uuid.uuid4().hex,
+        # Local time instead of UTC
+        "timestamp": datetime.now().isoformat(),
+        "recipe": recipe,
+        "recipe_ings": recipe.get("ingredients", []),
+        "image_url": image_url,
+        "user_ings": user_ings,
+        "substitutions": substitutions,
+    }
+
 
 class Storage:
     """
     Class to manage the local storage of recipe history.
+
+    Writes are safe across threads and processes: every read-modify-write
+    runs under an advisory file lock, the new file is written to a temporary
+    file and renamed into place, and concurrent writers are group-committed
+    so a burst of saves costs a single rewrite and fsync. Analytics rollups
+    are updated in the same commit and kept in a ``<path>.rollups`` sidecar.
     """
 
     def __init__(self, path="recipe_history.json"):
@@ -17,7 +58,10 @@ class Storage:
         """
         self.path = Path(path)
         if not self.path.exists():
-            self.path.write_text("[]")
+            with FileLock(self.path):
+                if not self.path.exists():
+                    atomic_write(self.path, "[]")
+        self._writer = group_commit_for(self.path, partial(_commit_snapshot, self.path))
 
     def load_history(self) -> list:
         """
@@ -27,6 +71,96 @@ class Storage:
         """
         return json.loads(self.path.read_text())
 
+    def iter_history(self):
+        """
+        Stream the recipe history one entry at a time, so memory stays
+        bounded however large the file is.
+
+        :return: An iterator over the recipe entries, oldest first.
+        """
+        with self.path.open(encoding="utf-8") as f:
+            yield from iter_json_array(f)
+
+    def count(self) -> int:
+        """
+        Count the entries in the history.
+        The count is kept in the rollups sidecar, so the history is only
+        scanned when the sidecar has to be rebuilt.
+
+        :return: The number of recipe entries.
+        """
+        return self.rollups().recipes
+
+    def latest(self, n: int) -> list:
+        """
+        Load the ``n`` most recent entries.
+
+        :param n: The number of entries to return.
+        :return: A list of recipe entries, newest first.
+        """
+        return self.page(0, n)
+
+    def page(self, page: int, size: int = 10) -> list:
+        """
+        Load one page of the history, counting pages from the newest entry.
+        The history is streamed once, keeping only the newest
+        ``(page + 1) * size`` entries in memory. A JSON array has no index
+        and cannot be read from its end, so this stays O(history); use the
+        journal or SQLite backend for large histories.
+
+        :param page: The zero-based page number.
+        :param size: The number of entries per page.
+        :return: A list of recipe entries, newest first.
+        """
+        if page < 0 or size <= 0:
+            return []
+        window = deque(self.iter_history(), maxlen=(page + 1) * size)
+        newest_first = list(reversed(window))
+        return newest_first[page * size :]
+
+    def get(self, entry_id: str):
+        """
+        Look up a single entry by ID.
+        Like ``page``, this streams the history and is O(history).
+
+        :param entry_id: The ID of the recipe entry.
+        :return: The recipe entry, or None if it does not exist.
+        """
+        return next((e for e in self.iter_history() if e["id"] == entry_id), None)
+
+    def rollups(self) -> Rollups:
+        """
+        Get the analytics rollups of the history.
+        They are read from the sidecar and only rebuilt from the full history
+        if the sidecar is missing or was not written for the current file.
+
+        :return: The rollups.
+        """
+        rollups = _read_rollups(self.path)
+        if rollups is None:
+            with FileLock(self.path):
+                rollups = _read_rollups(self.path)
+                if rollups is None:
+                    rollups = self._rebuild_rollups()
+        return rollups
+
+    def _rebuild_rollups(self) -> Rollups:
+        """
+        Rebuild the rollups sidecar from the full history.
+        The caller must hold the history's FileLock.
+
+        :return: The rebuilt rollups.
+        """
+        rollups = Rollups.from_history(self.iter_history())
+        _write_rollups(self.path, rollups)
+        return rollups
+
+    def flush(self):
+        """
+        No-op kept for API parity with the browser storage; writes are
+        committed as soon as each call returns.
+        """
+
     def save_recipe(self, recipe, image_url, user_ings, substitutions):
         """
         Save a recipe entry to the history.
@@ -39,43 +173,416 @@ class Storage:
         :param image_url: The URL of the hero image for the recipe.
         :param user_ings: The list of ingredients provided by the user.
         :param substitutions: The substitutions for ingredients, either as a list of dicts or a dict mapping.
-        :return: The updated recipe history.
-        """
-        history = self.load_history()
-        entry = {
-            "id": uuid.uuid4().hex,
-            # Local time instead of UTC
-            "timestamp": datetime.now().isoformat(),
-            "recipe": recipe,
-            "recipe_ings": recipe.get("ingredients", []),
-            "image_url": image_url,
-            "user_ings": user_ings,
-            "substitutions": substitutions,
-        }
-        history.append(entry)
-        self.path.write_text(json.dumps(history, indent=2))
-
-    def delete_recipe(self, entry_id: str):
+        :return: The newly created history entry.
+        """
+        entry = _new_entry(recipe, image_url, user_ings, substitutions)
+        self._writer.submit(lambda history: history.append(entry))
+        return entry
+
+    def delete_recipe(self, entry_id: str, entry: dict = None):
         """
         Delete a recipe entry from the history.
         This method removes the entry with the specified ID from the history.
         The updated history is saved back to the JSON file.
         If the entry ID is not found, no action is taken.
-        The history is saved back to the JSON file.
 
         :param entry_id: The ID of the recipe entry to delete.
-        :return: The updated recipe history.
+        :param entry: Unused; accepted for parity with ``JournalStorage``.
         """
-        history = self.load_history()
-        history = [e for e in history if e["id"] != entry_id]
-        self.path.write_text(json.dumps(history, indent=2))
+
+        def _delete(history):
+            history[:] = [e for e in history if e["id"] != entry_id]
+
+        self._writer.submit(_delete)
 
     def clear_history(self):
         """
         Clear the entire recipe history.
         This method removes all entries from the history.
         The history is saved back to the JSON file as an empty list.
+        """
+        self._writer.submit(list.clear)
+
+
+class JournalStorage(Storage):
+    """
+    Append-only recipe history backed by a JSON Lines journal.
+
+    Each save appends one compact JSON line and each delete appends a
+    tombstone record, so writes no longer rewrite the whole history.
+    ``load_history`` replays the journal to rebuild the list of entries.
+    """
+
+    TOMBSTONE = "delete"
+
+    def __init__(self, path="recipe_history.jsonl"):
+        """
+        Initialize the journal with the given path.
+        If the file still holds a legacy JSON array, it is migrated in place.
+
+        :param path: The path to the JSON Lines journal.
+        """
+        self.path = Path(path)
+        with FileLock(self.path):
+            if not self.path.exists():
+                self.path.touch()
+            elif _is_json_array(self.path):
+                legacy = json.loads(self.path.read_text() or "[]")
+                _rewrite_journal(self.path, legacy)
+        self._writer = group_commit_for(self.path, partial(_commit_appends, self.path))
+
+    @classmethod
+    def migrate(cls, src, dst="recipe_history.jsonl"):
+        """
+        One-shot migration from the JSON array format to a journal.
+        The journal is written next to ``dst`` and renamed into place,
+        so ``src`` and ``dst`` may be the same file.
+
+        :param src: The path to the legacy ``recipe_history.json`` file.
+        :param dst: The path of the journal to create.
+        :return: A JournalStorage for the migrated journal.
+        """
+        src, dst = Path(src), Path(dst)
+        with FileLock(dst):
+            _rewrite_journal(dst, json.loads(src.read_text() or "[]"))
+        return cls(dst)
+
+    def load_history(self) -> list:
+        """
+        Replay the journal into a list of live recipe entries.
+        A partially written trailing line (e.g. after a crash) is ignored.
+
+        :return: A list of recipe entries, oldest first.
+        """
+        return list(self.iter_history())
+
+    def iter_history(self):
+        """
+        Stream the live entries of the journal one at a time, applying
+        tombstones without holding the history in memory.
+
+        :return: An iterator over the recipe entries, oldest first.
+        """
+        with self.path.open("rb") as f:
+            yield from iter_journal(f, self.TOMBSTONE)
+
+    def page(self, page: int, size: int = 10) -> list:
+        """
+        Load one page of the history, counting pages from the newest entry.
+        The journal is read backwards from its end and reading stops once
+        the page is full, so the cost grows with the page number rather
+        than with the size of the history.
+
+        :param page: The zero-based page number.
+        :param size: The number of entries per page.
+        :return: A list of recipe entries, newest first.
+        """
+        if page < 0 or size <= 0:
+            return []
+        with self.path.open("rb") as f:
+            entries = iter_journal_reversed(f, self.TOMBSTONE)
+            return list(islice(entries, page * size, (page + 1) * size))
+
+    def get(self, entry_id: str):
+        """
+        Look up a single entry by ID, searching backwards from the end of
+        the journal, so recent entries are found without reading it all.
+
+        :param entry_id: The ID of the recipe entry.
+        :return: The recipe entry, or None if it does not exist.
+        """
+        return _find_entry(self.path, entry_id)
+
+    def save_recipe(self, recipe, image_url, user_ings, substitutions):
+        """
+        Append a recipe entry to the journal.
+
+        :param recipe: The recipe dictionary containing details like name, ingredients, instructions, and nutrition.
+        :param image_url: The URL of the hero image for the recipe.
+        :param user_ings: The list of ingredients provided by the user.
+        :param substitutions: The substitutions for ingredients, either as a list of dicts or a dict mapping.
+        :return: The newly created history entry.
+        """
+        entry = _new_entry(recipe, image_url, user_ings, substitutions)
+        self._writer.submit((entry, None))
+        return entry
+
+    def delete_recipe(self, entry_id: str, entry: dict = None):
+        """
+        Append a tombstone for the given entry.
+        Passing the entry as loaded from this history lets its contribution
+        be retracted from the rollups without reading the journal; without
+        it the journal is searched backwards from the end until the entry
+        is found. Deleting an unknown or already deleted ID is harmless.
+
+        :param entry_id: The ID of the recipe entry to delete.
+        :param entry: The recipe entry being deleted, if the caller has it.
+        """
+        self._writer.submit(({"op": self.TOMBSTONE, "id": entry_id}, entry))
+
+    def clear_history(self):
+        """
+        Clear the entire recipe history by truncating the journal.
+        """
+        with FileLock(self.path):
+            atomic_write(self.path, "")
+            _write_rollups(self.path, Rollups())
+
+    def compact(self):
+        """
+        Rewrite the journal with only the live entries, dropping tombstones
+        and superseded records. The sidecar keeps the deleted IDs, so a late
+        delete of a compacted entry is still recognized.
+        """
+        with FileLock(self.path):
+            rollups, deleted = _load_journal_sidecar(self.path)
+            history = self.load_history()
+            _rewrite_journal(self.path, history)
+            _write_rollups(self.path, rollups, deleted)
 
-        :return: The updated recipe history (empty list).
+    def _rebuild_rollups(self) -> Rollups:
         """
-        self.path.write_text("[]")
+        Rebuild the rollups sidecar, including the deleted IDs, from the
+        journal. The caller must hold the journal's FileLock.
+
+        :return: The rebuilt rollups.
+        """
+        return _load_journal_sidecar(self.path)[0]
+
+
+def _commit_snapshot(path: Path, mutations: list) -> list:
+    """
+    Apply a batch of mutations to the JSON history in one locked rewrite.
+
+    :param path: The path to the JSON history file.
+    :param mutations: Callables that modify the history list in place.
+    :return: One result per mutation, or the exception it raised.
+    """
+    results = []
+    with FileLock(path):
+        history = json.loads(path.read_text())
+        rollups = _read_rollups(path) or Rollups.from_history(history)
+        before = {e["id"]: e for e in history}
+        for mutate in mutations:
+            try:
+                results.append(mutate(history))
+            except Exception as e:
+                results.append(e)
+        after = {e["id"] for e in history}
+        for entry in history:
+            if entry["id"] not in before:
+                rollups.add(entry)
+        for entry_id, entry in before.items():
+            if entry_id not in after:
+                rollups.remove(entry)
+        atomic_write(path, json.dumps(history, indent=2))
+        _write_rollups(path, rollups)
+    return results
+
+
+def _commit_appends(path: Path, items: list) -> list:
+    """
+    Append a batch of records to the journal with a single fsync.
+    If a previous write was cut short, the torn line is terminated first
+    so that it cannot swallow the new records.
+
+    :param path: The path to the JSON Lines journal.
+    :param items: ``(record, entry)`` pairs, where ``entry`` is the entry a
+        tombstone deletes if the caller knows it, and None otherwise.
+    :return: One (empty) result per record.
+    """
+    records = [record for record, _ in items]
+    data = "".join(_dump_line(record) for record in records).encode("utf-8")
+    with FileLock(path):
+        rollups, deleted = _load_journal_sidecar(path)
+        saved = {}
+        for record, known in items:
+            entry_id = record["id"]
+            if not _is_tombstone(record):
+                rollups.add(record)
+                saved[entry_id] = record
+                continue
+            # Every delete is remembered, so a repeated one is a no-op
+            if entry_id in deleted:
+                continue
+            entry = saved.pop(entry_id, None) or known or _find_entry(path, entry_id)
+            if entry is not None:
+                rollups.remove(entry)
+                deleted.add(entry_id)
+        with path.open("ab+") as f:
+            if f.tell() > 0:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        _write_rollups(path, rollups, deleted)
+    return [None] * len(records)
+
+
+def _find_entry(path: Path, entry_id: str):
+    """
+    Find a live journal entry, searching backwards from the end, so recent
+    entries are found without reading the whole journal.
+
+    :param path: The path to the JSON Lines journal.
+    :param entry_id: The ID of the entry.
+    :return: The entry, or None if it is not live.
+    """
+    with path.open("rb") as f:
+        entries = iter_journal_reversed(f, JournalStorage.TOMBSTONE)
+        return next((e for e in entries if e["id"] == entry_id), None)
+
+
+def _load_journal_sidecar(path: Path):
+    """
+    Read a journal's rollups and deleted IDs, rebuilding the sidecar from
+    the journal if it is missing or stale.
+    The caller must hold the journal's FileLock.
+
+    :param path: The path to the JSON Lines journal.
+    :return: The rollups and the set of deleted IDs.
+    """
+    data = _read_sidecar(path)
+    if data is not None:
+        return Rollups(data.get("rollups")), set(data.get("deleted", []))
+    with path.open("rb") as f:
+        rollups = Rollups.from_history(iter_journal(f, JournalStorage.TOMBSTONE))
+        deleted = set(iter_tombstones(f, JournalStorage.TOMBSTONE))
+    _write_rollups(path, rollups, deleted)
+    return rollups, deleted
+
+
+def _is_tombstone(record: dict) -> bool:
+    """
+    Check whether a journal record deletes an entry.
+
+    :param record: The journal record.
+    :return: True for tombstones.
+    """
+    return record.get("op") == JournalStorage.TOMBSTONE
+
+
+def _rollups_path(path: Path) -> Path:
+    """
+    Get the location of a history file's rollups sidecar.
+
+    :param path: The path to the history file.
+    :return: The path of the sidecar.
+    """
+    return Path(f"{path}.rollups")
+
+
+def _stamp(path: Path) -> list:
+    """
+    Identify the current version of a history file by size and mtime.
+
+    :param path: The path to the history file.
+    :return: The stamp, or None if the file does not exist.
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_sidecar(path: Path):
+    """
+    Read the rollups sidecar if it matches the current history file.
+
+    :param path: The path to the history file.
+    :return: The sidecar contents, or None if it is missing or stale.
+    """
+    try:
+        data = json.loads(_rollups_path(path).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if data.get("stamp") != _stamp(path) or not Rollups.is_current(data.get("rollups")):
+        return None
+    return data
+
+
+def _read_rollups(path: Path):
+    """
+    Read the rollups from the sidecar if it matches the current history file.
+
+    :param path: The path to the history file.
+    :return: The rollups, or None if the sidecar is missing or stale.
+    """
+    data = _read_sidecar(path)
+    return None if data is None else Rollups(data.get("rollups"))
+
+
+def _write_rollups(path: Path, rollups: Rollups, deleted=()):
+    """
+    Write the rollups sidecar for the current version of the history file.
+    The caller must hold the history's FileLock.
+
+    :param path: The path to the history file.
+    :param rollups: The rollups to store.
+    :param deleted: The IDs deleted from a journal, if any.
+    """
+    data = {"stamp": _stamp(path), "rollups": rollups.to_dict()}
+    if deleted:
+        data["deleted"] = sorted(deleted)
+    atomic_write(_rollups_path(path), json.dumps(data))
+
+
+def _dump_line(record: dict) -> str:
+    """
+    Serialize a record as one compact JSON line.
+
+    :param record: The record to serialize.
+    :return: The JSON line, including the trailing newline.
+    """
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def _rewrite_journal(path: Path, entries: list):
+    """
+    Write entries to a fresh journal and swap it in with a single rename.
+    The caller must hold the journal's FileLock.
+
+    :param path: The path of the journal to (re)write.
+    :param entries: The entries to write, oldest first.
+    """
+    atomic_write(path, "".join(_dump_line(entry) for entry in entries))
+
+
+def _is_json_array(path: Path) -> bool:
+    """
+    Check whether a file holds a legacy JSON array rather than a journal.
+
+    :param path: The path to check.
+    :return: True if the first non-whitespace character is ``[``.
+    """
+    with path.open(encoding="utf-8") as f:
+        for chunk in iter(lambda: f.read(64), ""):
+            stripped = chunk.lstrip()
+            if stripped:
+                return stripped[0] == "["
+    return False
+
+
+BACKENDS = ("json", "journal", "sqlite")
+
+
+def open_storage(backend: str = "json", path=None):
+    """
+    Create the file-backed storage selected by configuration.
+
+    :param backend: One of ``"json"``, ``"journal"`` or ``"sqlite"``.
+    :param path: Optional path for the history; each backend has its own default.
+    :return: A storage object exposing the Storage API.
+    """
+    if backend == "json":
+        return Storage(path) if path else Storage()
+    if backend == "journal":
+        return JournalStorage(path) if path else JournalStorage()
+    if backend == "sqlite":
+        from utils.sqlite_storage import SQLiteStorage
+
+        return SQLiteStorage(path) if path else SQLiteStorage()
+    raise ValueError(f"Unknown storage backend {backend!r}; expected one of {BACKENDS}")
@@ -0,0 +1,85 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Show the startup report in the sidebar (it is always logged)
+ENABLED = os.getenv("PANTRYPAL_TIMING", "").lower() in ("1", "true", "yes")
+
+_first_run = None
+_first_run_lock = threading.Lock()
+
+
+class RunTimer:
+    """
+    Wall-clock durations of the phases of one script run.
+
+    Each ``mark`` closes the phase that began at the previous mark (or at
+    ``start``). The first run finished in a process is kept as the cold
+    start: it is the one that pays for imports and client construction.
+    """
+
+    def __init__(self, start: float = None):
+        """
+        Start timing a run.
+
+        :param start: The ``time.perf_counter()`` value the run began at;
+            defaults to now.
+        """
+        self.start = time.perf_counter() if start is None else start
+        self._last = self.start
+        self.phases = []
+
+    def mark(self, phase: str):
+        """
+        Close the current phase.
+
+        :param phase: The name of the phase that just ended.
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        """
+        The time from the start of the run to the last mark, in seconds.
+        """
+        return self._last - self.start
+
+    def finish(self) -> "RunTimer":
+        """
+        Record the run. The first run finished in this process is logged
+        and kept as the cold start.
+
+        :return: The cold-start run.
+        """
+        global _first_run
+        with _first_run_lock:
+            if _first_run is None:
+                _first_run = self
+                logger.info("Cold start: %s", format_report(self))
+            return _first_run
+
+
+def first_run():
+    """
+    Get the cold-start run of this process.
+
+    :return: The first finished RunTimer, or None if no run has finished.
+    """
+    return _first_run
+
+
+def format_report(timer: RunTimer) -> str:
+    """
+    Describe a run's phases on one line.
+
+    :param timer: The run to describe.
+    :return: E.g. ``"imports 412 ms, clients 35 ms, total 447 ms"``.
+    """
+    parts = [f"{phase} {secs * 1000:.0f} ms" for phase, secs in timer.phases]
+    parts.append(f"total {timer.total * 1000:.0f} ms")
+    return ", ".join(parts)